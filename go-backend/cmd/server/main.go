@@ -1,8 +1,14 @@
 package main
 
 import (
+	"crypto/rand"
+	"encoding/hex"
+	"encoding/json"
 	"log"
 	"net/http"
+	"os"
+	"sync"
+	"time"
 
 	"github.com/gin-gonic/gin"
 	"gorm.io/gorm"
@@ -13,11 +19,102 @@ import (
 
 var db *gorm.DB
 
+// Заголовки trace, которые проставляет pyschedule/tracing.py
+const (
+	traceHeader  = "X-Trace-Id"
+	parentHeader = "X-Parent-Span-Id"
+)
+
+// traceSpan - строка файла span'ов в формате pyschedule/tracing.py
+type traceSpan struct {
+	TraceID  string                 `json:"trace_id"`
+	SpanID   string                 `json:"span_id"`
+	ParentID string                 `json:"parent_id"`
+	Service  string                 `json:"service"`
+	Name     string                 `json:"name"`
+	Start    float64                `json:"start"`
+	Duration float64                `json:"duration"`
+	Attrs    map[string]interface{} `json:"attrs"`
+}
+
+// traceSink дописывает span'ы в TRACE_FILE (тот же файл, что у бота)
+type traceSink struct {
+	mu   sync.Mutex
+	file *os.File
+}
+
+func openTraceSink(path string) *traceSink {
+	if path == "" {
+		return nil
+	}
+	file, err := os.OpenFile(path, os.O_APPEND|os.O_CREATE|os.O_WRONLY, 0o644)
+	if err != nil {
+		log.Printf("trace sink disabled: %v", err)
+		return nil
+	}
+	return &traceSink{file: file}
+}
+
+func (s *traceSink) write(span traceSpan) {
+	line, err := json.Marshal(span)
+	if err != nil {
+		return
+	}
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	if _, err := s.file.Write(append(line, '\n')); err != nil {
+		log.Printf("trace sink write failed: %v", err)
+	}
+}
+
+func newSpanID() string {
+	var id [8]byte
+	rand.Read(id[:])
+	return hex.EncodeToString(id[:])
+}
+
+// traceMiddleware логирует запросы, пришедшие с X-Trace-Id, и пишет их span в sink.
+// Запросы без trace проходят без лишней работы.
+func traceMiddleware(sink *traceSink) gin.HandlerFunc {
+	return func(c *gin.Context) {
+		traceID := c.GetHeader(traceHeader)
+		if traceID == "" {
+			c.Next()
+			return
+		}
+		c.Header(traceHeader, traceID)
+		start := time.Now()
+		c.Next()
+		duration := time.Since(start)
+
+		route := c.FullPath()
+		if route == "" {
+			route = c.Request.URL.Path
+		}
+		parentID := c.GetHeader(parentHeader)
+		status := c.Writer.Status()
+		log.Printf("trace=%s parent=%s %s %s %d %s", traceID, parentID, c.Request.Method, route, status, duration)
+		if sink != nil {
+			sink.write(traceSpan{
+				TraceID:  traceID,
+				SpanID:   newSpanID(),
+				ParentID: parentID,
+				Service:  "go-backend",
+				Name:     c.Request.Method + " " + route,
+				Start:    float64(start.UnixNano()) / 1e9,
+				Duration: duration.Seconds(),
+				Attrs:    map[string]interface{}{"status": status, "bytes": c.Writer.Size()},
+			})
+		}
+	}
+}
+
 func main() {
 	// Инициализация базы данных
 	db = database.InitDB()
 
 	r := gin.Default()
+	r.Use(traceMiddleware(openTraceSink(os.Getenv("TRACE_FILE"))))
 
 	// Health check
 	r.GET("/health", func(c *gin.Context) {
@@ -33,19 +130,29 @@ func main() {
 	{
 		// User routes
 		api.POST("/users", handlers.CreateUser(db))
+		api.GET("/users", handlers.ListUsers(db))
 		api.GET("/users/:telegram_id", handlers.GetUser(db))
 
 		// Schedule routes
 		api.POST("/schedule", handlers.CreateScheduleItem(db))
+		api.POST("/schedule/batch", handlers.CreateScheduleItemsBatch(db))
+		api.PUT("/schedule/batch", handlers.UpdateScheduleItemsBatch(db))
+		api.DELETE("/schedule/batch", handlers.DeleteScheduleItemsBatch(db))
 		api.GET("/schedule", handlers.GetSchedule(db))
+		api.GET("/schedule/changes", handlers.GetScheduleChanges(db))
 		api.GET("/schedule/:id", handlers.GetScheduleByID(db))
 		api.PUT("/schedule/:id", handlers.UpdateScheduleItem(db))
 		api.DELETE("/schedule/:id", handlers.DeleteScheduleItem(db))
 	}
 
-	log.Println("🚀 Server starting on :8080")
-	log.Println("📊 Health check: curl http://localhost:8080/health")
-	log.Println("👤 Create user: curl -X POST http://localhost:8080/api/users -H 'Content-Type: application/json' -d '{\"telegram_id\":123456789,\"username\":\"test_user\"}'")
+	port := os.Getenv("PORT")
+	if port == "" {
+		port = "8080"
+	}
+
+	log.Println("🚀 Server starting on :" + port)
+	log.Println("📊 Health check: curl http://localhost:" + port + "/health")
+	log.Println("👤 Create user: curl -X POST http://localhost:" + port + "/api/users -H 'Content-Type: application/json' -d '{\"telegram_id\":123456789,\"username\":\"test_user\"}'")
 
-	r.Run(":8080")
+	r.Run(":" + port)
 }
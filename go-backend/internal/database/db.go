@@ -1,24 +1,116 @@
 package database
 
 import (
+	"errors"
 	"log"
+	"os"
 	"schedule-backend/internal/models"
+	"time"
 
 	"gorm.io/driver/sqlite"
 	"gorm.io/gorm"
 )
 
+// InitDB открывает SQLite-файл из DB_PATH (по умолчанию schedule.db)
 func InitDB() *gorm.DB {
-	db, err := gorm.Open(sqlite.Open("schedule.db"), &gorm.Config{})
+	path := os.Getenv("DB_PATH")
+	if path == "" {
+		path = "schedule.db"
+	}
+
+	db, err := gorm.Open(sqlite.Open(path), &gorm.Config{})
 	if err != nil {
 		log.Fatal("Failed to connect to database:", err)
 	}
 
-	err = db.AutoMigrate(&models.User{}, &models.ScheduleItem{})
+	err = db.AutoMigrate(&models.User{}, &models.ScheduleItem{}, &models.ScheduleTombstone{}, &models.ChangeCounter{})
 	if err != nil {
 		log.Fatal("Failed to migrate database:", err)
 	}
+	if err := models.InitChangeCounter(db); err != nil {
+		log.Fatal("Failed to init change counter:", err)
+	}
+	dropLegacyIndexes(db)
+
+	backfillScheduleMinutes(db)
+	backfillScheduleVersions(db)
+	pruneTombstones(db)
 
 	log.Println("Database connected successfully")
 	return db
 }
+
+// dropLegacyIndexes удаляет индексы, замененные новыми: (user_id, day_of_week, time_start)
+// сравнивал время строками, его заменил idx_schedule_user_day_minutes
+func dropLegacyIndexes(db *gorm.DB) {
+	migrator := db.Migrator()
+	if migrator.HasIndex(&models.ScheduleItem{}, "idx_schedule_user_day_start") {
+		if err := migrator.DropIndex(&models.ScheduleItem{}, "idx_schedule_user_day_start"); err != nil {
+			log.Println("Failed to drop legacy schedule index:", err)
+		}
+	}
+}
+
+// backfillScheduleMinutes заполняет start_minutes/end_minutes для записей,
+// созданных до появления этих колонок (и нормализует "9:00" в "09:00").
+// Записи с концом не позже начала сохраняются как есть (KeepTimeRange) и
+// попадают в лог: иначе они остались бы без минут и версии.
+func backfillScheduleMinutes(db *gorm.DB) {
+	var legacy []models.ScheduleItem
+	if err := db.Where("start_minutes = 0 AND end_minutes = 0").Find(&legacy).Error; err != nil {
+		log.Println("Failed to load schedule items for backfill:", err)
+		return
+	}
+
+	for i := range legacy {
+		err := db.Save(&legacy[i]).Error
+		if errors.Is(err, models.ErrInvalidTimeRange) {
+			log.Printf("Schedule item %d has time_end not after time_start (%s-%s), keeping it as is",
+				legacy[i].ID, legacy[i].TimeStart, legacy[i].TimeEnd)
+			if err = legacy[i].KeepTimeRange(); err == nil {
+				err = db.Save(&legacy[i]).Error
+			}
+		}
+		if err != nil {
+			log.Printf("Skipping schedule item %d during backfill: %v", legacy[i].ID, err)
+		}
+	}
+	if len(legacy) > 0 {
+		log.Printf("Backfilled time minutes for %d schedule items", len(legacy))
+	}
+}
+
+// backfillScheduleVersions выдает номера изменений записям, созданным до появления
+// ленты изменений, чтобы они попали в нее при чтении с since=0
+func backfillScheduleVersions(db *gorm.DB) {
+	var legacy []models.ScheduleItem
+	if err := db.Where("version = 0").Order("id").Find(&legacy).Error; err != nil {
+		log.Println("Failed to load schedule items for version backfill:", err)
+		return
+	}
+
+	for i := range legacy {
+		if err := db.Save(&legacy[i]).Error; err != nil {
+			log.Printf("Skipping schedule item %d during version backfill: %v", legacy[i].ID, err)
+		}
+	}
+	if len(legacy) > 0 {
+		log.Printf("Backfilled versions for %d schedule items", len(legacy))
+	}
+}
+
+// Сколько хранятся следы удалений для ленты изменений
+const tombstoneRetention = 30 * 24 * time.Hour
+
+// pruneTombstones чистит старые следы удалений; клиенты с более старым курсором
+// получат 410 и перезагрузят расписание целиком
+func pruneTombstones(db *gorm.DB) {
+	pruned, err := models.PruneTombstones(db, tombstoneRetention)
+	if err != nil {
+		log.Println("Failed to prune schedule tombstones:", err)
+		return
+	}
+	if pruned > 0 {
+		log.Printf("Pruned %d schedule tombstones", pruned)
+	}
+}
@@ -0,0 +1,259 @@
+package handlers
+
+import (
+	"errors"
+	"fmt"
+	"sort"
+
+	"schedule-backend/internal/models"
+
+	"github.com/gin-gonic/gin"
+	"gorm.io/gorm"
+)
+
+// Размер пачки для INSERT внутри одной транзакции
+const batchInsertSize = 100
+
+// Поля, которые можно менять через пакетное обновление
+var batchUpdatableFields = map[string]bool{
+	"day_of_week": true,
+	"time_start":  true,
+	"time_end":    true,
+	"subject":     true,
+	"description": true,
+}
+
+type batchCreateRequest struct {
+	Items []models.ScheduleItem `json:"items" binding:"required"`
+}
+
+type batchUpdateRequest struct {
+	Items []map[string]interface{} `json:"items" binding:"required"`
+}
+
+type batchDeleteRequest struct {
+	IDs []uint `json:"ids" binding:"required"`
+}
+
+var errBatchItemNotFound = errors.New("item not found")
+
+// batchOverlaps ищет пересечения внутри самой пачки (после Normalize)
+func batchOverlaps(items []models.ScheduleItem) error {
+	order := make([]int, len(items))
+	for i := range order {
+		order[i] = i
+	}
+	sort.Slice(order, func(a, b int) bool {
+		x, y := items[order[a]], items[order[b]]
+		if x.UserID != y.UserID {
+			return x.UserID < y.UserID
+		}
+		if x.DayOfWeek != y.DayOfWeek {
+			return x.DayOfWeek < y.DayOfWeek
+		}
+		return x.StartMinutes < y.StartMinutes
+	})
+
+	for k := 1; k < len(order); k++ {
+		prev, cur := items[order[k-1]], items[order[k]]
+		if prev.UserID == cur.UserID && prev.DayOfWeek == cur.DayOfWeek && cur.StartMinutes < prev.EndMinutes {
+			return fmt.Errorf("items[%d] and items[%d]: %w", order[k-1], order[k], errScheduleOverlap)
+		}
+	}
+	return nil
+}
+
+// applyBatchFields переносит разрешенные поля обновления в занятие
+func applyBatchFields(item *models.ScheduleItem, fields map[string]interface{}) error {
+	for key, value := range fields {
+		if !batchUpdatableFields[key] {
+			continue
+		}
+		text, ok := value.(string)
+		if !ok {
+			return fmt.Errorf("field %s must be a string", key)
+		}
+		switch key {
+		case "day_of_week":
+			item.DayOfWeek = text
+		case "time_start":
+			item.TimeStart = text
+		case "time_end":
+			item.TimeEnd = text
+		case "subject":
+			item.Subject = text
+		case "description":
+			item.Description = text
+		}
+	}
+	return nil
+}
+
+// batchErrorStatus подбирает HTTP-код для ошибки транзакции
+func batchErrorStatus(err error) int {
+	switch {
+	case errors.Is(err, errBatchItemNotFound):
+		return 404
+	case errors.Is(err, errScheduleOverlap):
+		return 409
+	default:
+		return 400
+	}
+}
+
+// CreateScheduleItemsBatch создает все занятия в одной транзакции
+func CreateScheduleItemsBatch(db *gorm.DB) gin.HandlerFunc {
+	return func(c *gin.Context) {
+		var req batchCreateRequest
+		if err := c.ShouldBindJSON(&req); err != nil {
+			c.JSON(400, gin.H{"error": err.Error()})
+			return
+		}
+		if len(req.Items) == 0 {
+			c.JSON(201, gin.H{"items": req.Items, "message": "Nothing to create"})
+			return
+		}
+
+		for i := range req.Items {
+			if err := req.Items[i].Normalize(); err != nil {
+				c.JSON(400, gin.H{"error": fmt.Sprintf("items[%d]: %v", i, err)})
+				return
+			}
+		}
+		checkOverlaps := !allowOverlap(c)
+		if checkOverlaps {
+			if err := batchOverlaps(req.Items); err != nil {
+				c.JSON(409, gin.H{"error": err.Error()})
+				return
+			}
+		}
+
+		err := db.Transaction(func(tx *gorm.DB) error {
+			if checkOverlaps {
+				for i := range req.Items {
+					conflicts, err := findOverlaps(tx, &req.Items[i])
+					if err != nil {
+						return err
+					}
+					if len(conflicts) > 0 {
+						return fmt.Errorf("items[%d]: %w", i, errScheduleOverlap)
+					}
+				}
+			}
+			return tx.CreateInBatches(&req.Items, batchInsertSize).Error
+		})
+		if err != nil {
+			status := 500
+			if errors.Is(err, errScheduleOverlap) {
+				status = 409
+			}
+			c.JSON(status, gin.H{"error": err.Error()})
+			return
+		}
+
+		c.JSON(201, gin.H{"items": req.Items, "message": "Schedule items created"})
+	}
+}
+
+// UpdateScheduleItemsBatch применяет частичные обновления в одной транзакции
+func UpdateScheduleItemsBatch(db *gorm.DB) gin.HandlerFunc {
+	return func(c *gin.Context) {
+		var req batchUpdateRequest
+		if err := c.ShouldBindJSON(&req); err != nil {
+			c.JSON(400, gin.H{"error": err.Error()})
+			return
+		}
+
+		checkOverlaps := !allowOverlap(c)
+		updated := make([]models.ScheduleItem, 0, len(req.Items))
+		err := db.Transaction(func(tx *gorm.DB) error {
+			// Сначала применяем все изменения, потом проверяем итоговый набор:
+			// иначе обмен временем двух занятий давал бы ложный 409
+			positions := make(map[uint]int, len(req.Items))
+			ids := make([]uint, 0, len(req.Items))
+			for i, fields := range req.Items {
+				rawID, ok := fields["id"].(float64)
+				if !ok {
+					return fmt.Errorf("items[%d]: missing id", i)
+				}
+
+				// Повторное обновление того же занятия применяется поверх предыдущего
+				pos, seen := positions[uint(rawID)]
+				if !seen {
+					var item models.ScheduleItem
+					if err := tx.First(&item, uint(rawID)).Error; err != nil {
+						if errors.Is(err, gorm.ErrRecordNotFound) {
+							return fmt.Errorf("items[%d] (id %d): %w", i, uint(rawID), errBatchItemNotFound)
+						}
+						return err
+					}
+					pos = len(updated)
+					positions[item.ID] = pos
+					ids = append(ids, item.ID)
+					updated = append(updated, item)
+				}
+				if err := applyBatchFields(&updated[pos], fields); err != nil {
+					return fmt.Errorf("items[%d]: %w", i, err)
+				}
+				if err := updated[pos].Normalize(); err != nil {
+					return fmt.Errorf("items[%d]: %w", i, err)
+				}
+			}
+
+			if checkOverlaps {
+				if err := batchOverlaps(updated); err != nil {
+					return err
+				}
+				// Старое время занятий пачки уже неактуально - сравниваем только с остальными
+				for i := range updated {
+					conflicts, err := findOverlaps(tx, &updated[i], ids...)
+					if err != nil {
+						return err
+					}
+					if len(conflicts) > 0 {
+						return fmt.Errorf("items[%d]: %w", i, errScheduleOverlap)
+					}
+				}
+			}
+
+			for i := range updated {
+				if err := tx.Save(&updated[i]).Error; err != nil {
+					return err
+				}
+			}
+			return nil
+		})
+		if err != nil {
+			c.JSON(batchErrorStatus(err), gin.H{"error": err.Error()})
+			return
+		}
+
+		c.JSON(200, gin.H{"items": updated, "message": "Schedule items updated"})
+	}
+}
+
+// DeleteScheduleItemsBatch удаляет занятия по списку ID одним запросом
+func DeleteScheduleItemsBatch(db *gorm.DB) gin.HandlerFunc {
+	return func(c *gin.Context) {
+		var req batchDeleteRequest
+		if err := c.ShouldBindJSON(&req); err != nil {
+			c.JSON(400, gin.H{"error": err.Error()})
+			return
+		}
+
+		var deleted int64
+		if len(req.IDs) > 0 {
+			err := db.Transaction(func(tx *gorm.DB) error {
+				var err error
+				deleted, err = models.DeleteScheduleItems(tx, req.IDs)
+				return err
+			})
+			if err != nil {
+				c.JSON(500, gin.H{"error": err.Error()})
+				return
+			}
+		}
+
+		c.JSON(200, gin.H{"deleted": deleted, "message": "Schedule items deleted"})
+	}
+}
@@ -0,0 +1,96 @@
+package handlers
+
+import (
+	"sort"
+	"strconv"
+
+	"schedule-backend/internal/models"
+
+	"github.com/gin-gonic/gin"
+	"gorm.io/gorm"
+)
+
+const (
+	defaultChangesLimit = 500
+	maxChangesLimit     = 5000
+)
+
+// GetScheduleChanges отдает изменения расписания после курсора since:
+// созданные/измененные занятия и следы удалений в порядке номеров изменений.
+// Клиент передает полученный cursor в следующий запрос, пока has_more.
+func GetScheduleChanges(db *gorm.DB) gin.HandlerFunc {
+	return func(c *gin.Context) {
+		since, err := strconv.ParseInt(c.DefaultQuery("since", "0"), 10, 64)
+		if err != nil || since < 0 {
+			c.JSON(400, gin.H{"error": "Invalid since"})
+			return
+		}
+		limit, err := strconv.Atoi(c.DefaultQuery("limit", strconv.Itoa(defaultChangesLimit)))
+		if err != nil || limit <= 0 {
+			c.JSON(400, gin.H{"error": "Invalid limit"})
+			return
+		}
+		if limit > maxChangesLimit {
+			limit = maxChangesLimit
+		}
+
+		counter, err := models.CurrentChangeCounter(db)
+		if err != nil {
+			c.JSON(500, gin.H{"error": err.Error()})
+			return
+		}
+		// Часть удалений после since уже вычищена - клиенту нужна полная перезагрузка.
+		// since=0 - новый клиент: пропустить удаления ему нечего, лента отдает все живые занятия
+		if since > 0 && since < counter.PrunedVersion {
+			c.JSON(410, gin.H{"error": "Cursor expired, reload the schedule", "head": counter.Value})
+			return
+		}
+
+		// Берем по limit+1 из каждой таблицы: слияние двух отсортированных списков
+		// по версии дает первые limit изменений и признак has_more
+		var items []models.ScheduleItem
+		if err := db.Where("version > ?", since).Order("version").Limit(limit + 1).Find(&items).Error; err != nil {
+			c.JSON(500, gin.H{"error": err.Error()})
+			return
+		}
+		var deleted []models.ScheduleTombstone
+		if err := db.Where("version > ?", since).Order("version").Limit(limit + 1).Find(&deleted).Error; err != nil {
+			c.JSON(500, gin.H{"error": err.Error()})
+			return
+		}
+
+		versions := make([]int64, 0, len(items)+len(deleted))
+		for _, item := range items {
+			versions = append(versions, item.Version)
+		}
+		for _, tombstone := range deleted {
+			versions = append(versions, tombstone.Version)
+		}
+		sort.Slice(versions, func(a, b int) bool { return versions[a] < versions[b] })
+
+		hasMore := len(versions) > limit
+		cursor := since
+		if hasMore {
+			cursor = versions[limit-1]
+		} else if len(versions) > 0 {
+			cursor = versions[len(versions)-1]
+		}
+
+		items = trimChanges(items, cursor, func(i int) int64 { return items[i].Version })
+		deleted = trimChanges(deleted, cursor, func(i int) int64 { return deleted[i].Version })
+
+		c.JSON(200, gin.H{
+			"items":    items,
+			"deleted":  deleted,
+			"cursor":   cursor,
+			"has_more": hasMore,
+			"head":     counter.Value,
+		})
+	}
+}
+
+// trimChanges отбрасывает хвост отсортированного по версии списка после cursor
+func trimChanges[T any](list []T, cursor int64, version func(int) int64) []T {
+	n := sort.Search(len(list), func(i int) bool { return version(i) > cursor })
+	return list[:n]
+}
@@ -1,7 +1,11 @@
 package handlers
 
 import (
+	"errors"
+	"fmt"
+	"slices"
 	"strconv"
+	"strings"
 
 	"schedule-backend/internal/models"
 
@@ -17,6 +21,10 @@ func CreateScheduleItem(db *gorm.DB) gin.HandlerFunc {
 			return
 		}
 
+		if !validateScheduleItem(c, db, &item) {
+			return
+		}
+
 		if err := db.Create(&item).Error; err != nil {
 			c.JSON(500, gin.H{"error": err.Error()})
 			return
@@ -26,13 +34,19 @@ func CreateScheduleItem(db *gorm.DB) gin.HandlerFunc {
 	}
 }
 
+// GetSchedule отдает занятия с фильтрами user_id и day.
+// limit включает постраничную выдачу по id (after_id - id последнего занятия
+// предыдущей страницы, в ответе next_after_id и has_more); с order=user
+// страницы идут по (user_id, id), курсор - пара after_user_id/after_id,
+// в ответе дополнительно next_after_user_id. fields=a,b,c оставляет в ответе
+// только перечисленные поля (id есть всегда).
 func GetSchedule(db *gorm.DB) gin.HandlerFunc {
 	return func(c *gin.Context) {
 		userID := c.Query("user_id")
 		dayOfWeek := c.Query("day")
 
-		var items []models.ScheduleItem
-		query := db.Preload("User")
+		// User не сериализуется (json:"-"), поэтому Preload не нужен
+		query := db.Model(&models.ScheduleItem{})
 
 		if userID != "" {
 			uid, _ := strconv.Atoi(userID)
@@ -42,12 +56,100 @@ func GetSchedule(db *gorm.DB) gin.HandlerFunc {
 			query = query.Where("day_of_week = ?", dayOfWeek)
 		}
 
-		if err := query.Order("time_start").Find(&items).Error; err != nil {
-			c.JSON(500, gin.H{"error": err.Error()})
+		columns, err := scheduleProjection(c.Query("fields"))
+		if err != nil {
+			c.JSON(400, gin.H{"error": err.Error()})
+			return
+		}
+		byUser := c.Query("order") == "user"
+		if byUser && columns != nil && !slices.Contains(columns, "user_id") {
+			// user_id нужен для курсора следующей страницы
+			columns = append(columns, "user_id")
+		}
+
+		limit := 0
+		if raw := c.Query("limit"); raw != "" {
+			limit, err = strconv.Atoi(raw)
+			if err != nil || limit <= 0 {
+				c.JSON(400, gin.H{"error": "Invalid limit"})
+				return
+			}
+			if limit > maxSchedulePageSize {
+				limit = maxSchedulePageSize
+			}
+			afterID, err := strconv.ParseUint(c.DefaultQuery("after_id", "0"), 10, 64)
+			if err != nil {
+				c.JSON(400, gin.H{"error": "Invalid after_id"})
+				return
+			}
+			if byUser {
+				afterUserID, err := strconv.ParseUint(c.DefaultQuery("after_user_id", "0"), 10, 64)
+				if err != nil {
+					c.JSON(400, gin.H{"error": "Invalid after_user_id"})
+					return
+				}
+				// Keyset по (user_id, id) идет по idx_schedule_user: занятия одного
+				// пользователя подряд, полный обход без запроса на каждого
+				query = query.Where("user_id > ? OR (user_id = ? AND id > ?)", afterUserID, afterUserID, afterID).
+					Order("user_id").Order("id").Limit(limit + 1)
+			} else {
+				// Keyset по первичному ключу: страница не дороже первой при любом смещении
+				query = query.Where("id > ?", afterID).Order("id").Limit(limit + 1)
+			}
+		} else {
+			query = query.Order("start_minutes")
+		}
+
+		if columns == nil {
+			var items []models.ScheduleItem
+			if err := query.Find(&items).Error; err != nil {
+				c.JSON(500, gin.H{"error": err.Error()})
+				return
+			}
+			if limit == 0 {
+				c.JSON(200, gin.H{"items": items})
+				return
+			}
+			hasMore := len(items) > limit
+			if hasMore {
+				items = items[:limit]
+			}
+			var next, nextUser uint
+			if len(items) > 0 {
+				next = items[len(items)-1].ID
+				nextUser = items[len(items)-1].UserID
+			}
+			page := gin.H{"items": items, "has_more": hasMore, "next_after_id": next}
+			if byUser {
+				page["next_after_user_id"] = nextUser
+			}
+			c.JSON(200, page)
 			return
 		}
 
-		c.JSON(200, gin.H{"items": items})
+		var rows []map[string]interface{}
+		if err := query.Select(columns).Find(&rows).Error; err != nil {
+			c.JSON(500, gin.H{"error": err.Error()})
+			return
+		}
+		if limit == 0 {
+			c.JSON(200, gin.H{"items": rows})
+			return
+		}
+		hasMore := len(rows) > limit
+		if hasMore {
+			rows = rows[:limit]
+		}
+		var next, nextUser interface{} = 0, 0
+		if len(rows) > 0 {
+			next = rows[len(rows)-1]["id"]
+			nextUser = rows[len(rows)-1]["user_id"]
+		}
+		page := gin.H{"items": rows, "has_more": hasMore, "next_after_id": next}
+		if byUser {
+			page["next_after_user_id"] = nextUser
+		}
+		c.JSON(200, page)
 	}
 }
 
@@ -69,6 +171,11 @@ func UpdateScheduleItem(db *gorm.DB) gin.HandlerFunc {
 			c.JSON(400, gin.H{"error": err.Error()})
 			return
 		}
+		item.ID = uint(id)
+
+		if !validateScheduleItem(c, db, &item) {
+			return
+		}
 
 		if err := db.Save(&item).Error; err != nil {
 			c.JSON(500, gin.H{"error": err.Error()})
@@ -87,7 +194,11 @@ func DeleteScheduleItem(db *gorm.DB) gin.HandlerFunc {
 			return
 		}
 
-		if err := db.Delete(&models.ScheduleItem{}, id).Error; err != nil {
+		err = db.Transaction(func(tx *gorm.DB) error {
+			_, err := models.DeleteScheduleItems(tx, []uint{uint(id)})
+			return err
+		})
+		if err != nil {
 			c.JSON(500, gin.H{"error": err.Error()})
 			return
 		}
@@ -95,3 +206,87 @@ func DeleteScheduleItem(db *gorm.DB) gin.HandlerFunc {
 		c.JSON(200, gin.H{"message": "Schedule item deleted"})
 	}
 }
+
+var errScheduleOverlap = errors.New("schedule item overlaps existing items")
+
+// Наибольший размер страницы GET /api/schedule?limit=
+const maxSchedulePageSize = 5000
+
+// Поля занятия, которые можно запросить через fields= (имя в JSON совпадает с колонкой)
+var scheduleFields = map[string]bool{
+	"id":          true,
+	"user_id":     true,
+	"day_of_week": true,
+	"time_start":  true,
+	"time_end":    true,
+	"subject":     true,
+	"description": true,
+	"created_at":  true,
+	"updated_at":  true,
+	"version":     true,
+}
+
+// scheduleProjection разбирает fields=a,b,c в список колонок; nil - все поля
+func scheduleProjection(raw string) ([]string, error) {
+	if raw == "" {
+		return nil, nil
+	}
+	columns := []string{"id"}
+	seen := map[string]bool{"id": true}
+	for _, field := range strings.Split(raw, ",") {
+		field = strings.TrimSpace(field)
+		if field == "" || seen[field] {
+			continue
+		}
+		if !scheduleFields[field] {
+			return nil, fmt.Errorf("unknown field: %s", field)
+		}
+		seen[field] = true
+		columns = append(columns, field)
+	}
+	return columns, nil
+}
+
+// allowOverlap - флаг ?allow_overlap=1, которым клиент подтверждает пересечение
+func allowOverlap(c *gin.Context) bool {
+	value := c.Query("allow_overlap")
+	return value == "1" || value == "true"
+}
+
+// findOverlaps возвращает занятия пользователя в тот же день, пересекающиеся с item;
+// exclude - занятия, которые не учитываются (обновляемые той же пачкой)
+func findOverlaps(db *gorm.DB, item *models.ScheduleItem, exclude ...uint) ([]models.ScheduleItem, error) {
+	var conflicts []models.ScheduleItem
+	query := db.Where(
+		"user_id = ? AND day_of_week = ? AND start_minutes < ? AND end_minutes > ? AND id <> ?",
+		item.UserID, item.DayOfWeek, item.EndMinutes, item.StartMinutes, item.ID,
+	)
+	if len(exclude) > 0 {
+		query = query.Where("id NOT IN ?", exclude)
+	}
+	err := query.Order("start_minutes").Find(&conflicts).Error
+	return conflicts, err
+}
+
+// validateScheduleItem нормализует время и проверяет пересечения.
+// Возвращает false, если ответ с ошибкой уже отправлен.
+func validateScheduleItem(c *gin.Context, db *gorm.DB, item *models.ScheduleItem) bool {
+	if err := item.Normalize(); err != nil {
+		c.JSON(400, gin.H{"error": err.Error()})
+		return false
+	}
+	if allowOverlap(c) {
+		return true
+	}
+
+	conflicts, err := findOverlaps(db, item)
+	if err != nil {
+		c.JSON(500, gin.H{"error": err.Error()})
+		return false
+	}
+	if len(conflicts) > 0 {
+		c.JSON(409, gin.H{"error": errScheduleOverlap.Error(), "conflicts": conflicts})
+		return false
+	}
+	return true
+}
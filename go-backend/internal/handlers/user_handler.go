@@ -54,3 +54,16 @@ func GetUser(db *gorm.DB) gin.HandlerFunc {
 		c.JSON(200, gin.H{"user": user})
 	}
 }
+
+// ListUsers отдает всех пользователей (бот строит по ним напоминания)
+func ListUsers(db *gorm.DB) gin.HandlerFunc {
+	return func(c *gin.Context) {
+		var users []models.User
+		if err := db.Order("id").Find(&users).Error; err != nil {
+			c.JSON(500, gin.H{"error": err.Error()})
+			return
+		}
+
+		c.JSON(200, gin.H{"users": users})
+	}
+}
@@ -0,0 +1,95 @@
+package models
+
+import (
+	"time"
+
+	"gorm.io/gorm"
+)
+
+const changeCounterID = 1
+
+// NextVersion выдает следующий номер изменения. UPDATE берет блокировку на запись
+// до чтения, поэтому параллельные транзакции не получат одинаковый номер.
+func NextVersion(tx *gorm.DB) (int64, error) {
+	db := tx.Session(&gorm.Session{NewDB: true})
+	if err := db.Exec("UPDATE change_counters SET value = value + 1 WHERE id = ?", changeCounterID).Error; err != nil {
+		return 0, err
+	}
+
+	var counter ChangeCounter
+	if err := db.First(&counter, changeCounterID).Error; err != nil {
+		return 0, err
+	}
+	return counter.Value, nil
+}
+
+// CurrentChangeCounter возвращает счетчик изменений (последний номер и границу очистки)
+func CurrentChangeCounter(db *gorm.DB) (ChangeCounter, error) {
+	var counter ChangeCounter
+	err := db.First(&counter, changeCounterID).Error
+	return counter, err
+}
+
+// InitChangeCounter создает строку счетчика, если ее еще нет
+func InitChangeCounter(db *gorm.DB) error {
+	return db.FirstOrCreate(&ChangeCounter{ID: changeCounterID}).Error
+}
+
+// DeleteScheduleItems удаляет занятия и оставляет для каждого след в ленте изменений
+func DeleteScheduleItems(tx *gorm.DB, ids []uint) (int64, error) {
+	var items []ScheduleItem
+	if err := tx.Select("id", "user_id").Where("id IN ?", ids).Find(&items).Error; err != nil {
+		return 0, err
+	}
+	if len(items) == 0 {
+		return 0, nil
+	}
+
+	existing := make([]uint, len(items))
+	tombstones := make([]ScheduleTombstone, len(items))
+	now := time.Now()
+	for i, item := range items {
+		version, err := NextVersion(tx)
+		if err != nil {
+			return 0, err
+		}
+		existing[i] = item.ID
+		tombstones[i] = ScheduleTombstone{ScheduleID: item.ID, UserID: item.UserID, Version: version, DeletedAt: now}
+	}
+
+	result := tx.Delete(&ScheduleItem{}, existing)
+	if result.Error != nil {
+		return 0, result.Error
+	}
+	if err := tx.Create(&tombstones).Error; err != nil {
+		return 0, err
+	}
+	return result.RowsAffected, nil
+}
+
+// PruneTombstones удаляет следы старше retention и запоминает, до какого номера
+// лента больше не может отдать удаления
+func PruneTombstones(db *gorm.DB, retention time.Duration) (int64, error) {
+	var pruned int64
+	err := db.Transaction(func(tx *gorm.DB) error {
+		cutoff := time.Now().Add(-retention)
+
+		var maxVersion int64
+		if err := tx.Model(&ScheduleTombstone{}).Where("deleted_at < ?", cutoff).
+			Select("COALESCE(MAX(version), 0)").Scan(&maxVersion).Error; err != nil {
+			return err
+		}
+		if maxVersion == 0 {
+			return nil
+		}
+
+		result := tx.Where("version <= ?", maxVersion).Delete(&ScheduleTombstone{})
+		if result.Error != nil {
+			return result.Error
+		}
+		pruned = result.RowsAffected
+		return tx.Model(&ChangeCounter{}).Where("id = ? AND pruned_version < ?", changeCounterID, maxVersion).
+			Update("pruned_version", maxVersion).Error
+	})
+	return pruned, err
+}
@@ -14,13 +14,44 @@ type User struct {
 
 type ScheduleItem struct {
 	ID          uint      `gorm:"primaryKey" json:"id"`
-	UserID      uint      `gorm:"not null" json:"user_id"`
-	DayOfWeek   string    `gorm:"not null" json:"day_of_week"`
+	UserID      uint      `gorm:"not null;index:idx_schedule_user_day_minutes,priority:1;index:idx_schedule_user" json:"user_id"`
+	DayOfWeek   string    `gorm:"not null;index:idx_schedule_user_day_minutes,priority:2" json:"day_of_week"`
 	TimeStart   string    `gorm:"not null" json:"time_start"`
 	TimeEnd     string    `gorm:"not null" json:"time_end"`
 	Subject     string    `gorm:"not null" json:"subject"`
 	Description string    `json:"description"`
 	CreatedAt   time.Time `json:"created_at"`
+	UpdatedAt   time.Time `json:"updated_at"`
+
+	// Номер последнего изменения (общий счетчик ChangeCounter) - курсор ленты изменений
+	Version int64 `gorm:"not null;default:0;index" json:"version"`
+
+	// Время в минутах от полуночи: сортировка и проверка пересечений по целым числам.
+	// Заполняется в Normalize/BeforeSave. Третья колонка индекса (user_id, day_of_week, start_minutes)
+	// под выборку дня и поиск пересечений.
+	StartMinutes int `gorm:"not null;default:0;index:idx_schedule_user_day_minutes,priority:3" json:"-"`
+	EndMinutes   int `gorm:"not null;default:0" json:"-"`
+
+	// Интервал, сохраненный до проверки end > start (см. KeepTimeRange, AfterFind)
+	keepRange          bool
+	keptStart, keptEnd int
 
 	User User `gorm:"foreignKey:UserID" json:"-"`
 }
+
+// ScheduleTombstone - след удаленного занятия для ленты изменений
+type ScheduleTombstone struct {
+	ID         uint      `gorm:"primaryKey" json:"-"`
+	ScheduleID uint      `gorm:"not null;index" json:"id"`
+	UserID     uint      `gorm:"not null" json:"user_id"`
+	Version    int64     `gorm:"not null;index" json:"version"`
+	DeletedAt  time.Time `gorm:"not null;index" json:"deleted_at"`
+}
+
+// ChangeCounter - единственная строка с последним выданным номером изменения.
+// PrunedVersion - до какого номера следы удалений уже вычищены.
+type ChangeCounter struct {
+	ID            uint  `gorm:"primaryKey"`
+	Value         int64 `gorm:"not null;default:0"`
+	PrunedVersion int64 `gorm:"not null;default:0"`
+}
@@ -0,0 +1,92 @@
+package models
+
+import (
+	"errors"
+	"fmt"
+	"strconv"
+	"strings"
+
+	"gorm.io/gorm"
+)
+
+var ErrInvalidTimeRange = errors.New("time_end must be after time_start")
+
+// ParseClock переводит "H:MM" или "HH:MM" в минуты от полуночи
+func ParseClock(value string) (int, error) {
+	parts := strings.Split(value, ":")
+	if len(parts) != 2 || len(parts[0]) < 1 || len(parts[0]) > 2 || len(parts[1]) != 2 {
+		return 0, fmt.Errorf("invalid time %q (expected HH:MM)", value)
+	}
+
+	hours, errHours := strconv.Atoi(parts[0])
+	minutes, errMinutes := strconv.Atoi(parts[1])
+	if errHours != nil || errMinutes != nil || hours < 0 || hours > 23 || minutes < 0 || minutes > 59 {
+		return 0, fmt.Errorf("invalid time %q (expected HH:MM)", value)
+	}
+	return hours*60 + minutes, nil
+}
+
+// FormatClock переводит минуты от полуночи в "HH:MM"
+func FormatClock(minutes int) string {
+	return fmt.Sprintf("%02d:%02d", minutes/60, minutes%60)
+}
+
+// Normalize проверяет время занятия, приводит его к HH:MM и заполняет минуты.
+// Сохраненный до проверки диапазона интервал с концом не позже начала
+// (см. KeepTimeRange) пропускается, пока время не меняют.
+func (s *ScheduleItem) Normalize() error {
+	start, err := ParseClock(s.TimeStart)
+	if err != nil {
+		return err
+	}
+	end, err := ParseClock(s.TimeEnd)
+	if err != nil {
+		return err
+	}
+	if end <= start && !(s.keepRange && start == s.keptStart && end == s.keptEnd) {
+		return ErrInvalidTimeRange
+	}
+
+	s.StartMinutes, s.EndMinutes = start, end
+	s.TimeStart, s.TimeEnd = FormatClock(start), FormatClock(end)
+	return nil
+}
+
+// KeepTimeRange разрешает сохранить текущее время занятия, даже если конец
+// не позже начала: так backfill заполняет минуты старых записей
+func (s *ScheduleItem) KeepTimeRange() error {
+	start, err := ParseClock(s.TimeStart)
+	if err != nil {
+		return err
+	}
+	end, err := ParseClock(s.TimeEnd)
+	if err != nil {
+		return err
+	}
+	s.keepRange, s.keptStart, s.keptEnd = true, start, end
+	return nil
+}
+
+// AfterFind запоминает сохраненный интервал с концом не позже начала, чтобы
+// правка других полей такой записи (PUT с прежним временем) не давала 400
+func (s *ScheduleItem) AfterFind(tx *gorm.DB) error {
+	if s.EndMinutes <= s.StartMinutes {
+		s.keepRange, s.keptStart, s.keptEnd = true, s.StartMinutes, s.EndMinutes
+	}
+	return nil
+}
+
+// BeforeSave гарантирует согласованность строкового и минутного времени
+// и присваивает записи новый номер изменения
+func (s *ScheduleItem) BeforeSave(tx *gorm.DB) error {
+	if err := s.Normalize(); err != nil {
+		return err
+	}
+
+	version, err := NextVersion(tx)
+	if err != nil {
+		return err
+	}
+	s.Version = version
+	return nil
+}
@@ -1,15 +1,252 @@
-import requests
+import asyncio
+import json
 import logging
+import time
+from collections import OrderedDict
+
+import aiohttp
+import requests
+
+from models import ScheduleItem, User, parse_items
 
 logger = logging.getLogger(__name__)
 
+# Размер пачки для batch-методов: одна пачка - один запрос и одна транзакция на backend
+BATCH_CHUNK_SIZE = 500
+# Сколько изменений запрашивать из ленты /api/schedule/changes за раз
+CHANGES_PAGE_SIZE = 500
+# Размер страницы iter_schedule_items и поля, нужные ScheduleItem (без created_at/updated_at/version)
+SCHEDULE_PAGE_SIZE = 1000
+SCHEDULE_ITEM_FIELDS = ("user_id", "day_of_week", "time_start", "time_end", "subject", "description")
+
+
+def _chunks(seq, size: int):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _overlap_params(allow_overlap: bool) -> dict:
+    return {"allow_overlap": "1"} if allow_overlap else {}
+
+
+def _page_params(user_id, day_of_week, fields, limit: int, after: tuple, by_user: bool) -> dict:
+    """after - курсор (after_user_id, after_id); after_user_id учитывается только при by_user"""
+    params = {"limit": limit, "after_id": after[1], "fields": ",".join(fields)}
+    if by_user:
+        params.update(order="user", after_user_id=after[0])
+    if user_id is not None:
+        params["user_id"] = user_id
+    if day_of_week:
+        params["day"] = day_of_week
+    return params
+
+
+def _parse_changes(data: dict) -> dict:
+    return {
+        "items": parse_items(data.get("items") or []),
+        "deleted": [tombstone["id"] for tombstone in data.get("deleted") or []],
+        "cursor": data.get("cursor", 0),
+        "has_more": data.get("has_more", False),
+        "head": data.get("head", 0),
+    }
+
+
+def _notify(listeners: list, event: str, *args):
+    """Сообщает подписчикам об изменениях, прошедших через клиент
+
+    Подписчик реализует нужные методы из add_user(user), add_item(item),
+    patch_item(schedule_id, update_data), remove_item(schedule_id).
+    """
+    for listener in listeners:
+        handler = getattr(listener, event, None)
+        if handler is None:
+            continue
+        try:
+            handler(*args)
+        except Exception as e:
+            logger.error("Listener %s.%s failed: %s", type(listener).__name__, event, e)
+
+
+class TTLCache:
+    """Ограниченный по размеру и времени жизни LRU-кэш со счетчиками"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, clock=time.monotonic, on_evict=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        # Вызывается как on_evict(key, value) при вытеснении или истечении TTL
+        self.on_evict = on_evict
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Возвращает значение или default, если записи нет или она устарела"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at <= self.clock():
+            del self._data[key]
+            self.misses += 1
+            if self.on_evict is not None:
+                self.on_evict(key, value)
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Сохраняет значение, вытесняя самую старую запись при переполнении"""
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (value, self.clock() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            evicted_key, (evicted_value, _) = self._data.popitem(last=False)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(evicted_key, evicted_value)
+
+    def peek(self, key, default=None):
+        """Возвращает актуальное значение без учета в счетчиках и LRU-порядке"""
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= self.clock():
+            return default
+        return entry[0]
+
+    def invalidate(self, key):
+        """Удаляет запись из кэша"""
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Счетчики попаданий/промахов/вытеснений"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / total if total else 0.0
+        }
+
+
+class ScheduleCache:
+    """Кэш расписаний по user_id с обновлением на месте при записи
+
+    Хранится вся неделя пользователя, расписание на день фильтруется из нее,
+    поэтому переключение между днями и меню не обращается к backend.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, clock=time.monotonic):
+        self._cache = TTLCache(maxsize, ttl, clock, on_evict=self._forget_owner)
+        # schedule_id -> user_id для записей, лежащих в кэше
+        self._owners = {}
+
+    def _forget_owner(self, user_id, items):
+        for item in items:
+            self._owners.pop(item.id, None)
+
+    @staticmethod
+    def _sort(items):
+        items.sort(key=lambda x: (x.day, x.start, x.end))
+
+    def get(self, user_id: int, day_of_week: str = None):
+        """Возвращает копию списка занятий или None при промахе"""
+        items = self._cache.get(user_id)
+        if items is None:
+            return None
+        if day_of_week:
+            return [item for item in items if item.day_of_week == day_of_week]
+        return list(items)
+
+    def store(self, user_id: int, items: list):
+        """Сохраняет всю неделю пользователя"""
+        self.invalidate_user(user_id)
+        items = list(items)
+        self._sort(items)
+        for item in items:
+            self._owners[item.id] = user_id
+        self._cache.set(user_id, items)
+
+    def add_item(self, item: ScheduleItem):
+        """Добавляет созданное занятие в закэшированную неделю (или заменяет с тем же id)"""
+        if item.id in self._owners:
+            self.remove_item(item.id)
+        user_id = item.user_id
+        items = self._cache.peek(user_id)
+        if items is None:
+            return
+        items.append(item)
+        self._sort(items)
+        self._owners[item.id] = user_id
+
+    def patch_item(self, schedule_id: int, update_data: dict):
+        """Применяет изменения к закэшированному занятию"""
+        items = self._cache.peek(self._owners.get(schedule_id))
+        if items is None:
+            self._owners.pop(schedule_id, None)
+            return
+        for item in items:
+            if item.id == schedule_id:
+                item.apply(update_data)
+                break
+        self._sort(items)
+
+    def remove_item(self, schedule_id: int):
+        """Убирает удаленное занятие из закэшированной недели"""
+        user_id = self._owners.pop(schedule_id, None)
+        items = self._cache.peek(user_id)
+        if items is None:
+            return
+        items[:] = [item for item in items if item.id != schedule_id]
+
+    def invalidate_user(self, user_id: int):
+        items = self._cache.peek(user_id)
+        if items is not None:
+            self._forget_owner(user_id, items)
+        self._cache.invalidate(user_id)
+
+    def clear(self):
+        self._cache.clear()
+        self._owners.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
 class ScheduleAPIClient:
     """Клиент для работы с Go backend API"""
     
-    def __init__(self, base_url: str = "http://localhost:8080"):
+    def __init__(self, base_url: str = "http://localhost:8080", user_cache: TTLCache = None,
+                 schedule_cache: ScheduleCache = None):
         self.base_url = base_url
         self.session = requests.Session()
-        logger.info(f"API Client initialized with base URL: {base_url}")
+        # telegram_id -> запись пользователя; после /start практически не меняется
+        self.user_cache = user_cache if user_cache is not None else TTLCache()
+        # user_id -> неделя занятий; меняется только через методы записи этого клиента
+        self.schedule_cache = schedule_cache if schedule_cache is not None else ScheduleCache()
+        # Подписчики на изменения (например, планировщик напоминаний)
+        self.listeners = []
+        logger.info("API Client initialized with base URL: %s", base_url)
+
+    def add_listener(self, listener):
+        """Подписывает listener на изменения пользователей и занятий (см. _notify)"""
+        self.listeners.append(listener)
+
+    def _notify(self, event: str, *args):
+        _notify(self.listeners, event, *args)
     
     def get_or_create_user(self, telegram_id: int, username: str = None, first_name: str = None):
         """Получает или создает пользователя"""
@@ -22,8 +259,11 @@ class ScheduleAPIClient:
             
             if response.status_code == 200:
                 data = response.json()
-                logger.info(f"User found: {data}")
-                return {"success": True, "data": data.get("user", data)}
+                logger.debug("User found: %s", data)
+                user = User.from_dict(data.get("user", data))
+                self.user_cache.set(telegram_id, user)
+                self._notify("add_user", user)
+                return {"success": True, "data": user}
             
             # Если пользователь не найден (404), создаем нового
             elif response.status_code == 404:
@@ -41,22 +281,30 @@ class ScheduleAPIClient:
                 
                 if response.status_code in [200, 201]:
                     data = response.json()
-                    logger.info(f"User created: {data}")
-                    return {"success": True, "data": data.get("user", data)}
+                    logger.info("User created: %s", data)
+                    user = User.from_dict(data.get("user", data))
+                    self.user_cache.invalidate(telegram_id)
+                    self.user_cache.set(telegram_id, user)
+                    self._notify("add_user", user)
+                    return {"success": True, "data": user}
                 else:
-                    logger.error(f"Failed to create user: {response.status_code} - {response.text}")
+                    logger.error("Failed to create user: %s - %s", response.status_code, response.text)
                     return {"success": False, "error": f"Create failed: {response.status_code}"}
             
             else:
-                logger.error(f"Unexpected status: {response.status_code} - {response.text}")
+                logger.error("Unexpected status: %s - %s", response.status_code, response.text)
                 return {"success": False, "error": f"API error: {response.status_code}"}
                 
         except Exception as e:
-            logger.error(f"Error in get_or_create_user: {e}")
+            logger.error("Error in get_or_create_user: %s", e)
             return {"success": False, "error": str(e)}
     
     def get_user_by_telegram_id(self, telegram_id: int):
-        """Получает пользователя по telegram_id"""
+        """Получает пользователя по telegram_id (с кэшированием)"""
+        cached = self.user_cache.get(telegram_id)
+        if cached is not None:
+            return {"success": True, "data": cached}
+        
         try:
             response = self.session.get(
                 f"{self.base_url}/api/users/{telegram_id}",
@@ -65,19 +313,26 @@ class ScheduleAPIClient:
             
             if response.status_code == 200:
                 data = response.json()
-                return {"success": True, "data": data.get("user", data)}
+                user = User.from_dict(data.get("user", data))
+                self.user_cache.set(telegram_id, user)
+                self._notify("add_user", user)
+                return {"success": True, "data": user}
             elif response.status_code == 404:
                 return {"success": False, "error": "User not found"}
             else:
                 return {"success": False, "error": f"Status: {response.status_code}"}
                 
         except Exception as e:
-            logger.error(f"Error getting user: {e}")
+            logger.error("Error getting user: %s", e)
             return {"success": False, "error": str(e)}
     
     def create_schedule_item(self, user_id: int, day_of_week: str, time_start: str, 
-                            time_end: str, subject: str, description: str = ""):
-        """Создает новое занятие в расписании"""
+                            time_end: str, subject: str, description: str = "",
+                            allow_overlap: bool = False):
+        """Создает новое занятие в расписании
+
+        Backend отклоняет пересечение с другими занятиями (409), если не передан allow_overlap.
+        """
         try:
             schedule_data = {
                 "user_id": user_id,
@@ -91,51 +346,161 @@ class ScheduleAPIClient:
             response = self.session.post(
                 f"{self.base_url}/api/schedule",
                 json=schedule_data,
+                params=_overlap_params(allow_overlap),
                 timeout=5
             )
             
             if response.status_code in [200, 201]:
                 data = response.json()
-                return {"success": True, "data": data.get("item", data)}
+                item = ScheduleItem.from_dict(data.get("item", data))
+                self.schedule_cache.add_item(item)
+                self._notify("add_item", item)
+                return {"success": True, "data": item}
             else:
-                logger.error(f"Failed to create schedule: {response.status_code} - {response.text}")
+                logger.error("Failed to create schedule: %s - %s", response.status_code, response.text)
                 return {"success": False, "error": response.text}
                 
         except Exception as e:
-            logger.error(f"Error creating schedule: {e}")
+            logger.error("Error creating schedule: %s", e)
             return {"success": False, "error": str(e)}
     
     def get_user_schedule(self, user_id: int, day_of_week: str = None):
-        """Получает расписание пользователя"""
+        """Получает расписание пользователя (через кэш недели)"""
+        cached = self.schedule_cache.get(user_id, day_of_week)
+        if cached is not None:
+            return {"success": True, "data": {"items": cached}}
+        
         try:
-            # Сначала получаем все расписания
+            # Фильтрация по пользователю выполняется на backend; загружаем всю неделю,
+            # чтобы следующие запросы по другим дням обслуживались из кэша
             response = self.session.get(
                 f"{self.base_url}/api/schedule",
+                params={"user_id": user_id, "fields": ",".join(SCHEDULE_ITEM_FIELDS)},
                 timeout=5
             )
             
             if response.status_code == 200:
                 data = response.json()
-                all_items = data.get("items", [])
-                
-                # Фильтруем по user_id
-                user_items = [item for item in all_items if item.get("user_id") == user_id]
+                items = parse_items(data.get("items", []))
+                items.sort(key=lambda x: (x.day, x.start, x.end))
+                self.schedule_cache.store(user_id, items)
                 
-                # Если указан день недели, фильтруем дальше
                 if day_of_week:
-                    user_items = [item for item in user_items if item.get("day_of_week") == day_of_week]
+                    items = [item for item in items if item.day_of_week == day_of_week]
                 
-                # Сортируем по времени начала
-                user_items.sort(key=lambda x: x.get("time_start", ""))
+                return {"success": True, "data": {"items": items}}
+            else:
+                return {"success": False, "error": f"Status: {response.status_code}"}
                 
-                return {"success": True, "data": {"items": user_items}}
+        except Exception as e:
+            logger.error("Error getting schedule: %s", e)
+            return {"success": False, "error": str(e)}
+    
+    def get_all_schedule_items(self):
+        """Получает занятия всех пользователей (постранично, без служебных полей)"""
+        try:
+            return {"success": True, "data": {"items": list(self.iter_schedule_items())}}
+        except RuntimeError as e:
+            logger.error("Error getting all schedule items: %s", e)
+            return {"success": False, "error": str(e)}
+    
+    def iter_schedule_items(self, user_id: int = None, day_of_week: str = None,
+                            fields=SCHEDULE_ITEM_FIELDS, page_size: int = SCHEDULE_PAGE_SIZE,
+                            by_user: bool = False):
+        """Лениво перебирает занятия постранично (по возрастанию id)
+
+        В памяти одновременно только одна страница, поэтому полный обход
+        таблицы (экспорт, админские выборки) не зависит от ее размера.
+        by_user=True - порядок (user_id, id): занятия каждого пользователя
+        идут подряд. Ошибка запроса прерывает обход исключением RuntimeError.
+        """
+        after = (0, 0)
+        while True:
+            try:
+                response = self.session.get(
+                    f"{self.base_url}/api/schedule",
+                    params=_page_params(user_id, day_of_week, fields, page_size, after, by_user),
+                    timeout=30
+                )
+            except Exception as e:
+                logger.error("Error paging schedule items: %s", e)
+                raise RuntimeError(str(e)) from e
+            if response.status_code != 200:
+                raise RuntimeError(f"Status: {response.status_code}")
+
+            data = response.json()
+            yield from parse_items(data.get("items") or [])
+            if not data.get("has_more"):
+                return
+            after = (data.get("next_after_user_id", 0), data["next_after_id"])
+    
+    def get_all_users(self):
+        """Получает всех пользователей (telegram_id для рассылок и напоминаний)"""
+        try:
+            response = self.session.get(
+                f"{self.base_url}/api/users",
+                timeout=30
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                return {"success": True, "data": {"users": [User.from_dict(user) for user in data.get("users", [])]}}
             else:
                 return {"success": False, "error": f"Status: {response.status_code}"}
                 
         except Exception as e:
-            logger.error(f"Error getting schedule: {e}")
+            logger.error("Error getting users: %s", e)
             return {"success": False, "error": str(e)}
     
+    def get_schedule_changes(self, since: int = 0, limit: int = CHANGES_PAGE_SIZE):
+        """Получает одну страницу ленты изменений расписания после курсора since"""
+        try:
+            response = self.session.get(
+                f"{self.base_url}/api/schedule/changes",
+                params={"since": since, "limit": limit},
+                timeout=30
+            )
+            
+            if response.status_code == 200:
+                return {"success": True, "data": _parse_changes(response.json())}
+            elif response.status_code == 410:
+                # head - курсор, с которого продолжать после полной перезагрузки
+                return {"success": False, "error": "Cursor expired", "expired": True,
+                        "head": response.json().get("head", 0)}
+            else:
+                return {"success": False, "error": f"Status: {response.status_code}"}
+                
+        except Exception as e:
+            logger.error("Error getting schedule changes: %s", e)
+            return {"success": False, "error": str(e)}
+    
+    def sync_schedule_changes(self, since: int = 0, limit: int = CHANGES_PAGE_SIZE):
+        """Дочитывает ленту изменений с курсора since, обновляет кэш и подписчиков
+
+        Возвращает новый курсор; при ошибке на середине - курсор последней
+        примененной страницы, с него можно продолжить. expired - курсор устарел:
+        расписание нужно перезагрузить целиком и продолжить с курсора head
+        (или с since=0 - новому клиенту лента отвечает всегда).
+        """
+        changed = deleted = 0
+        while True:
+            result = self.get_schedule_changes(since, limit)
+            if not result["success"]:
+                result["data"] = {"cursor": since, "changed": changed, "deleted": deleted}
+                return result
+            page = result["data"]
+            for item in page["items"]:
+                self.schedule_cache.add_item(item)
+                self._notify("add_item", item)
+            for schedule_id in page["deleted"]:
+                self.schedule_cache.remove_item(schedule_id)
+                self._notify("remove_item", schedule_id)
+            changed += len(page["items"])
+            deleted += len(page["deleted"])
+            since = page["cursor"]
+            if not page["has_more"]:
+                return {"success": True, "data": {"cursor": since, "changed": changed, "deleted": deleted}}
+    
     def delete_schedule_item(self, schedule_id: int):
         """Удаляет занятие из расписания"""
         try:
@@ -145,34 +510,132 @@ class ScheduleAPIClient:
             )
             
             if response.status_code in [200, 204]:
+                self.schedule_cache.remove_item(schedule_id)
+                self._notify("remove_item", schedule_id)
                 return {"success": True}
             else:
-                logger.error(f"Failed to delete schedule {schedule_id}: {response.status_code} - {response.text}")
+                logger.error("Failed to delete schedule %s: %s - %s", schedule_id, response.status_code, response.text)
                 return {"success": False, "error": f"Status: {response.status_code}"}
                 
         except Exception as e:
-            logger.error(f"Error deleting schedule: {e}")
+            logger.error("Error deleting schedule: %s", e)
             return {"success": False, "error": str(e)}
     
-    def update_schedule_item(self, schedule_id: int, update_data: dict):
+    def update_schedule_item(self, schedule_id: int, update_data: dict, allow_overlap: bool = False):
         """Обновляет запись расписания"""
         try:
             response = self.session.put(
                 f"{self.base_url}/api/schedule/{schedule_id}",
                 json=update_data,
+                params=_overlap_params(allow_overlap),
                 timeout=5
             )
             
             if response.status_code in [200, 204]:
+                self.schedule_cache.patch_item(schedule_id, update_data)
+                self._notify("patch_item", schedule_id, update_data)
                 return {"success": True}
             else:
-                logger.error(f"Failed to update schedule {schedule_id}: {response.status_code} - {response.text}")
+                logger.error("Failed to update schedule %s: %s - %s", schedule_id, response.status_code, response.text)
                 return {"success": False, "error": f"Status: {response.status_code}"}
                 
         except Exception as e:
-            logger.error(f"Error updating schedule: {e}")
+            logger.error("Error updating schedule: %s", e)
             return {"success": False, "error": str(e)}
     
+    def batch_create_schedule_items(self, items: list, chunk_size: int = BATCH_CHUNK_SIZE,
+                                    allow_overlap: bool = False):
+        """Создает много занятий пачками через POST /api/schedule/batch
+
+        items - словари с полями как у create_schedule_item (включая user_id).
+        При ошибке в data["items"] возвращаются уже созданные занятия.
+        """
+        created = []
+        for chunk in _chunks(list(items), chunk_size):
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/api/schedule/batch",
+                    json={"items": chunk},
+                    params=_overlap_params(allow_overlap),
+                    timeout=30
+                )
+                
+                if response.status_code not in [200, 201]:
+                    logger.error("Failed to batch create: %s - %s", response.status_code, response.text)
+                    return {"success": False, "error": response.text, "data": {"items": created}}
+                
+                for item in parse_items(response.json().get("items", [])):
+                    self.schedule_cache.add_item(item)
+                    self._notify("add_item", item)
+                    created.append(item)
+                    
+            except Exception as e:
+                logger.error("Error in batch create: %s", e)
+                return {"success": False, "error": str(e), "data": {"items": created}}
+        
+        return {"success": True, "data": {"items": created}}
+    
+    def batch_update_schedule_items(self, updates: list, chunk_size: int = BATCH_CHUNK_SIZE,
+                                    allow_overlap: bool = False):
+        """Обновляет много занятий пачками через PUT /api/schedule/batch
+
+        updates - словари {"id": ..., <поле>: <значение>, ...}.
+        """
+        updated = []
+        for chunk in _chunks(list(updates), chunk_size):
+            try:
+                response = self.session.put(
+                    f"{self.base_url}/api/schedule/batch",
+                    json={"items": chunk},
+                    params=_overlap_params(allow_overlap),
+                    timeout=30
+                )
+                
+                if response.status_code != 200:
+                    logger.error("Failed to batch update: %s - %s", response.status_code, response.text)
+                    return {"success": False, "error": f"Status: {response.status_code}",
+                            "data": {"items": updated}}
+                
+                for update in chunk:
+                    fields = {key: value for key, value in update.items() if key != "id"}
+                    self.schedule_cache.patch_item(update["id"], fields)
+                    self._notify("patch_item", update["id"], fields)
+                updated.extend(parse_items(response.json().get("items", [])))
+                
+            except Exception as e:
+                logger.error("Error in batch update: %s", e)
+                return {"success": False, "error": str(e), "data": {"items": updated}}
+        
+        return {"success": True, "data": {"items": updated}}
+    
+    def batch_delete_schedule_items(self, schedule_ids: list, chunk_size: int = BATCH_CHUNK_SIZE):
+        """Удаляет много занятий пачками через DELETE /api/schedule/batch"""
+        deleted = 0
+        for chunk in _chunks(list(schedule_ids), chunk_size):
+            try:
+                response = self.session.delete(
+                    f"{self.base_url}/api/schedule/batch",
+                    json={"ids": chunk},
+                    timeout=30
+                )
+                
+                if response.status_code not in [200, 204]:
+                    logger.error("Failed to batch delete: %s - %s", response.status_code, response.text)
+                    return {"success": False, "error": f"Status: {response.status_code}",
+                            "data": {"deleted": deleted}}
+                
+                for schedule_id in chunk:
+                    self.schedule_cache.remove_item(schedule_id)
+                    self._notify("remove_item", schedule_id)
+                data = response.json() if response.content else {}
+                deleted += data.get("deleted", len(chunk))
+                
+            except Exception as e:
+                logger.error("Error in batch delete: %s", e)
+                return {"success": False, "error": str(e), "data": {"deleted": deleted}}
+        
+        return {"success": True, "data": {"deleted": deleted}}
+    
     def get_schedule_by_id(self, schedule_id: int):
         """Получает конкретную запись расписания по ID"""
         try:
@@ -183,12 +646,459 @@ class ScheduleAPIClient:
             
             if response.status_code == 200:
                 data = response.json()
-                return {"success": True, "data": data.get("item", data)}
+                return {"success": True, "data": ScheduleItem.from_dict(data.get("item", data))}
             else:
-                logger.error(f"Failed to get schedule {schedule_id}: {response.status_code} - {response.text}")
+                logger.error("Failed to get schedule %s: %s - %s", schedule_id, response.status_code, response.text)
                 return {"success": False, "error": f"Status: {response.status_code}"}
                 
         except Exception as e:
-            logger.error(f"Error getting schedule by ID: {e}")
+            logger.error("Error getting schedule by ID: %s", e)
             return {"success": False, "error": str(e)}
-    
+
+
+class AsyncScheduleAPIClient:
+    """Асинхронный клиент для Go backend API (aiohttp, общий пул соединений)"""
+
+    def __init__(self, base_url: str = "http://localhost:8080", timeout: float = 5,
+                 limit: int = 100, limit_per_host: int = 20, keepalive_timeout: float = 30,
+                 user_cache: TTLCache = None, schedule_cache: ScheduleCache = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+        # aiohttp.TraceConfig для новых сессий (метрики запросов, см. metrics.py)
+        self.trace_configs = []
+        self.user_cache = user_cache if user_cache is not None else TTLCache()
+        self.schedule_cache = schedule_cache if schedule_cache is not None else ScheduleCache()
+        self.listeners = []
+        logger.info("Async API Client initialized with base URL: %s", base_url)
+
+    def add_listener(self, listener):
+        """Подписывает listener на изменения пользователей и занятий (см. _notify)"""
+        self.listeners.append(listener)
+
+    def _notify(self, event: str, *args):
+        _notify(self.listeners, event, *args)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Лениво создает сессию внутри работающего event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                trace_configs=self.trace_configs or None
+            )
+        return self._session
+
+    async def close(self):
+        """Закрывает сессию и освобождает соединения пула"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request(self, method: str, path: str, timeout: float = None, **kwargs):
+        """Выполняет запрос и возвращает (status, json или None, text)"""
+        session = self._get_session()
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        async with session.request(method, f"{self.base_url}{path}", **kwargs) as response:
+            text = await response.text()
+            try:
+                data = json.loads(text) if text else None
+            except ValueError:
+                data = None
+            return response.status, data, text
+
+    async def get_or_create_user(self, telegram_id: int, username: str = None, first_name: str = None,
+                                 timeout: float = None):
+        """Получает или создает пользователя"""
+        try:
+            # Сначала пытаемся получить пользователя
+            status, data, text = await self._request("GET", f"/api/users/{telegram_id}", timeout)
+
+            if status == 200:
+                logger.debug("User found: %s", data)
+                user = User.from_dict(data.get("user", data))
+                self.user_cache.set(telegram_id, user)
+                self._notify("add_user", user)
+                return {"success": True, "data": user}
+
+            # Если пользователь не найден (404), создаем нового
+            elif status == 404:
+                user_data = {
+                    "telegram_id": telegram_id,
+                    "username": username,
+                    "first_name": first_name
+                }
+
+                status, data, text = await self._request("POST", "/api/users", timeout, json=user_data)
+
+                if status in [200, 201]:
+                    logger.info("User created: %s", data)
+                    user = User.from_dict(data.get("user", data))
+                    self.user_cache.invalidate(telegram_id)
+                    self.user_cache.set(telegram_id, user)
+                    self._notify("add_user", user)
+                    return {"success": True, "data": user}
+                else:
+                    logger.error("Failed to create user: %s - %s", status, text)
+                    return {"success": False, "error": f"Create failed: {status}"}
+
+            else:
+                logger.error("Unexpected status: %s - %s", status, text)
+                return {"success": False, "error": f"API error: {status}"}
+
+        except Exception as e:
+            logger.error("Error in get_or_create_user: %s", e)
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+    async def get_user_by_telegram_id(self, telegram_id: int, timeout: float = None):
+        """Получает пользователя по telegram_id (с кэшированием)"""
+        cached = self.user_cache.get(telegram_id)
+        if cached is not None:
+            return {"success": True, "data": cached}
+
+        try:
+            status, data, text = await self._request("GET", f"/api/users/{telegram_id}", timeout)
+
+            if status == 200:
+                user = User.from_dict(data.get("user", data))
+                self.user_cache.set(telegram_id, user)
+                self._notify("add_user", user)
+                return {"success": True, "data": user}
+            elif status == 404:
+                return {"success": False, "error": "User not found"}
+            else:
+                return {"success": False, "error": f"Status: {status}"}
+
+        except Exception as e:
+            logger.error("Error getting user: %s", e)
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+    async def create_schedule_item(self, user_id: int, day_of_week: str, time_start: str,
+                                   time_end: str, subject: str, description: str = "",
+                                   allow_overlap: bool = False, timeout: float = None):
+        """Создает новое занятие в расписании
+
+        Backend отклоняет пересечение с другими занятиями (409), если не передан allow_overlap.
+        """
+        try:
+            schedule_data = {
+                "user_id": user_id,
+                "day_of_week": day_of_week,
+                "time_start": time_start,
+                "time_end": time_end,
+                "subject": subject,
+                "description": description
+            }
+
+            status, data, text = await self._request(
+                "POST", "/api/schedule", timeout, json=schedule_data, params=_overlap_params(allow_overlap)
+            )
+
+            if status in [200, 201]:
+                item = ScheduleItem.from_dict(data.get("item", data))
+                self.schedule_cache.add_item(item)
+                self._notify("add_item", item)
+                return {"success": True, "data": item}
+            else:
+                logger.error("Failed to create schedule: %s - %s", status, text)
+                return {"success": False, "error": text}
+
+        except Exception as e:
+            logger.error("Error creating schedule: %s", e)
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+    async def get_user_schedule(self, user_id: int, day_of_week: str = None, timeout: float = None):
+        """Получает расписание пользователя (через кэш недели)"""
+        cached = self.schedule_cache.get(user_id, day_of_week)
+        if cached is not None:
+            return {"success": True, "data": {"items": cached}}
+
+        try:
+            # Фильтрация по пользователю выполняется на backend; загружаем всю неделю,
+            # чтобы следующие запросы по другим дням обслуживались из кэша
+            status, data, text = await self._request(
+                "GET", "/api/schedule", timeout, params={"user_id": user_id, "fields": ",".join(SCHEDULE_ITEM_FIELDS)}
+            )
+
+            if status == 200:
+                items = parse_items(data.get("items", []))
+                items.sort(key=lambda x: (x.day, x.start, x.end))
+                self.schedule_cache.store(user_id, items)
+
+                if day_of_week:
+                    items = [item for item in items if item.day_of_week == day_of_week]
+
+                return {"success": True, "data": {"items": items}}
+            else:
+                return {"success": False, "error": f"Status: {status}"}
+
+        except Exception as e:
+            logger.error("Error getting schedule: %s", e)
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+    async def get_all_schedule_items(self, timeout: float = None):
+        """Получает занятия всех пользователей (постранично, без служебных полей)"""
+        try:
+            items = [item async for item in self.iter_schedule_items(timeout=timeout)]
+            return {"success": True, "data": {"items": items}}
+        except RuntimeError as e:
+            logger.error("Error getting all schedule items: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def iter_schedule_items(self, user_id: int = None, day_of_week: str = None,
+                                  fields=SCHEDULE_ITEM_FIELDS, page_size: int = SCHEDULE_PAGE_SIZE,
+                                  timeout: float = None, by_user: bool = False):
+        """Лениво перебирает занятия постранично (по возрастанию id), async for
+
+        В памяти одновременно только одна страница; by_user=True - порядок
+        (user_id, id). Ошибка запроса прерывает обход исключением RuntimeError.
+        """
+        after = (0, 0)
+        while True:
+            try:
+                status, data, text = await self._request(
+                    "GET", "/api/schedule", timeout,
+                    params=_page_params(user_id, day_of_week, fields, page_size, after, by_user))
+            except Exception as e:
+                logger.error("Error paging schedule items: %s", e)
+                raise RuntimeError(str(e) or type(e).__name__) from e
+            if status != 200:
+                raise RuntimeError(f"Status: {status}")
+
+            for item in parse_items(data.get("items") or []):
+                yield item
+            if not data.get("has_more"):
+                return
+            after = (data.get("next_after_user_id", 0), data["next_after_id"])
+
+    async def get_all_users(self, timeout: float = None):
+        """Получает всех пользователей (telegram_id для рассылок и напоминаний)"""
+        try:
+            status, data, text = await self._request("GET", "/api/users", timeout)
+
+            if status == 200:
+                return {"success": True, "data": {"users": [User.from_dict(user) for user in data.get("users", [])]}}
+            else:
+                return {"success": False, "error": f"Status: {status}"}
+
+        except Exception as e:
+            logger.error("Error getting users: %s", e)
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+    async def get_schedule_changes(self, since: int = 0, limit: int = CHANGES_PAGE_SIZE, timeout: float = None):
+        """Получает одну страницу ленты изменений расписания после курсора since"""
+        try:
+            status, data, text = await self._request("GET", "/api/schedule/changes", timeout,
+                                                     params={"since": since, "limit": limit})
+
+            if status == 200:
+                return {"success": True, "data": _parse_changes(data)}
+            elif status == 410:
+                # head - курсор, с которого продолжать после полной перезагрузки
+                return {"success": False, "error": "Cursor expired", "expired": True,
+                        "head": (data or {}).get("head", 0)}
+            else:
+                return {"success": False, "error": f"Status: {status}"}
+
+        except Exception as e:
+            logger.error("Error getting schedule changes: %s", e)
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+    async def sync_schedule_changes(self, since: int = 0, limit: int = CHANGES_PAGE_SIZE, timeout: float = None):
+        """Дочитывает ленту изменений с курсора since, обновляет кэш и подписчиков
+
+        Возвращает новый курсор; при ошибке на середине - курсор последней
+        примененной страницы, с него можно продолжить. expired - курсор устарел:
+        расписание нужно перезагрузить целиком и продолжить с курсора head
+        (или с since=0 - новому клиенту лента отвечает всегда).
+        """
+        changed = deleted = 0
+        while True:
+            result = await self.get_schedule_changes(since, limit, timeout)
+            if not result["success"]:
+                result["data"] = {"cursor": since, "changed": changed, "deleted": deleted}
+                return result
+            page = result["data"]
+            for item in page["items"]:
+                self.schedule_cache.add_item(item)
+                self._notify("add_item", item)
+            for schedule_id in page["deleted"]:
+                self.schedule_cache.remove_item(schedule_id)
+                self._notify("remove_item", schedule_id)
+            changed += len(page["items"])
+            deleted += len(page["deleted"])
+            since = page["cursor"]
+            if not page["has_more"]:
+                return {"success": True, "data": {"cursor": since, "changed": changed, "deleted": deleted}}
+
+    async def follow_schedule_changes(self, interval: float, limit: int = CHANGES_PAGE_SIZE):
+        """Раз в interval секунд применяет ленту изменений к кэшу и подписчикам
+
+        Так до кэша недель и напоминаний доходят правки других экземпляров бота.
+        Начинает с текущей головы ленты: более ранние изменения уже видны при
+        загрузке. Работает до отмены задачи.
+        """
+        since = None
+        while True:
+            if since is None:
+                probe = await self.get_schedule_changes(0, limit=1)
+                if probe["success"]:
+                    since = probe["data"]["head"]
+            else:
+                result = await self.sync_schedule_changes(since, limit)
+                if result.get("expired"):
+                    # Пропущенные удаления не восстановить - кэш недель перечитается с backend
+                    logger.warning("Schedule changes cursor %s expired, clearing schedule cache", since)
+                    self.schedule_cache.clear()
+                    since = result["head"]
+                else:
+                    since = result["data"]["cursor"]
+            await asyncio.sleep(interval)
+
+    async def delete_schedule_item(self, schedule_id: int, timeout: float = None):
+        """Удаляет занятие из расписания"""
+        try:
+            status, data, text = await self._request("DELETE", f"/api/schedule/{schedule_id}", timeout)
+
+            if status in [200, 204]:
+                self.schedule_cache.remove_item(schedule_id)
+                self._notify("remove_item", schedule_id)
+                return {"success": True}
+            else:
+                logger.error("Failed to delete schedule %s: %s - %s", schedule_id, status, text)
+                return {"success": False, "error": f"Status: {status}"}
+
+        except Exception as e:
+            logger.error("Error deleting schedule: %s", e)
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+    async def update_schedule_item(self, schedule_id: int, update_data: dict, allow_overlap: bool = False,
+                                   timeout: float = None):
+        """Обновляет запись расписания"""
+        try:
+            status, data, text = await self._request(
+                "PUT", f"/api/schedule/{schedule_id}", timeout, json=update_data,
+                params=_overlap_params(allow_overlap)
+            )
+
+            if status in [200, 204]:
+                self.schedule_cache.patch_item(schedule_id, update_data)
+                self._notify("patch_item", schedule_id, update_data)
+                return {"success": True}
+            else:
+                logger.error("Failed to update schedule %s: %s - %s", schedule_id, status, text)
+                return {"success": False, "error": f"Status: {status}"}
+
+        except Exception as e:
+            logger.error("Error updating schedule: %s", e)
+            return {"success": False, "error": str(e) or type(e).__name__}
+
+    async def batch_create_schedule_items(self, items: list, chunk_size: int = BATCH_CHUNK_SIZE,
+                                          allow_overlap: bool = False, timeout: float = None):
+        """Создает много занятий пачками через POST /api/schedule/batch
+
+        items - словари с полями как у create_schedule_item (включая user_id).
+        При ошибке в data["items"] возвращаются уже созданные занятия.
+        """
+        created = []
+        for chunk in _chunks(list(items), chunk_size):
+            try:
+                status, data, text = await self._request(
+                    "POST", "/api/schedule/batch", timeout, json={"items": chunk},
+                    params=_overlap_params(allow_overlap)
+                )
+
+                if status not in [200, 201]:
+                    logger.error("Failed to batch create: %s - %s", status, text)
+                    return {"success": False, "error": text, "data": {"items": created}}
+
+                for item in parse_items(data.get("items", [])):
+                    self.schedule_cache.add_item(item)
+                    self._notify("add_item", item)
+                    created.append(item)
+
+            except Exception as e:
+                logger.error("Error in batch create: %s", e)
+                return {"success": False, "error": str(e) or type(e).__name__, "data": {"items": created}}
+
+        return {"success": True, "data": {"items": created}}
+
+    async def batch_update_schedule_items(self, updates: list, chunk_size: int = BATCH_CHUNK_SIZE,
+                                          allow_overlap: bool = False, timeout: float = None):
+        """Обновляет много занятий пачками через PUT /api/schedule/batch
+
+        updates - словари {"id": ..., <поле>: <значение>, ...}.
+        """
+        updated = []
+        for chunk in _chunks(list(updates), chunk_size):
+            try:
+                status, data, text = await self._request(
+                    "PUT", "/api/schedule/batch", timeout, json={"items": chunk},
+                    params=_overlap_params(allow_overlap)
+                )
+
+                if status != 200:
+                    logger.error("Failed to batch update: %s - %s", status, text)
+                    return {"success": False, "error": f"Status: {status}", "data": {"items": updated}}
+
+                for update in chunk:
+                    fields = {key: value for key, value in update.items() if key != "id"}
+                    self.schedule_cache.patch_item(update["id"], fields)
+                    self._notify("patch_item", update["id"], fields)
+                updated.extend(parse_items(data.get("items", [])))
+
+            except Exception as e:
+                logger.error("Error in batch update: %s", e)
+                return {"success": False, "error": str(e) or type(e).__name__, "data": {"items": updated}}
+
+        return {"success": True, "data": {"items": updated}}
+
+    async def batch_delete_schedule_items(self, schedule_ids: list, chunk_size: int = BATCH_CHUNK_SIZE,
+                                          timeout: float = None):
+        """Удаляет много занятий пачками через DELETE /api/schedule/batch"""
+        deleted = 0
+        for chunk in _chunks(list(schedule_ids), chunk_size):
+            try:
+                status, data, text = await self._request(
+                    "DELETE", "/api/schedule/batch", timeout, json={"ids": chunk}
+                )
+
+                if status not in [200, 204]:
+                    logger.error("Failed to batch delete: %s - %s", status, text)
+                    return {"success": False, "error": f"Status: {status}", "data": {"deleted": deleted}}
+
+                for schedule_id in chunk:
+                    self.schedule_cache.remove_item(schedule_id)
+                    self._notify("remove_item", schedule_id)
+                deleted += (data or {}).get("deleted", len(chunk))
+
+            except Exception as e:
+                logger.error("Error in batch delete: %s", e)
+                return {"success": False, "error": str(e) or type(e).__name__, "data": {"deleted": deleted}}
+
+        return {"success": True, "data": {"deleted": deleted}}
+
+    async def get_schedule_by_id(self, schedule_id: int, timeout: float = None):
+        """Получает конкретную запись расписания по ID"""
+        try:
+            status, data, text = await self._request("GET", f"/api/schedule/{schedule_id}", timeout)
+
+            if status == 200:
+                return {"success": True, "data": ScheduleItem.from_dict(data.get("item", data))}
+            else:
+                logger.error("Failed to get schedule %s: %s - %s", schedule_id, status, text)
+                return {"success": False, "error": f"Status: {status}"}
+
+        except Exception as e:
+            logger.error("Error getting schedule by ID: %s", e)
+            return {"success": False, "error": str(e) or type(e).__name__}
@@ -0,0 +1,431 @@
+"""Нагрузочный прогон бота: настоящий router из handlers.py против backend
+
+    python bench_bot.py --users 200 --lessons 20 --rounds 5 --concurrency 50
+    python bench_bot.py --go            # собрать и запустить go-backend на временной SQLite
+    python bench_bot.py --base-url http://localhost:8080   # уже запущенный backend
+
+По умолчанию backend - FakeBackend в этом же процессе (fake_backend.py).
+Апдейты идут через Dispatcher.feed_raw_update, ответы Telegram подменяет
+StubSession (сеть не используется). Отчет - пропускная способность и
+p50/p95/p99 по каждому хендлеру и по сценариям целиком; --json сохраняет
+его для сравнения прогонов.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Chat, InlineKeyboardMarkup, Message
+
+from models import DAYS_ORDER
+
+BENCH_TOKEN = "123456:BENCH"
+GO_BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'go-backend')
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: list, q: float) -> float:
+    """Перцентиль по ближайшему рангу; values отсортирован"""
+    if not values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    """Сводка по задержкам (секунды) в миллисекундах"""
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "rps": len(samples) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(samples) / len(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+class StubSession(BaseSession):
+    """Сессия бота без сети: отвечает на методы Telegram правдоподобными объектами
+
+    Запоминает inline-клавиатуру последнего сообщения в каждом чате - по
+    ней симулированный пользователь "нажимает" кнопки. latency - задержка
+    ответа Telegram в секундах.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls = Counter()
+        self.last_markup = {}
+        self.last_text = {}
+        self._message_ids = itertools.count(1)
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls[type(method).__name__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None or method.__returning__ is bool:
+            return True
+
+        markup = getattr(method, 'reply_markup', None)
+        self.last_text[chat_id] = getattr(method, 'text', None)
+        self.last_markup[chat_id] = markup if isinstance(markup, InlineKeyboardMarkup) else None
+        return Message(
+            message_id=next(self._message_ids),
+            date=datetime.now(timezone.utc),
+            chat=Chat(id=chat_id, type='private'),
+            text=getattr(method, 'text', None),
+        ).as_(bot)
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b''
+
+    async def close(self):
+        pass
+
+
+class HandlerTimer(BaseMiddleware):
+    """Inner-middleware: время каждого вызова хендлера по его имени"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    async def __call__(self, handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.samples[data['handler'].callback.__name__].append(time.perf_counter() - started)
+
+
+class SimUser:
+    """Пользователь Telegram, отправляющий сообщения и нажимающий кнопки"""
+
+    _update_ids = itertools.count(1)
+
+    def __init__(self, dp: Dispatcher, bot: Bot, session: StubSession, telegram_id: int):
+        self.dp = dp
+        self.bot = bot
+        self.session = session
+        self.telegram_id = telegram_id
+        self._from = {"id": telegram_id, "is_bot": False, "first_name": f"Bench {telegram_id}",
+                      "username": f"bench_{telegram_id}"}
+        self._chat = {"id": telegram_id, "type": "private"}
+        self.updates = 0
+
+    async def _feed(self, payload: dict):
+        self.updates += 1
+        await self.dp.feed_raw_update(self.bot, {"update_id": next(self._update_ids), **payload})
+
+    async def send(self, text: str):
+        await self._feed({"message": {"message_id": 1, "date": int(time.time()), "chat": self._chat,
+                                      "from": self._from, "text": text}})
+
+    def button(self, prefix: str):
+        """callback_data первой кнопки последнего сообщения, начинающейся с prefix"""
+        markup = self.session.last_markup.get(self.telegram_id)
+        if markup is None:
+            return None
+        for row in markup.inline_keyboard:
+            for button in row:
+                if button.callback_data and button.callback_data.startswith(prefix):
+                    return button.callback_data
+        return None
+
+    async def click(self, prefix: str) -> bool:
+        data = self.button(prefix)
+        if data is None:
+            return False
+        await self._feed({"callback_query": {
+            "id": str(next(self._update_ids)), "from": self._from, "chat_instance": str(self.telegram_id),
+            "data": data,
+            "message": {"message_id": 1, "date": int(time.time()), "chat": self._chat, "text": "bench"},
+        }})
+        return True
+
+
+# Сценарии: последовательность действий одного пользователя
+
+async def flow_show_day(user: SimUser, rng: random.Random):
+    await user.send(rng.choice(['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница']))
+
+
+async def flow_statistics(user: SimUser, rng: random.Random):
+    await user.send('/statistics')
+
+
+async def flow_create(user: SimUser, rng: random.Random):
+    await user.send('Добавить занятие')
+    await user.send('Воскресенье')
+    hour = rng.randrange(8, 21)
+    await user.send(f"{hour:02d}:00")
+    await user.send(f"{hour:02d}:45")
+    await user.send('Нагрузочный тест')
+    await user.send('-')
+    # Пересечение с существующим занятием - подтверждаем
+    await user.click('confirm_create')
+
+
+async def flow_edit(user: SimUser, rng: random.Random):
+    await user.send('Редактировать занятие')
+    if not await user.click('select_edit_'):
+        return
+    await user.click('edit_field_subject')
+    await user.send(f"Предмет {rng.randrange(1000)}")
+    await user.click('confirm_edit')
+
+
+async def flow_delete(user: SimUser, rng: random.Random):
+    await user.send('Удалить занятие')
+    if await user.click('select_delete_'):
+        await user.click('confirm_delete_')
+
+
+FLOWS = {
+    'show_day': (flow_show_day, 4),
+    'statistics': (flow_statistics, 2),
+    'create': (flow_create, 1),
+    'edit': (flow_edit, 1),
+    'delete': (flow_delete, 1),
+}
+
+
+def seed_items(user_id: int, lessons: int) -> list:
+    """lessons занятий пользователя по 45 минут, равномерно по неделе с 08:00"""
+    items = []
+    for j in range(min(lessons, 7 * 14)):
+        start = 8 * 60 + (j // 7) * 60
+        items.append({
+            "user_id": user_id, "day_of_week": DAYS_ORDER[j % 7],
+            "time_start": f"{start // 60:02d}:{start % 60:02d}", "time_end": f"{start // 60:02d}:45",
+            "subject": f"Занятие {j + 1}", "description": f"ауд. {100 + j}",
+        })
+    return items
+
+
+async def seed(base_url: str, users: int, lessons: int, first_telegram_id: int) -> list:
+    """Создает users пользователей по lessons занятий; возвращает их telegram_id"""
+    from api_client import AsyncScheduleAPIClient
+
+    client = AsyncScheduleAPIClient(base_url, timeout=60)
+    telegram_ids = [first_telegram_id + i for i in range(users)]
+    try:
+        items = []
+        for telegram_id in telegram_ids:
+            result = await client.get_or_create_user(telegram_id, f"bench_{telegram_id}")
+            if not result.get("success"):
+                raise RuntimeError(f"Failed to seed user {telegram_id}: {result.get('error')}")
+            items.extend(seed_items(result["data"].id, lessons))
+        result = await client.batch_create_schedule_items(items, allow_overlap=True)
+        if not result.get("success"):
+            raise RuntimeError(f"Failed to seed lessons: {result.get('error')}")
+    finally:
+        await client.close()
+    return telegram_ids
+
+
+_dispatcher = None
+
+
+def router_dispatcher() -> Dispatcher:
+    """Диспетчер с router из handlers.py; router можно подключить только к одному диспетчеру за процесс"""
+    global _dispatcher
+    if _dispatcher is None:
+        import handlers
+
+        _dispatcher = Dispatcher(storage=MemoryStorage())
+        _dispatcher.include_router(handlers.router)
+    return _dispatcher
+
+
+async def run_benchmark(base_url: str, users: int = 100, lessons: int = 20, rounds: int = 5,
+                        concurrency: int = 50, flows=None, seed_value: int = 1,
+                        tg_latency: float = 0.0, first_telegram_id: int = 10_000) -> dict:
+    """Засевает backend, прогоняет сценарии через router и возвращает отчет"""
+    import handlers
+
+    handlers.api_client.base_url = base_url
+    flows = list(flows or FLOWS)
+    telegram_ids = await seed(base_url, users, lessons, first_telegram_id)
+
+    session = StubSession(tg_latency)
+    bot = Bot(BENCH_TOKEN, session=session)
+    dp = router_dispatcher()
+    timer = HandlerTimer()
+    dp.message.middleware(timer)
+    dp.callback_query.middleware(timer)
+
+    rng = random.Random(seed_value)
+    plans = {telegram_id: [rng.choices(flows, weights=[FLOWS[name][1] for name in flows])[0]
+                           for _ in range(rounds)] for telegram_id in telegram_ids}
+    flow_samples = defaultdict(list)
+    errors = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def simulate(telegram_id: int):
+        user = SimUser(dp, bot, session, telegram_id)
+        user_rng = random.Random(seed_value * 1_000_003 + telegram_id)
+        async with semaphore:
+            await user.send('/start')
+            for name in plans[telegram_id]:
+                started = time.perf_counter()
+                try:
+                    await FLOWS[name][0](user, user_rng)
+                except Exception as e:
+                    errors[name] += 1
+                    logger.warning("Flow %s failed for %s: %r", name, telegram_id, e)
+                    continue
+                flow_samples[name].append(time.perf_counter() - started)
+        return user.updates
+
+    started = time.perf_counter()
+    try:
+        updates = sum(await asyncio.gather(*(simulate(telegram_id) for telegram_id in telegram_ids)))
+    finally:
+        elapsed = time.perf_counter() - started
+        dp.message.middleware.unregister(timer)
+        dp.callback_query.middleware.unregister(timer)
+        await handlers.api_client.close()
+
+    return {
+        "config": {"users": users, "lessons": lessons, "rounds": rounds, "concurrency": concurrency,
+                   "flows": flows, "seed": seed_value, "tg_latency": tg_latency, "base_url": base_url},
+        "elapsed_s": elapsed,
+        "updates": updates,
+        "updates_per_s": updates / elapsed if elapsed else 0.0,
+        "handlers": {name: summarize(samples, elapsed) for name, samples in sorted(timer.samples.items())},
+        "flows": {name: summarize(samples, elapsed) for name, samples in sorted(flow_samples.items())},
+        "errors": dict(errors),
+        "throttling": handlers.throttling.stats(),
+        "telegram_calls": dict(session.calls),
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [f"{report['updates']} updates in {report['elapsed_s']:.2f}s "
+             f"({report['updates_per_s']:.0f} updates/s)"]
+    for section in ('handlers', 'flows'):
+        lines.append('')
+        lines.append(f"{section:<32} {'count':>7} {'rps':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}")
+        for name, row in report[section].items():
+            lines.append(f"{name:<32} {row['count']:>7} {row['rps']:>8.1f} {row['p50_ms']:>8.2f} "
+                         f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}")
+    if report['errors']:
+        lines.append(f"\nerrors: {report['errors']}")
+    throttled = report['throttling']['dropped'] + report['throttling']['coalesced']
+    if throttled:
+        lines.append(f"throttled updates: {throttled} (raise THROTTLE_RATE/THROTTLE_BURST or drop --throttle)")
+    return '\n'.join(lines)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_healthy(base_url: str, process, timeout: float = 60):
+    import aiohttp
+
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"go-backend exited with code {process.returncode}")
+            try:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("go-backend did not become healthy")
+
+
+async def main_async(args) -> dict:
+    process = runner = workdir = None
+    try:
+        if args.base_url:
+            base_url = args.base_url
+        elif args.go:
+            # Свежая SQLite во временном каталоге: прогоны не влияют друг на друга
+            workdir = tempfile.mkdtemp(prefix='bench-go-')
+            binary = os.path.join(workdir, 'server')
+            subprocess.run(['go', 'build', '-o', binary, './cmd/server'], cwd=GO_BACKEND_DIR, check=True)
+            port = _free_port()
+            env = {**os.environ, 'DB_PATH': os.path.join(workdir, 'bench.db'), 'PORT': str(port),
+                   'GIN_MODE': 'release'}
+            process = subprocess.Popen([binary], cwd=workdir, env=env,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            base_url = f"http://127.0.0.1:{port}"
+            await _wait_healthy(base_url, process)
+        else:
+            from fake_backend import start_fake_backend
+
+            runner, base_url = await start_fake_backend()
+
+        return await run_benchmark(base_url, args.users, args.lessons, args.rounds, args.concurrency,
+                                   args.flows, args.seed, args.tg_latency / 1000)
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон бота и backend")
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--lessons', type=int, default=20, help="занятий на пользователя (до 98)")
+    parser.add_argument('--rounds', type=int, default=5, help="сценариев на пользователя")
+    parser.add_argument('--concurrency', type=int, default=50, help="одновременно активных пользователей")
+    parser.add_argument('--flows', nargs='+', choices=sorted(FLOWS), help="сценарии (по умолчанию все)")
+    parser.add_argument('--seed', type=int, default=1, help="зерно выбора сценариев")
+    parser.add_argument('--tg-latency', type=float, default=0, help="задержка ответа Telegram, мс")
+    parser.add_argument('--throttle', action='store_true', help="не ослаблять THROTTLE_* из окружения")
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--json', help="сохранить отчет в файл")
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument('--base-url', help="уже запущенный backend")
+    backend.add_argument('--go', action='store_true', help="собрать и запустить go-backend")
+    args = parser.parse_args(argv)
+
+    # config.py читает окружение при импорте handlers
+    if not args.throttle:
+        os.environ['THROTTLE_RATE'] = '1000000'
+        os.environ['THROTTLE_BURST'] = '1000000'
+    logging.basicConfig(level=args.log_level)
+    import handlers  # noqa: F401
+
+    report = asyncio.run(main_async(args))
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""Микробенчмарки горячих путей api_client.py против HTTP-заглушки в процессе
+
+    python bench_client.py                      # прогон и сравнение с .benchmarks/client.json
+    python bench_client.py --save               # сохранить результат как новый baseline
+    python bench_client.py -k get_user_schedule --rounds 10
+
+Сравнение идет по медиане одной операции; замедление больше --threshold
+процентов считается регрессией (код возврата 1). Baseline зависит от
+машины, поэтому сравнивать имеет смысл прогоны на одном и том же хосте.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from api_client import AsyncScheduleAPIClient, ScheduleAPIClient
+from models import DAYS_ORDER, parse_items
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.benchmarks', 'client.json')
+# Размеры недели пользователя: user_id в заглушке равен числу его занятий
+TABLE_SIZES = (10, 100, 1000)
+TELEGRAM_ID = 42
+
+
+def make_items(count: int) -> list:
+    return [{
+        "id": i + 1, "user_id": count, "day_of_week": DAYS_ORDER[i % 7],
+        "time_start": f"{8 + i // 7 % 14:02d}:00", "time_end": f"{8 + i // 7 % 14:02d}:45",
+        "subject": f"Занятие {i + 1}", "description": f"ауд. {100 + i % 400}",
+        "created_at": "2026-10-01T12:00:00Z", "updated_at": "2026-10-01T12:00:00Z", "version": i + 1,
+    } for i in range(count)]
+
+
+class StubServer:
+    """HTTP/1.1 сервер с keep-alive в фоновом потоке и заранее сериализованными ответами
+
+    Ответы не зависят от запроса, поэтому замеры показывают стоимость
+    клиента (requests/aiohttp, разбор JSON, кэши), а не сервера.
+    """
+
+    def __init__(self, sizes=TABLE_SIZES):
+        self.bodies = {
+            "/health": json.dumps({"status": "OK"}).encode(),
+            "/api/users": json.dumps({"user": {"id": 1, "telegram_id": TELEGRAM_ID, "username": "bench",
+                                               "first_name": "Bench", "created_at": ""}}).encode(),
+        }
+        self.schedules = {size: json.dumps({"items": make_items(size)}, ensure_ascii=False).encode()
+                          for size in sizes}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело уходят разными send(): без TCP_NODELAY keep-alive
+            # соединение ловит задержку ACK (~40 мс) и замеры показывают ее, а не клиента
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/api/schedule":
+                    body = stub.schedules.get(int(parse_qs(url.query).get("user_id", ["0"])[0]))
+                elif url.path.startswith("/api/users/"):
+                    body = stub.bodies["/api/users"]
+                else:
+                    body = stub.bodies.get(url.path)
+                status = 200 if body is not None else 404
+                body = body if body is not None else b'{"error": "Not found"}'
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# Реестр бенчмарков: имя -> (фабрика, items); фабрика(stub) -> (функция одной операции, завершение).
+# items - число занятий в операции, для них в результат добавляется время на одно занятие
+BENCHMARKS = {}
+
+
+def benchmark(name: str, items: int = None):
+    def register(factory):
+        BENCHMARKS[name] = (factory, items)
+        return factory
+    return register
+
+
+for _size in TABLE_SIZES:
+    @benchmark(f"get_user_schedule[{_size}]", items=_size)
+    def _get_user_schedule(stub, size=_size):
+        # Промах кэша на каждом вызове: HTTP + разбор недели
+        client = ScheduleAPIClient(stub.base_url)
+
+        def op():
+            client.schedule_cache.clear()
+            client.get_user_schedule(size)
+        return op, client.session.close
+
+    @benchmark(f"decode_items[{_size}]", items=_size)
+    def _decode_items(stub, size=_size):
+        # Только json.loads + ScheduleItem.from_dict, без сети
+        body = stub.schedules[size]
+
+        def op():
+            parse_items(json.loads(body)["items"])
+        return op, None
+
+
+@benchmark("get_user_schedule[cached]")
+def _get_user_schedule_cached(stub):
+    client = ScheduleAPIClient(stub.base_url)
+    client.get_user_schedule(100)
+    return (lambda: client.get_user_schedule(100, "monday")), client.session.close
+
+
+@benchmark("schedule_cache_get[raw]")
+def _schedule_cache_get(stub):
+    # База для сравнения с [cached]: разница - стоимость конверта {"success", "data"}
+    client = ScheduleAPIClient(stub.base_url)
+    client.get_user_schedule(100)
+    return (lambda: client.schedule_cache.get(100, "monday")), client.session.close
+
+
+@benchmark("get_user_by_telegram_id[cached]")
+def _get_user_cached(stub):
+    client = ScheduleAPIClient(stub.base_url)
+    client.get_user_by_telegram_id(TELEGRAM_ID)
+    return (lambda: client.get_user_by_telegram_id(TELEGRAM_ID)), client.session.close
+
+
+@benchmark("http_roundtrip[session]")
+def _roundtrip_session(stub):
+    # Одно keep-alive соединение requests.Session, как в ScheduleAPIClient
+    session = requests.Session()
+    url = f"{stub.base_url}/health"
+    return (lambda: session.get(url, timeout=5)), session.close
+
+
+@benchmark("http_roundtrip[new_connection]")
+def _roundtrip_new_connection(stub):
+    url = f"{stub.base_url}/health"
+
+    def op():
+        with requests.Session() as session:
+            session.get(url, timeout=5)
+    return op, None
+
+
+@benchmark("async_get_user_schedule[100]")
+def _async_get_user_schedule(stub):
+    loop = asyncio.new_event_loop()
+    client = AsyncScheduleAPIClient(stub.base_url)
+
+    def op():
+        client.schedule_cache.clear()
+        loop.run_until_complete(client.get_user_schedule(100))
+
+    def close():
+        loop.run_until_complete(client.close())
+        loop.close()
+    return op, close
+
+
+def measure(op, rounds: int = 5, min_time: float = 0.2) -> dict:
+    """Время одной операции: калибровка числа итераций, затем rounds замеров"""
+    op()  # прогрев: соединение, кэши, импорты
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            op()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or iterations >= 1 << 20:
+            break
+        iterations = max(iterations * 2, int(iterations * min_time / max(elapsed, 1e-9)))
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            op()
+        samples.append((time.perf_counter() - started) / iterations)
+
+    median = statistics.median(samples)
+    return {
+        "median": median,
+        "mean": statistics.fmean(samples),
+        "min": min(samples),
+        "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "ops": 1 / median if median else 0.0,
+        "rounds": rounds,
+        "iterations": iterations,
+    }
+
+
+def run(selected=None, rounds: int = 5, min_time: float = 0.2) -> dict:
+    """Прогоняет бенчмарки (подстрока имени в selected) и возвращает результаты"""
+    results = {}
+    with StubServer() as stub:
+        for name, (factory, items) in BENCHMARKS.items():
+            if selected and not any(pattern in name for pattern in selected):
+                continue
+            op, close = factory(stub)
+            try:
+                results[name] = measure(op, rounds, min_time)
+                if items:
+                    results[name]["per_item"] = results[name]["median"] / items
+            finally:
+                if close is not None:
+                    close()
+    return {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor() or platform.machine()},
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 20.0) -> dict:
+    """Изменение медианы (в %) относительно baseline; regressions - хуже threshold"""
+    changes = {}
+    for name, result in current["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous and previous["median"]:
+            changes[name] = (result["median"] / previous["median"] - 1) * 100
+    return {
+        "changes": changes,
+        "regressions": {name: change for name, change in changes.items() if change > threshold},
+    }
+
+
+def format_results(current: dict, comparison: dict = None) -> str:
+    changes = comparison["changes"] if comparison else {}
+    lines = [f"{'benchmark':<34} {'median':>11} {'min':>11} {'stddev':>10} {'ops/s':>11} {'per item':>10} "
+             f"{'vs base':>8}"]
+    for name, result in current["benchmarks"].items():
+        change = f"{changes[name]:+.1f}%" if name in changes else "-"
+        per_item = f"{result['per_item'] * 1e6:.2f}us" if "per_item" in result else "-"
+        lines.append(f"{name:<34} {result['median'] * 1e6:>9.1f}us {result['min'] * 1e6:>9.1f}us "
+                     f"{result['stddev'] * 1e6:>8.1f}us {result['ops']:>11.0f} {per_item:>10} {change:>8}")
+    if comparison and comparison["regressions"]:
+        lines.append("")
+        lines.append("Регрессии: " + ", ".join(f"{name} {change:+.1f}%"
+                                               for name, change in comparison["regressions"].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Микробенчмарки ScheduleAPIClient")
+    parser.add_argument('-k', dest='selected', action='append', help="подстрока имени бенчмарка")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help="минимальная длительность замера, с")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="JSON с предыдущим прогоном")
+    parser.add_argument('--save', action='store_true', help="записать результат в --baseline")
+    parser.add_argument('--threshold', type=float, default=20.0, help="допустимое замедление, %%")
+    args = parser.parse_args(argv)
+
+    current = run(args.selected, args.rounds, args.min_time)
+
+    comparison = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            comparison = compare(current, json.load(f), args.threshold)
+    print(format_results(current, comparison))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline сохранен: {args.baseline}")
+        return 0
+    return 1 if comparison and comparison["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
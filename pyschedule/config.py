@@ -5,3 +5,94 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv('BOT_TOKEN', '7957730475:AAH10Q5MX9aTefw1xrDhrGfJ4JTJHLYf1gQ')
 API_URL = os.getenv('API_URL', 'http://localhost:8080')
+
+# Пул соединений aiohttp для AsyncScheduleAPIClient
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', '5'))
+API_POOL_LIMIT = int(os.getenv('API_POOL_LIMIT', '100'))
+API_POOL_LIMIT_PER_HOST = int(os.getenv('API_POOL_LIMIT_PER_HOST', '20'))
+API_KEEPALIVE_TIMEOUT = float(os.getenv('API_KEEPALIVE_TIMEOUT', '30'))
+
+# Кэш telegram_id -> пользователь
+USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '600'))
+
+# Кэш расписаний по user_id
+SCHEDULE_CACHE_SIZE = int(os.getenv('SCHEDULE_CACHE_SIZE', '5000'))
+SCHEDULE_CACHE_TTL = float(os.getenv('SCHEDULE_CACHE_TTL', '300'))
+# Как часто (в секундах) читать ленту изменений: правки других экземпляров в кэше и напоминаниях; 0 - не читать
+SCHEDULE_SYNC_INTERVAL = float(os.getenv('SCHEDULE_SYNC_INTERVAL', '5'))
+
+# Отправлять день одним сообщением (False - по сообщению на занятие)
+SCHEDULE_BATCH_RENDER = os.getenv('SCHEDULE_BATCH_RENDER', '1') != '0'
+
+# Импорт расписания из файлов
+IMPORT_MAX_FILE_SIZE = int(os.getenv('IMPORT_MAX_FILE_SIZE', str(1024 * 1024)))
+IMPORT_MAX_ITEMS = int(os.getenv('IMPORT_MAX_ITEMS', '1000'))
+
+# Границы дня для поиска свободного времени
+FREE_TIME_DAY_START = os.getenv('FREE_TIME_DAY_START', '08:00')
+FREE_TIME_DAY_END = os.getenv('FREE_TIME_DAY_END', '22:00')
+
+# Режим получения апдейтов: 'polling' или 'webhook' (без WEBHOOK_URL - откат на polling)
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+# Секрет заголовка X-Telegram-Bot-Api-Secret-Token: без него поддельные апдейты может слать любой,
+# кто знает адрес вебхука. В режиме webhook обязателен и общий для всех экземпляров
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8081'))
+# Сколько соединений Telegram открывает к нам / сколько апдейтов обрабатываем одновременно
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv('WEBHOOK_MAX_CONCURRENCY', '100'))
+WEBHOOK_MAX_BODY_SIZE = int(os.getenv('WEBHOOK_MAX_BODY_SIZE', str(256 * 1024)))
+WEBHOOK_SHUTDOWN_TIMEOUT = float(os.getenv('WEBHOOK_SHUTDOWN_TIMEOUT', '30'))
+
+# Число процессов-воркеров; больше 1 - апдейты раздаются по процессам по chat.id
+BOT_WORKERS = int(os.getenv('BOT_WORKERS', '1'))
+
+# Хранилище состояний диалогов (FSM): 'memory' или 'sqlite' (переживает перезапуск, общее для воркеров)
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'memory')
+FSM_STORAGE_PATH = os.getenv('FSM_STORAGE_PATH', 'fsm.sqlite3')
+FSM_TTL = float(os.getenv('FSM_TTL', '86400'))
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', '1'))
+FSM_CACHE_SIZE = int(os.getenv('FSM_CACHE_SIZE', '10000'))
+# Сколько секунд процесс верит прочитанной записи, не перечитывая хранилище (изменения других экземпляров)
+FSM_CACHE_TTL = float(os.getenv('FSM_CACHE_TTL', '1'))
+
+# Ограничение частоты запросов одного пользователя (токенов в секунду / размер всплеска)
+THROTTLE_RATE = float(os.getenv('THROTTLE_RATE', '2'))
+THROTTLE_BURST = int(os.getenv('THROTTLE_BURST', '5'))
+THROTTLE_MAX_USERS = int(os.getenv('THROTTLE_MAX_USERS', '10000'))
+# Не чаще чем раз в столько секунд отвечать пользователю "слишком часто"
+THROTTLE_NOTICE_INTERVAL = float(os.getenv('THROTTLE_NOTICE_INTERVAL', '10'))
+
+# Исходящие сообщения: лимиты Telegram на бота и на чат, повторы после flood control
+SEND_GLOBAL_RATE = float(os.getenv('SEND_GLOBAL_RATE', '30'))
+SEND_CHAT_RATE = float(os.getenv('SEND_CHAT_RATE', '1'))
+SEND_CHAT_BURST = int(os.getenv('SEND_CHAT_BURST', '3'))
+SEND_MAX_RETRIES = int(os.getenv('SEND_MAX_RETRIES', '3'))
+
+# Логирование: уровень, формат ('json' - строка JSON на запись, 'text'), файл ('' - stderr).
+# LOG_LEVELS - уровни отдельных модулей: 'api_client=DEBUG,aiogram.event=WARNING';
+# LOG_SAMPLE - доля записей ниже WARNING от шумных логгеров: 'aiogram.event=0.1,throttling=0.05'
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_FILE = os.getenv('LOG_FILE', '')
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+LOG_SAMPLE = os.getenv('LOG_SAMPLE', 'aiogram.event=0.1')
+
+# Метрики Prometheus на http://METRICS_HOST:METRICS_PORT/metrics (0 - выключены).
+# Воркеры (BOT_WORKERS > 1) занимают следующие порты: METRICS_PORT + 1 + номер воркера
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+# Трассировка апдейтов: доля апдейтов с trace (0 - выключена) и файл span'ов (JSON lines).
+# Go backend пишет свои span'ы в тот же файл, если ему передан TRACE_FILE; разбор - trace_waterfall.py
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+
+# Напоминания о занятиях (по умолчанию выключены: каждый процесс загружает расписания при старте)
+REMINDERS_ENABLED = os.getenv('REMINDERS_ENABLED', '0') == '1'
+REMINDER_LEAD_MINUTES = int(os.getenv('REMINDER_LEAD_MINUTES', '15'))
+TIMEZONE = os.getenv('TIMEZONE', 'Europe/Moscow')
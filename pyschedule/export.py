@@ -0,0 +1,195 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+
+from schedule_index import build_week_index, iter_week
+
+ICS_DAYS = {
+    'monday': 'MO', 'tuesday': 'TU', 'wednesday': 'WE', 'thursday': 'TH',
+    'friday': 'FR', 'saturday': 'SA', 'sunday': 'SU'
+}
+CSV_FIELDS = ['id', 'day_of_week', 'time_start', 'time_end', 'subject', 'description']
+
+
+def _ics_escape(value: str) -> str:
+    return (value.replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _ics_line(out, line: str):
+    """Пишет строку iCalendar с переносом по 75 октетов (RFC 5545)"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        out.write(line)
+        out.write('\r\n')
+        return
+
+    start = 0
+    limit = 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Не разрезаем многобайтовый символ UTF-8
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        if start:
+            out.write(' ')
+        out.write(data[start:end].decode('utf-8'))
+        out.write('\r\n')
+        start = end
+        limit = 74
+
+
+def _ics_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}{minutes % 60:02d}00"
+
+
+def write_ics(items, out, week_start: date = None):
+    """Пишет занятия как еженедельно повторяющиеся VEVENT"""
+    if week_start is None:
+        today = date.today()
+        week_start = today - timedelta(days=today.weekday())
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+    _ics_line(out, 'BEGIN:VCALENDAR')
+    _ics_line(out, 'VERSION:2.0')
+    _ics_line(out, 'PRODID:-//schedule-system//pyschedule//RU')
+    _ics_line(out, 'CALSCALE:GREGORIAN')
+    for item in items:
+        first_date = (week_start + timedelta(days=item.day)).strftime('%Y%m%d')
+
+        _ics_line(out, 'BEGIN:VEVENT')
+        _ics_line(out, f"UID:schedule-{item.id}@schedule-system")
+        _ics_line(out, f"DTSTAMP:{stamp}")
+        _ics_line(out, f"DTSTART:{first_date}T{_ics_time(item.start)}")
+        _ics_line(out, f"DTEND:{first_date}T{_ics_time(item.end)}")
+        _ics_line(out, f"RRULE:FREQ=WEEKLY;BYDAY={ICS_DAYS[item.day_of_week]}")
+        _ics_line(out, f"SUMMARY:{_ics_escape(item.subject)}")
+        if item.description:
+            _ics_line(out, f"DESCRIPTION:{_ics_escape(item.description)}")
+        _ics_line(out, 'END:VEVENT')
+    _ics_line(out, 'END:VCALENDAR')
+
+
+def write_csv(items, out):
+    """Пишет занятия в CSV построчно"""
+    writer = csv.writer(out)
+    writer.writerow(CSV_FIELDS)
+    for item in items:
+        writer.writerow([getattr(item, field) for field in CSV_FIELDS])
+
+
+def write_json(items, out):
+    """Пишет JSON-массив занятий по одному элементу, не собирая его целиком"""
+    out.write('[')
+    for i, item in enumerate(items):
+        if i:
+            out.write(',\n')
+        json.dump({field: getattr(item, field) for field in CSV_FIELDS}, out, ensure_ascii=False)
+    out.write(']\n')
+
+
+EXPORT_FORMATS = {
+    'ics': write_ics,
+    'csv': write_csv,
+    'json': write_json,
+}
+
+
+def export_items(items, fmt: str, buffer=None):
+    """Экспортирует занятия в бинарный буфер (по умолчанию io.BytesIO)
+
+    Занятия упорядочиваются по дням недели и времени. Возвращает буфер,
+    спозиционированный на начало (если он поддерживает seek).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if buffer is None:
+        buffer = io.BytesIO()
+
+    out = io.TextIOWrapper(buffer, encoding='utf-8', newline='', write_through=True)
+    try:
+        EXPORT_FORMATS[fmt](iter_week(build_week_index(items)), out)
+        out.flush()
+    finally:
+        out.detach()
+    if buffer.seekable():
+        buffer.seek(0)
+    return buffer
+
+
+def export_user(client, telegram_id: int, fmt: str, buffer=None):
+    """Экспортирует расписание пользователя через ScheduleAPIClient
+
+    Возвращает {"success", "data" (буфер), "error"} как и методы клиента.
+    """
+    user_data = client.get_user_by_telegram_id(telegram_id)
+    if not user_data.get("success"):
+        return user_data
+
+    schedule_data = client.get_user_schedule(user_data["data"].id)
+    if not schedule_data.get("success"):
+        return schedule_data
+
+    items = schedule_data.get("data", {}).get("items", [])
+    return {"success": True, "data": export_items(items, fmt, buffer)}
+
+
+def export_all(client, fmt: str, output_dir: str):
+    """Выгружает расписания всех пользователей
+
+    Один постраничный обход таблицы в порядке (user_id, id)
+    (iter_schedule_items(by_user=True)): занятия пользователя идут подряд,
+    и смена user_id начинает новый файл. В памяти одновременно страница и
+    неделя одного пользователя, поэтому размер таблицы не важен. Файлы
+    называются schedule_<user_id>.<fmt>, пользователи без занятий в обход
+    не попадают. Возвращает число файлов.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    count = 0
+    for user_id, items in groupby(client.iter_schedule_items(by_user=True), key=lambda item: item.user_id):
+        path = os.path.join(output_dir, f"schedule_{user_id}.{fmt}")
+        with open(path, 'wb') as f:
+            export_items(list(items), fmt, f)
+        count += 1
+    return count
+
+
+def main(argv=None):
+    from api_client import ScheduleAPIClient
+    from config import API_URL
+
+    parser = argparse.ArgumentParser(description="Экспорт расписания в iCalendar/CSV/JSON")
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ics')
+    parser.add_argument('--base-url', default=API_URL)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--telegram-id', type=int, help="экспорт одного пользователя")
+    target.add_argument('--all', action='store_true', help="экспорт всех пользователей (бэкап)")
+    parser.add_argument('--output', help="файл (или каталог для --all); по умолчанию stdout")
+    args = parser.parse_args(argv)
+
+    client = ScheduleAPIClient(args.base_url)
+
+    if args.all:
+        count = export_all(client, args.format, args.output or 'export')
+        print(f"Экспортировано пользователей: {count}")
+        return 0
+
+    if args.output:
+        with open(args.output, 'wb') as f:
+            result = export_user(client, args.telegram_id, args.format, f)
+    else:
+        result = export_user(client, args.telegram_id, args.format, sys.stdout.buffer)
+
+    if not result.get("success"):
+        print(f"Ошибка: {result.get('error')}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import itertools
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+from models import DAYS_ORDER, format_time, parse_time
+
+# Поля занятия, которые можно запросить через fields= (как scheduleFields в Go)
+SCHEDULE_FIELDS = {"id", "user_id", "day_of_week", "time_start", "time_end", "subject", "description",
+                   "created_at", "updated_at", "version"}
+
+FAKE_BACKEND = web.AppKey("fake_backend", object)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeBackend:
+    """Go backend в памяти процесса: те же маршруты и форматы ответов
+
+    Нужен бенчмаркам и нагрузочным прогонам, где важно измерить бота и
+    клиент без сети и SQLite. Поддерживает проверку пересечений
+    (allow_overlap), пакетные операции, постраничную выдачу и ленту изменений.
+    """
+
+    def __init__(self):
+        self.users = {}  # telegram_id -> user
+        self.items = {}  # id -> item
+        self.tombstones = []
+        self._user_ids = itertools.count(1)
+        self._item_ids = itertools.count(1)
+        self._version = 0
+
+    def _next_version(self) -> int:
+        self._version += 1
+        return self._version
+
+    def _normalize(self, data: dict) -> dict:
+        day = data.get("day_of_week")
+        if day not in DAYS_ORDER:
+            raise ValueError(f"invalid day_of_week: {day}")
+        start, end = parse_time(data["time_start"]), parse_time(data["time_end"])
+        if end <= start:
+            raise ValueError("time_end must be after time_start")
+        data["time_start"], data["time_end"] = format_time(start), format_time(end)
+        return data
+
+    def _overlaps(self, item: dict, exclude=()) -> list:
+        start, end = parse_time(item["time_start"]), parse_time(item["time_end"])
+        return sorted((other for other in self.items.values()
+                       if other["user_id"] == item["user_id"] and other["day_of_week"] == item["day_of_week"]
+                       and other["id"] != item.get("id") and other["id"] not in exclude
+                       and parse_time(other["time_start"]) < end and parse_time(other["time_end"]) > start),
+                      key=lambda other: parse_time(other["time_start"]))
+
+    def _save(self, item: dict) -> dict:
+        item["updated_at"] = _now()
+        item["version"] = self._next_version()
+        self.items[item["id"]] = item
+        return item
+
+    def _new_item(self, data: dict) -> dict:
+        item = {"user_id": data.get("user_id"), "subject": "", "description": "",
+                **{key: value for key, value in data.items() if key in SCHEDULE_FIELDS}}
+        return self._normalize({**item, "id": next(self._item_ids), "created_at": _now()})
+
+    def _delete(self, ids) -> int:
+        deleted = 0
+        for schedule_id in ids:
+            item = self.items.pop(schedule_id, None)
+            if item is not None:
+                self.tombstones.append({"id": schedule_id, "user_id": item["user_id"],
+                                        "version": self._next_version(), "deleted_at": _now()})
+                deleted += 1
+        return deleted
+
+    # Пользователи
+
+    async def create_user(self, request):
+        data = await request.json()
+        user = self.users.get(data["telegram_id"])
+        if user is not None:
+            return web.json_response({"user": user, "message": "User already exists"})
+        user = {"id": next(self._user_ids), "telegram_id": data["telegram_id"],
+                "username": data.get("username") or "", "first_name": data.get("first_name") or "",
+                "created_at": _now()}
+        self.users[user["telegram_id"]] = user
+        return web.json_response({"user": user, "message": "User created successfully"}, status=201)
+
+    async def list_users(self, request):
+        return web.json_response({"users": sorted(self.users.values(), key=lambda user: user["id"])})
+
+    async def get_user(self, request):
+        user = self.users.get(int(request.match_info["telegram_id"]))
+        if user is None:
+            return web.json_response({"error": "User not found"}, status=404)
+        return web.json_response({"user": user})
+
+    # Занятия
+
+    async def create_item(self, request):
+        try:
+            item = self._new_item(await request.json())
+        except (KeyError, ValueError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+        if request.query.get("allow_overlap") not in ("1", "true"):
+            conflicts = self._overlaps(item)
+            if conflicts:
+                return web.json_response({"error": "schedule item overlaps existing items",
+                                          "conflicts": conflicts}, status=409)
+        return web.json_response({"item": self._save(item), "message": "Schedule item created"}, status=201)
+
+    async def get_schedule(self, request):
+        items = self.items.values()
+        if "user_id" in request.query:
+            user_id = int(request.query["user_id"])
+            items = [item for item in items if item["user_id"] == user_id]
+        if "day" in request.query:
+            items = [item for item in items if item["day_of_week"] == request.query["day"]]
+
+        fields = None
+        if request.query.get("fields"):
+            fields = {"id", *filter(None, request.query["fields"].split(","))}
+            unknown = fields - SCHEDULE_FIELDS
+            if unknown:
+                return web.json_response({"error": f"unknown field: {unknown.pop()}"}, status=400)
+
+        def project(item):
+            return item if fields is None else {key: item[key] for key in fields}
+
+        if "limit" not in request.query:
+            items = sorted(items, key=lambda item: parse_time(item["time_start"]))
+            return web.json_response({"items": [project(item) for item in items]})
+
+        limit, after_id = int(request.query["limit"]), int(request.query.get("after_id", 0))
+        if request.query.get("order") == "user":
+            after = (int(request.query.get("after_user_id", 0)), after_id)
+            page = sorted((item for item in items if (item["user_id"], item["id"]) > after),
+                          key=lambda item: (item["user_id"], item["id"]))
+        else:
+            page = sorted((item for item in items if item["id"] > after_id), key=lambda item: item["id"])
+        has_more = len(page) > limit
+        page = page[:limit]
+        result = {"items": [project(item) for item in page], "has_more": has_more,
+                  "next_after_id": page[-1]["id"] if page else 0}
+        if request.query.get("order") == "user":
+            result["next_after_user_id"] = page[-1]["user_id"] if page else 0
+        return web.json_response(result)
+
+    async def get_item(self, request):
+        item = self.items.get(int(request.match_info["id"]))
+        if item is None:
+            return web.json_response({"success": False, "error": "Schedule item not found"}, status=404)
+        return web.json_response({"success": True, "item": item})
+
+    async def update_item(self, request):
+        schedule_id = int(request.match_info["id"])
+        if schedule_id not in self.items:
+            return web.json_response({"error": "Item not found"}, status=404)
+        try:
+            item = self._normalize({**self.items[schedule_id], **await request.json(), "id": schedule_id})
+        except (KeyError, ValueError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+        if request.query.get("allow_overlap") not in ("1", "true"):
+            conflicts = self._overlaps(item)
+            if conflicts:
+                return web.json_response({"error": "schedule item overlaps existing items",
+                                          "conflicts": conflicts}, status=409)
+        return web.json_response({"item": self._save(item), "message": "Schedule item updated"})
+
+    async def delete_item(self, request):
+        self._delete([int(request.match_info["id"])])
+        return web.json_response({"message": "Schedule item deleted"})
+
+    async def batch_create(self, request):
+        try:
+            items = [self._new_item(data) for data in (await request.json())["items"]]
+        except (KeyError, ValueError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+        if request.query.get("allow_overlap") not in ("1", "true"):
+            for i, item in enumerate(items):
+                if self._overlaps(item) or any(item["user_id"] == other["user_id"]
+                                               and item["day_of_week"] == other["day_of_week"]
+                                               and item["time_start"] < other["time_end"]
+                                               and other["time_start"] < item["time_end"]
+                                               for other in items[:i]):
+                    return web.json_response({"error": f"items[{i}]: schedule item overlaps existing items"},
+                                             status=409)
+        return web.json_response({"items": [self._save(item) for item in items],
+                                  "message": "Schedule items created"}, status=201)
+
+    async def batch_update(self, request):
+        # Как в Go: сначала все изменения, потом проверка пересечений итогового набора
+        updated = {}
+        for i, fields in enumerate((await request.json())["items"]):
+            item = updated.get(fields.get("id")) or self.items.get(fields.get("id"))
+            if item is None:
+                return web.json_response({"error": f"items[{i}]: item not found"}, status=404)
+            try:
+                patch = {key: value for key, value in fields.items() if key in SCHEDULE_FIELDS and key != "id"}
+                updated[item["id"]] = self._normalize({**item, **patch})
+            except (KeyError, ValueError) as e:
+                return web.json_response({"error": f"items[{i}]: {e}"}, status=400)
+        items = list(updated.values())
+        if request.query.get("allow_overlap") not in ("1", "true"):
+            for i, item in enumerate(items):
+                if self._overlaps(item, exclude=updated) or any(item["user_id"] == other["user_id"]
+                                                                and item["day_of_week"] == other["day_of_week"]
+                                                                and item["time_start"] < other["time_end"]
+                                                                and other["time_start"] < item["time_end"]
+                                                                for other in items[:i]):
+                    return web.json_response({"error": f"items[{i}]: schedule item overlaps existing items"},
+                                             status=409)
+        return web.json_response({"items": [self._save(item) for item in items],
+                                  "message": "Schedule items updated"})
+
+    async def batch_delete(self, request):
+        deleted = self._delete((await request.json())["ids"])
+        return web.json_response({"deleted": deleted, "message": "Schedule items deleted"})
+
+    async def changes(self, request):
+        since = int(request.query.get("since", 0))
+        limit = int(request.query.get("limit", 500))
+        feed = sorted([(item["version"], "items", item) for item in self.items.values() if item["version"] > since] +
+                      [(tombstone["version"], "deleted", tombstone) for tombstone in self.tombstones
+                       if tombstone["version"] > since], key=lambda change: change[0])
+        page = {"items": [], "deleted": [], "cursor": since, "has_more": len(feed) > limit, "head": self._version}
+        for version, kind, change in feed[:limit]:
+            page[kind].append(change)
+            page["cursor"] = version
+        return web.json_response(page)
+
+    async def health(self, request):
+        return web.json_response({"status": "OK", "service": "fake-backend"})
+
+
+def create_fake_backend_app(backend: FakeBackend = None) -> web.Application:
+    """aiohttp-приложение с маршрутами go-backend/cmd/server/main.go"""
+    backend = backend if backend is not None else FakeBackend()
+    app = web.Application()
+    app[FAKE_BACKEND] = backend
+    app.router.add_get("/health", backend.health)
+    app.router.add_post("/api/users", backend.create_user)
+    app.router.add_get("/api/users", backend.list_users)
+    app.router.add_get("/api/users/{telegram_id}", backend.get_user)
+    app.router.add_post("/api/schedule", backend.create_item)
+    app.router.add_post("/api/schedule/batch", backend.batch_create)
+    app.router.add_put("/api/schedule/batch", backend.batch_update)
+    app.router.add_delete("/api/schedule/batch", backend.batch_delete)
+    app.router.add_get("/api/schedule", backend.get_schedule)
+    app.router.add_get("/api/schedule/changes", backend.changes)
+    app.router.add_get("/api/schedule/{id}", backend.get_item)
+    app.router.add_put("/api/schedule/{id}", backend.update_item)
+    app.router.add_delete("/api/schedule/{id}", backend.delete_item)
+    return app
+
+
+async def start_fake_backend(host: str = "127.0.0.1", port: int = 0):
+    """Запускает FakeBackend на свободном порту; возвращает (runner, base_url)"""
+    runner = web.AppRunner(create_fake_backend_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from api_client import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class FSMRecordStore(ABC):
+    """Хранилище записей FSM: ключ -> (state, data, updated_at)
+
+    Хватает четырех операций, поэтому интерфейс без труда реализуется поверх
+    Redis (HSET + EXPIRE) или другой key-value базы.
+    """
+
+    @abstractmethod
+    async def load(self, key: str):
+        """(state, data, updated_at) или None"""
+
+    @abstractmethod
+    async def save_many(self, records: list):
+        """Сохраняет [(key, state, data, updated_at)]; запись без state и data удаляется"""
+
+    @abstractmethod
+    async def purge(self, older_than: float) -> int:
+        """Удаляет записи, не менявшиеся с older_than; возвращает их число"""
+
+    async def state_counts(self, newer_than: float, exclude=()) -> dict:
+        """{state: число записей}, менявшихся после newer_than, кроме ключей exclude (для метрик)"""
+        return {}
+
+    async def close(self):
+        pass
+
+
+class MemoryRecordStore(FSMRecordStore):
+    """Хранилище в словаре процесса - замена Redis для тестов"""
+
+    def __init__(self):
+        self.records = {}
+
+    async def load(self, key: str):
+        return self.records.get(key)
+
+    async def save_many(self, records: list):
+        for key, state, data, updated_at in records:
+            if state is None and not data:
+                self.records.pop(key, None)
+            else:
+                self.records[key] = (state, dict(data), updated_at)
+
+    async def purge(self, older_than: float) -> int:
+        expired = [key for key, record in self.records.items() if record[2] < older_than]
+        for key in expired:
+            del self.records[key]
+        return len(expired)
+
+    async def state_counts(self, newer_than: float, exclude=()) -> dict:
+        return dict(Counter(state for key, (state, _, updated_at) in self.records.items()
+                            if state is not None and updated_at >= newer_than and key not in exclude))
+
+
+class SQLiteRecordStore(FSMRecordStore):
+    """Записи FSM в файле SQLite (WAL - файл могут делить несколько процессов-воркеров)"""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fsm ("
+            "key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fsm_updated_at ON fsm (updated_at)")
+        self._conn.commit()
+
+    def _load(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT state, data, updated_at FROM fsm WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def _save_many(self, records: list):
+        upserts = []
+        deletes = []
+        for key, state, data, updated_at in records:
+            if state is None and not data:
+                deletes.append((key,))
+            else:
+                upserts.append((key, state, json.dumps(data, ensure_ascii=False), updated_at))
+        with self._lock, self._conn:
+            if upserts:
+                self._conn.executemany(
+                    "INSERT INTO fsm (key, state, data, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data, "
+                    "updated_at = excluded.updated_at",
+                    upserts
+                )
+            if deletes:
+                self._conn.executemany("DELETE FROM fsm WHERE key = ?", deletes)
+
+    def _purge(self, older_than: float) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM fsm WHERE updated_at < ?", (older_than,)).rowcount
+
+    def _state_counts(self, newer_than: float, exclude) -> dict:
+        exclude = list(exclude)
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT state, COUNT(*) FROM fsm WHERE state IS NOT NULL AND updated_at >= ? "
+                f"AND key NOT IN ({', '.join('?' * len(exclude))}) GROUP BY state",
+                (newer_than, *exclude)
+            ).fetchall())
+
+    async def load(self, key: str):
+        return await asyncio.to_thread(self._load, key)
+
+    async def save_many(self, records: list):
+        await asyncio.to_thread(self._save_many, records)
+
+    async def purge(self, older_than: float) -> int:
+        return await asyncio.to_thread(self._purge, older_than)
+
+    async def state_counts(self, newer_than: float, exclude=()) -> dict:
+        return await asyncio.to_thread(self._state_counts, newer_than, exclude)
+
+    async def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class PersistentStorage(BaseStorage):
+    """FSM-хранилище aiogram поверх FSMRecordStore
+
+    Изменения накапливаются и сбрасываются одной пачкой раз в flush_interval
+    секунд (или сразу при max_pending изменениях). Найденные записи держатся
+    в ограниченном LRU-кэше не дольше cache_ttl секунд: хранилище общее для
+    процессов и хостов, и чужие изменения должны быть видны почти сразу.
+    Отсутствие записи не кэшируется. Диалоги, не менявшиеся дольше ttl
+    секунд, считаются брошенными: они не читаются и периодически удаляются.
+    """
+
+    def __init__(self, store: FSMRecordStore, ttl: float = 86400, flush_interval: float = 1.0,
+                 max_pending: int = 500, cache_size: int = 10000, cache_ttl: float = 1.0,
+                 purge_interval: float = 300, clock=time.time):
+        self.store = store
+        self._ttl = ttl
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._purge_interval = purge_interval
+        self._clock = clock
+        self._key_builder = DefaultKeyBuilder(with_bot_id=True, with_business_connection_id=True,
+                                              with_destiny=True)
+        self._pending = {}
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl, clock=clock)
+        self._flush_task = None
+        self._last_purge = clock()
+
+    def _key(self, key) -> str:
+        return self._key_builder.build(key)
+
+    async def _load(self, key: str):
+        record = self._pending.get(key)
+        if record is None:
+            record = self._cache.get(key)
+        if record is None:
+            record = await self.store.load(key)
+            if record is None:
+                return None, {}
+            self._cache.set(key, record)
+        if record[2] + self._ttl < self._clock():
+            return None, {}
+        return record[0], record[1]
+
+    async def _write(self, key: str, state, data: dict):
+        record = (state, data, self._clock())
+        self._pending[key] = record
+        self._cache.set(key, record)
+        if len(self._pending) >= self._max_pending:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self._flush_interval)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("FSM storage flush failed: %s", e)
+
+    async def flush(self):
+        """Сбрасывает накопленные изменения в хранилище и чистит брошенные диалоги"""
+        if self._pending:
+            batch = [(key, *record) for key, record in self._pending.items()]
+            self._pending = {}
+            try:
+                await self.store.save_many(batch)
+            except BaseException:
+                # Возвращаем несохраненное, не затирая более свежие изменения
+                for key, *record in batch:
+                    self._pending.setdefault(key, tuple(record))
+                raise
+
+        now = self._clock()
+        if now - self._last_purge >= self._purge_interval:
+            self._last_purge = now
+            purged = await self.store.purge(now - self._ttl)
+            if purged:
+                logger.info("Purged %s abandoned FSM dialogs", purged)
+
+    async def state_counts(self) -> dict:
+        """Число живых диалогов по состояниям (с учетом еще не сброшенных изменений)
+
+        Не сбрасывает буфер: частота опроса метрик не должна влиять на частоту
+        записи. Ключи из буфера считаются по нему, остальные - по хранилищу.
+        """
+        newer_than = self._clock() - self._ttl
+        pending = dict(self._pending)
+        counts = Counter(await self.store.state_counts(newer_than, exclude=pending.keys()))
+        counts.update(state for state, _, updated_at in pending.values()
+                      if state is not None and updated_at >= newer_than)
+        return dict(counts)
+
+    async def set_state(self, key, state=None):
+        storage_key = self._key(key)
+        _, data = await self._load(storage_key)
+        await self._write(storage_key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key):
+        state, _ = await self._load(self._key(key))
+        return state
+
+    async def set_data(self, key, data):
+        storage_key = self._key(key)
+        state, _ = await self._load(storage_key)
+        await self._write(storage_key, state, dict(data))
+
+    async def get_data(self, key):
+        _, data = await self._load(self._key(key))
+        return dict(data)
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        try:
+            await self.flush()
+        finally:
+            await self.store.close()
+
+
+def create_storage(kind: str = 'memory', path: str = 'fsm.sqlite3', **kwargs) -> BaseStorage:
+    """FSM-хранилище по имени из конфига: 'memory' (по умолчанию aiogram) или 'sqlite'"""
+    if kind == 'memory':
+        return MemoryStorage()
+    if kind == 'sqlite':
+        return PersistentStorage(SQLiteRecordStore(path), **kwargs)
+    raise ValueError(f"Unknown FSM storage: {kind}")
+
+
+def storage_from_config() -> BaseStorage:
+    """create_storage с параметрами FSM_* из config.py"""
+    from config import (
+        FSM_STORAGE, FSM_STORAGE_PATH, FSM_TTL, FSM_FLUSH_INTERVAL, FSM_CACHE_SIZE, FSM_CACHE_TTL
+    )
+
+    if FSM_STORAGE == 'memory':
+        return create_storage(FSM_STORAGE)
+    return create_storage(FSM_STORAGE, FSM_STORAGE_PATH, ttl=FSM_TTL, flush_interval=FSM_FLUSH_INTERVAL,
+                          cache_size=FSM_CACHE_SIZE, cache_ttl=FSM_CACHE_TTL)
@@ -1,19 +1,65 @@
 from aiogram import F, Router
 from aiogram.filters import CommandStart, Command
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, BufferedInputFile
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+import io
 import logging
+import re
 
-from api_client import ScheduleAPIClient
+from api_client import AsyncScheduleAPIClient, ScheduleCache, TTLCache
+from config import (
+    API_URL, API_TIMEOUT, API_POOL_LIMIT, API_POOL_LIMIT_PER_HOST, API_KEEPALIVE_TIMEOUT,
+    USER_CACHE_SIZE, USER_CACHE_TTL, SCHEDULE_CACHE_SIZE, SCHEDULE_CACHE_TTL, SCHEDULE_BATCH_RENDER,
+    IMPORT_MAX_FILE_SIZE, IMPORT_MAX_ITEMS, FREE_TIME_DAY_START, FREE_TIME_DAY_END,
+    THROTTLE_RATE, THROTTLE_BURST, THROTTLE_MAX_USERS, THROTTLE_NOTICE_INTERVAL
+)
+from rendering import DAY_NAMES_RU, render_day_page, render_week_page
+from schedule_index import build_week_index, iter_week
+from export import EXPORT_FORMATS, export_items
+from importer import DAY_ALIASES, IMPORT_FORMATS, TIME_PATTERN, import_items
+from intervals import DaySchedule, find_free_slots
+from metrics import HandlerMetricsMiddleware, instrument_async_client
+from models import DAYS_ORDER, format_time, parse_day, parse_time
+from throttling import ThrottlingMiddleware
+from tracing import HandlerSpanMiddleware, UpdateTracingMiddleware, trace_async_client, tracer_from_config
 import keyboards as kb
 
 router = Router()
-api_client = ScheduleAPIClient()
+api_client = AsyncScheduleAPIClient(
+    API_URL,
+    timeout=API_TIMEOUT,
+    limit=API_POOL_LIMIT,
+    limit_per_host=API_POOL_LIMIT_PER_HOST,
+    keepalive_timeout=API_KEEPALIVE_TIMEOUT,
+    user_cache=TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL),
+    schedule_cache=ScheduleCache(maxsize=SCHEDULE_CACHE_SIZE, ttl=SCHEDULE_CACHE_TTL)
+)
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
+# Выборочная трассировка апдейтов (TRACE_SAMPLE_RATE); trace передается в Go API заголовками
+tracer = tracer_from_config()
+if tracer is not None:
+    update_tracing = UpdateTracingMiddleware(tracer)
+    router.message.outer_middleware(update_tracing)
+    router.callback_query.outer_middleware(update_tracing)
+    router.message.middleware(HandlerSpanMiddleware())
+    router.callback_query.middleware(HandlerSpanMiddleware())
+    trace_async_client(api_client)
+
+# Повторные нажатия и всплески запросов не доходят до хендлеров и Go API
+throttling = ThrottlingMiddleware(rate=THROTTLE_RATE, burst=THROTTLE_BURST, max_users=THROTTLE_MAX_USERS,
+                                  notice_interval=THROTTLE_NOTICE_INTERVAL)
+router.message.outer_middleware(throttling)
+router.callback_query.outer_middleware(throttling)
+
+# Время и ошибки хендлеров, запросы к Go API - для /metrics (METRICS_PORT)
+handler_metrics = HandlerMetricsMiddleware()
+router.message.middleware(handler_metrics)
+router.callback_query.middleware(handler_metrics)
+instrument_async_client(api_client)
+
+# Логирование настраивает точка входа (log_config.setup_logging_from_config)
 logger = logging.getLogger(__name__)
 
 def get_schedule_actions_keyboard(schedule_id: int):
@@ -31,6 +77,7 @@ class ScheduleForm(StatesGroup):
     time_end = State()
     subject = State()
     description = State()
+    confirm_conflict = State()
 
 # Состояния для редактирования (без дня недели)
 class EditScheduleForm(StatesGroup):
@@ -44,19 +91,22 @@ class DeleteScheduleForm(StatesGroup):
     choosing_schedule = State()
     confirmation = State()
 
+class FreeTimeForm(StatesGroup):
+    query = State()
+
 # старт
 @router.message(CommandStart())
 async def cmd_start(message: Message):
-    logger.info(f"User {message.from_user.id} started bot")
+    logger.info("User %s started bot", message.from_user.id)
     
     # Регистрируем пользователя в API
-    user_data = api_client.get_or_create_user(
+    user_data = await api_client.get_or_create_user(
         telegram_id=message.from_user.id,
         username=message.from_user.username,
         first_name=message.from_user.first_name
     )
     
-    logger.info(f"User data response: {user_data}")
+    logger.debug("User data response: %s", user_data)
     
     if user_data.get("success"):
         await message.answer(
@@ -82,8 +132,10 @@ async def cmd_help(message: Message):
         '/update - Редактировать занятие\n' 
         '/delete - Удалить занятие\n' 
         '/schedule - Показать расписание\n'
+        '/free - Найти свободное время\n'
         '/help - Помощь\n\n'
-        '⏰ **Формат времени:** HH:MM (например, 14:30)'
+        '⏰ **Формат времени:** HH:MM (например, 14:30)\n\n'
+        '📥 **Импорт:** отправьте файл .csv или .ics с расписанием'
     )
 
 @router.message(F.text == 'Помощь и список команд')
@@ -127,14 +179,19 @@ async def process_day(message: Message, state: FSMContext):
     )
     await state.set_state(ScheduleForm.time_start)
 
-@router.message(ScheduleForm.time_start, F.text.regexp(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$'))
+@router.message(ScheduleForm.time_start, F.text.regexp(TIME_PATTERN))
 async def process_time_start(message: Message, state: FSMContext):
     await state.update_data(time_start=message.text)
     await message.answer("⏰ Введите время окончания (формат HH:MM):")
     await state.set_state(ScheduleForm.time_end)
 
-@router.message(ScheduleForm.time_end, F.text.regexp(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$'))
+@router.message(ScheduleForm.time_end, F.text.regexp(TIME_PATTERN))
 async def process_time_end(message: Message, state: FSMContext):
+    user_data = await state.get_data()
+    if parse_time(message.text) <= parse_time(user_data['time_start']):
+        await message.answer("❌ Время окончания должно быть позже времени начала")
+        return
+    
     await state.update_data(time_end=message.text)
     await message.answer("📚 Введите название предмета:")
     await state.set_state(ScheduleForm.subject)
@@ -151,8 +208,8 @@ async def process_description(message: Message, state: FSMContext):
     description = message.text if message.text != '-' else ''
     
     # Получаем пользователя с логированием
-    user_info = api_client.get_user_by_telegram_id(message.from_user.id)
-    logger.info(f"User info response: {user_info}")
+    user_info = await api_client.get_user_by_telegram_id(message.from_user.id)
+    logger.debug("User info response: %s", user_info)
     
     if not user_info.get("success"):
         await message.answer("❌ Ошибка: пользователь не найден", reply_markup=kb.main)
@@ -160,29 +217,73 @@ async def process_description(message: Message, state: FSMContext):
         return
     
     # Безопасный доступ к данных пользователя
-    user_data_response = user_info.get("data", {})
-    user_id = user_data_response.get("id")
+    user_data_response = user_info.get("data")
+    user_id = user_data_response.id if user_data_response else None
     
     if not user_id:
-        logger.error(f"No user_id in response: {user_data_response}")
+        logger.error("No user_id in response: %s", user_data_response)
         await message.answer("❌ Ошибка: не удалось получить ID пользователя", reply_markup=kb.main)
         await state.clear()
         return
     
-    logger.info(f"Creating schedule for user_id: {user_id}")
-    logger.info(f"Schedule data: {user_data}")
+    # Предупреждаем о пересечении до создания
+    conflicts = await find_conflicts(
+        user_id, user_data['day'], parse_time(user_data['time_start']), parse_time(user_data['time_end'])
+    )
+    if conflicts:
+        await state.update_data(description=description, user_id=user_id)
+        
+        builder = InlineKeyboardBuilder()
+        builder.button(text="✅ Все равно добавить", callback_data="confirm_create")
+        builder.button(text="❌ Отмена", callback_data="cancel_create")
+        builder.adjust(2)
+        
+        await message.answer(format_conflicts(conflicts) + "\nДобавить занятие?", reply_markup=builder.as_markup())
+        await state.set_state(ScheduleForm.confirm_conflict)
+        return
+    
+    await save_new_schedule(message, state, user_id, user_data, description)
+
+# Подтверждение создания занятия с пересечением
+@router.callback_query(ScheduleForm.confirm_conflict, F.data == "confirm_create")
+async def confirm_create_schedule(callback: CallbackQuery, state: FSMContext):
+    user_data = await state.get_data()
+    await save_new_schedule(
+        callback.message, state, user_data['user_id'], user_data, user_data['description'], allow_overlap=True
+    )
+    await callback.answer()
+
+async def find_conflicts(user_id: int, day_of_week: str, start: int, end: int, ignore_id: int = None):
+    """Занятия пользователя в этот день, пересекающиеся с [start, end)"""
+    schedule_data = await api_client.get_user_schedule(user_id, day_of_week)
+    if not schedule_data.get("success"):
+        return []
+    return DaySchedule(schedule_data["data"]["items"]).conflicts(start, end, ignore_id)
+
+def format_conflicts(conflicts: list) -> str:
+    text = "⚠️ Пересечение с занятиями:\n"
+    for item in conflicts:
+        text += f"• {item.subject} ({item.time_start}-{item.time_end})\n"
+    return text
+
+async def save_new_schedule(message: Message, state: FSMContext, user_id: int, user_data: dict,
+                            description: str, allow_overlap: bool = False):
+    """Создает занятие из данных ScheduleForm и отвечает пользователю"""
+    logger.info("Creating schedule for user_id: %s", user_id)
+    logger.debug("Schedule data: %s", user_data)
     
     # Создаем занятие
-    result = api_client.create_schedule_item(
+    result = await api_client.create_schedule_item(
         user_id=user_id,
         day_of_week=user_data['day'],
         time_start=user_data['time_start'],
         time_end=user_data['time_end'],
         subject=user_data['subject'],
-        description=description
+        description=description,
+        allow_overlap=allow_overlap
     )
     
-    logger.info(f"Create schedule result: {result}")
+    logger.debug("Create schedule result: %s", result)
     
     if result.get("success"):
         # Получаем русское название дня для ответа
@@ -231,7 +332,7 @@ async def schedule_button(message: Message):
 # Обработка выбора дня недели для просмотра
 @router.message(F.text.in_(['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']))
 async def show_day_schedule(message: Message):
-    logger.info(f"User {message.from_user.id} requested schedule for: {message.text}")
+    logger.info("User %s requested schedule for: %s", message.from_user.id, message.text)
     
     day_mapping = {
         'Понедельник': 'monday',
@@ -246,18 +347,18 @@ async def show_day_schedule(message: Message):
     day_eng = day_mapping[message.text]
     
     # Получаем пользователя
-    user_data = api_client.get_user_by_telegram_id(message.from_user.id)
-    logger.info(f"User data for schedule: {user_data}")
+    user_data = await api_client.get_user_by_telegram_id(message.from_user.id)
+    logger.debug("User data for schedule: %s", user_data)
     
     if not user_data.get("success"):
         await message.answer("❌ Ошибка: пользователь не найден")
         return
     
-    user_id = user_data["data"]["id"]
+    user_id = user_data["data"].id
     
     # Получаем расписание
-    schedule_data = api_client.get_user_schedule(user_id, day_eng)
-    logger.info(f"Schedule data: {schedule_data}")
+    schedule_data = await api_client.get_user_schedule(user_id, day_eng)
+    logger.debug("Schedule data: %s", schedule_data)
     
     if not schedule_data.get("success"):
         error_msg = schedule_data.get('error', 'Неизвестная ошибка')
@@ -270,70 +371,123 @@ async def show_day_schedule(message: Message):
         await message.answer(f"📭 На {message.text} занятий нет")
         return
     
+    if SCHEDULE_BATCH_RENDER:
+        # Весь день одним сообщением с общей клавиатурой (с пагинацией)
+        text, markup, _ = render_day_page(message.text, day_eng, items)
+        await message.answer(text, reply_markup=markup)
+        return
+    
     # Отправляем заголовок дня
     await message.answer(f"📅 **{message.text}:**")
     
     # Отправляем каждое занятие отдельным сообщением с кнопками
     for i, item in enumerate(items, 1):
         # Форматируем одну запись
-        item_text = f"{i}. 🕒 {item['time_start']}-{item['time_end']}\n"
-        item_text += f"   📚 {item['subject']}\n"
-        if item.get('description'):
-            item_text += f"   📝 {item['description']}\n"
+        item_text = f"{i}. 🕒 {item.time_start}-{item.time_end}\n"
+        item_text += f"   📚 {item.subject}\n"
+        if item.description:
+            item_text += f"   📝 {item.description}\n"
         
         # Отправляем запись с кнопками действий
         await message.answer(
             item_text,
-            reply_markup=get_schedule_actions_keyboard(item['id'])
+            reply_markup=get_schedule_actions_keyboard(item.id)
         )
 
-# статистика
-@router.message(Command('statistics'))
-async def show_statistics(message: Message):
-    # Получаем user_id
-    user_data = api_client.get_user_by_telegram_id(message.from_user.id)
+# Листание страниц дня
+@router.callback_query(F.data.startswith("day_page_"))
+async def show_day_schedule_page(callback: CallbackQuery):
+    """Перерисовывает сообщение дня на выбранной странице"""
+    day_eng, page = callback.data.split("_")[2:4]
     
+    user_data = await api_client.get_user_by_telegram_id(callback.from_user.id)
     if not user_data.get("success"):
-        await message.answer("❌ Ошибка: пользователь не найден")
+        await callback.answer("❌ Ошибка: пользователь не найден")
         return
     
-    user_id = user_data["data"]["id"]
+    schedule_data = await api_client.get_user_schedule(user_data["data"].id, day_eng)
+    items = schedule_data.get("data", {}).get("items", [])
+    day_ru = DAY_NAMES_RU.get(day_eng, day_eng)
     
-    # Получаем все занятия пользователя
-    schedule_data = api_client.get_user_schedule(user_id)
+    if not items:
+        await callback.message.edit_text(f"📭 На {day_ru} занятий нет")
+    else:
+        text, markup, _ = render_day_page(day_ru, day_eng, items, int(page))
+        await callback.message.edit_text(text, reply_markup=markup)
+    await callback.answer()
+
+async def load_week_index(telegram_id: int):
+    """Загружает неделю пользователя одним запросом и строит индекс по дням
+
+    Возвращает (index, error); error - текст ошибки для пользователя или None.
+    """
+    user_data = await api_client.get_user_by_telegram_id(telegram_id)
+    if not user_data.get("success"):
+        return None, "❌ Ошибка: пользователь не найден"
     
+    schedule_data = await api_client.get_user_schedule(user_data["data"].id)
     if not schedule_data.get("success"):
-        await message.answer("❌ Ошибка при получении статистики")
+        error_msg = schedule_data.get('error', 'Неизвестная ошибка')
+        return None, f"❌ Ошибка при получении расписания: {error_msg}"
+    
+    return build_week_index(schedule_data.get("data", {}).get("items", [])), None
+
+# Просмотр всей недели
+@router.message(F.text == 'Неделя')
+async def show_week_schedule(message: Message):
+    logger.info("User %s requested week schedule", message.from_user.id)
+    
+    index, error = await load_week_index(message.from_user.id)
+    if error:
+        await message.answer(error)
         return
     
-    items = schedule_data.get("data", {}).get("items", [])
+    if not any(index.values()):
+        await message.answer("📭 На этой неделе занятий нет")
+        return
     
-    if not items:
-        await message.answer("📊 У вас пока нет занятий в расписании")
+    text, markup, _ = render_week_page(index)
+    await message.answer(text, reply_markup=markup)
+
+@router.callback_query(F.data.startswith("week_page_"))
+async def show_week_schedule_page(callback: CallbackQuery):
+    """Перерисовывает сообщение недели на выбранной странице"""
+    page = int(callback.data.split("_")[2])
+    
+    index, error = await load_week_index(callback.from_user.id)
+    if error:
+        await callback.answer(error)
+        return
+    
+    text, markup, _ = render_week_page(index, page)
+    await callback.message.edit_text(text, reply_markup=markup)
+    await callback.answer()
+
+# статистика
+@router.message(Command('statistics'))
+async def show_statistics(message: Message):
+    # Получаем все занятия пользователя, сгруппированные по дням
+    index, error = await load_week_index(message.from_user.id)
+    
+    if error:
+        await message.answer(error)
         return
     
     # Считаем статистику
-    total_items = len(items)
+    total_items = sum(len(day_items) for day_items in index.values())
     
-    # Группируем по дням
-    days_count = {}
-    for item in items:
-        day = item['day_of_week']
-        days_count[day] = days_count.get(day, 0) + 1
+    if not total_items:
+        await message.answer("📊 У вас пока нет занятий в расписании")
+        return
     
     # Форматируем статистику
     stats_text = "📊 **Ваша статистика:**\n\n"
     stats_text += f"📈 Всего занятий: {total_items}\n\n"
     
-    day_names = {
-        'monday': 'Понедельник', 'tuesday': 'Вторник', 'wednesday': 'Среда',
-        'thursday': 'Четверг', 'friday': 'Пятница', 'saturday': 'Суббота', 
-        'sunday': 'Воскресенье'
-    }
-    
-    for day_eng, count in days_count.items():
-        day_ru = day_names.get(day_eng, day_eng)
-        stats_text += f"• {day_ru}: {count} занятий\n"
+    for day_eng, day_items in index.items():
+        if day_items:
+            day_ru = DAY_NAMES_RU.get(day_eng, day_eng)
+            stats_text += f"• {day_ru}: {len(day_items)} занятий\n"
     
     await message.answer(stats_text)
 
@@ -341,10 +495,161 @@ async def show_statistics(message: Message):
 async def statistics_button(message: Message):
     await show_statistics(message)
 
+# поиск свободного времени
+def parse_free_time_query(text: str):
+    """'90', '1:30', '90 пн-пт', '45 ср' -> (длительность в минутах, индексы дней или None)"""
+    parts = text.strip().lower().split()
+    if not parts or len(parts) > 2:
+        raise ValueError(text)
+
+    duration = parse_time(parts[0]) if ':' in parts[0] else int(parts[0])
+    if duration <= 0:
+        raise ValueError(text)
+
+    days = None
+    if len(parts) == 2:
+        first, _, last = parts[1].partition('-')
+        lo = parse_day(DAY_ALIASES.get(first, first))
+        hi = parse_day(DAY_ALIASES.get(last, last)) if last else lo
+        if hi < lo:
+            raise ValueError(text)
+        days = range(lo, hi + 1)
+    return duration, days
+
+@router.message(Command('free'))
+@router.message(F.text == 'Найти свободное время')
+async def start_free_time(message: Message, state: FSMContext):
+    await message.answer(
+        "🕒 Введите длительность в минутах или HH:MM.\n"
+        "Можно указать дни: например, «90 пн-пт» или «45 ср»",
+        reply_markup=kb.cancel_kb
+    )
+    await state.set_state(FreeTimeForm.query)
+
+@router.message(FreeTimeForm.query, F.text)
+async def process_free_time(message: Message, state: FSMContext):
+    try:
+        duration, days = parse_free_time_query(message.text)
+    except ValueError:
+        await message.answer("❌ Не понял запрос. Пример: «90», «1:30» или «90 пн-пт»")
+        return
+
+    index, error = await load_week_index(message.from_user.id)
+    await state.clear()
+    if error:
+        await message.answer(error, reply_markup=kb.main)
+        return
+
+    slots = find_free_slots(
+        iter_week(index), duration, days,
+        day_start=parse_time(FREE_TIME_DAY_START), day_end=parse_time(FREE_TIME_DAY_END)
+    )
+
+    text = f"🕒 Свободное время от {duration} мин ({FREE_TIME_DAY_START}-{FREE_TIME_DAY_END}):\n\n"
+    for day, windows in slots.items():
+        day_ru = DAY_NAMES_RU[DAYS_ORDER[day]]
+        if windows:
+            text += f"📅 {day_ru}: " + ", ".join(f"{format_time(start)}-{format_time(end)}"
+                                                for start, end in windows) + "\n"
+        else:
+            text += f"📅 {day_ru}: нет окон\n"
+    await message.answer(text, reply_markup=kb.main)
+
 # экспорт
 @router.message(F.text == 'Экспорт расписания')
 async def export_schedule(message: Message):
-    await message.answer("📤 Функция экспорта скоро будет доступна!")
+    builder = InlineKeyboardBuilder()
+    builder.button(text="📅 iCalendar (.ics)", callback_data="export_ics")
+    builder.button(text="📊 CSV", callback_data="export_csv")
+    builder.button(text="🧾 JSON", callback_data="export_json")
+    builder.adjust(1)
+    
+    await message.answer("📤 Выберите формат экспорта:", reply_markup=builder.as_markup())
+
+@router.callback_query(F.data.startswith("export_"))
+async def export_schedule_file(callback: CallbackQuery):
+    """Формирует файл расписания и отправляет его документом"""
+    fmt = callback.data.split("_")[1]
+    if fmt not in EXPORT_FORMATS:
+        await callback.answer()
+        return
+    
+    index, error = await load_week_index(callback.from_user.id)
+    if error:
+        await callback.message.answer(error)
+        await callback.answer()
+        return
+    
+    items = list(iter_week(index))
+    if not items:
+        await callback.message.answer("📭 Расписание пустое, экспортировать нечего")
+        await callback.answer()
+        return
+    
+    buffer = export_items(items, fmt)
+    await callback.message.answer_document(
+        BufferedInputFile(buffer.getvalue(), filename=f"schedule.{fmt}"),
+        caption=f"📤 Ваше расписание ({len(items)} занятий)"
+    )
+    await callback.answer()
+
+# импорт
+@router.message(F.document)
+async def import_schedule(message: Message):
+    """Импорт расписания из загруженного CSV/iCalendar файла одной пачкой"""
+    document = message.document
+    fmt = (document.file_name or '').rsplit('.', 1)[-1].lower()
+    
+    if fmt not in IMPORT_FORMATS:
+        await message.answer("❌ Поддерживаются только файлы .csv и .ics", reply_markup=kb.main)
+        return
+    
+    if document.file_size and document.file_size > IMPORT_MAX_FILE_SIZE:
+        await message.answer("❌ Файл слишком большой", reply_markup=kb.main)
+        return
+    
+    user_data = await api_client.get_user_by_telegram_id(message.from_user.id)
+    if not user_data.get("success"):
+        await message.answer("❌ Сначала зарегистрируйтесь через /start", reply_markup=kb.main)
+        return
+    
+    # Пересечения проверяем заранее: одна пересекающаяся строка отклонила бы всю пачку
+    schedule_data = await api_client.get_user_schedule(user_data["data"].id)
+    if not schedule_data.get("success"):
+        error_msg = schedule_data.get('error', 'Неизвестная ошибка')
+        await message.answer(f"❌ Ошибка при получении расписания: {error_msg}", reply_markup=kb.main)
+        return
+    
+    buffer = await message.bot.download(document)
+    lines = io.TextIOWrapper(buffer, encoding='utf-8-sig', newline='')
+    try:
+        items, errors = import_items(lines, fmt, user_data["data"].id, IMPORT_MAX_ITEMS,
+                                     existing=schedule_data.get("data", {}).get("items", []))
+    except UnicodeDecodeError:
+        await message.answer("❌ Файл должен быть в кодировке UTF-8", reply_markup=kb.main)
+        return
+    
+    logger.info("User %s import: %s items, %s errors", message.from_user.id, len(items), len(errors))
+    
+    report = ""
+    if items:
+        result = await api_client.batch_create_schedule_items(items)
+        created = len(result.get("data", {}).get("items", []))
+        if result.get("success"):
+            report += f"✅ Импортировано занятий: {created}\n"
+        else:
+            report += f"❌ Ошибка при сохранении (сохранено {created} из {len(items)}): {result.get('error')}\n"
+    else:
+        report += "📭 В файле не найдено корректных занятий\n"
+    
+    if errors:
+        report += f"\n⚠️ Пропущено строк: {len(errors)}\n"
+        for row_number, error in errors[:10]:
+            report += f"• {row_number}: {error}\n"
+        if len(errors) > 10:
+            report += f"… и еще {len(errors) - 10}\n"
+    
+    await message.answer(report, reply_markup=kb.main)
 
 # Обработка неправильного ввода времени
 @router.message(ScheduleForm.time_start)
@@ -369,22 +674,23 @@ async def back_to_main_menu(message: Message):
 async def start_delete_schedule(message: Message, state: FSMContext):
     """Начинаем процесс удаления - показываем список занятий"""
     # Получаем пользователя
-    user_data = api_client.get_user_by_telegram_id(message.from_user.id)
+    user_data = await api_client.get_user_by_telegram_id(message.from_user.id)
     
     if not user_data.get("success"):
         await message.answer("❌ Сначала зарегистрируйтесь через /start", reply_markup=kb.main)
         return
     
-    user_id = user_data["data"]["id"]
+    user_id = user_data["data"].id
     
     # Получаем ВСЕ занятия пользователя (без фильтра по дню)
-    schedule_data = api_client.get_user_schedule(user_id)
+    schedule_data = await api_client.get_user_schedule(user_id)
     
     if not schedule_data.get("success") or not schedule_data.get("data", {}).get("items"):
         await message.answer("📭 У вас нет занятий для удаления", reply_markup=kb.main)
         return
     
-    items = schedule_data["data"]["items"]
+    # Занятия по дням недели и времени, как в просмотре недели
+    items = list(iter_week(build_week_index(schedule_data["data"]["items"])))
     
     # Формируем клавиатуру с занятиями
     builder = InlineKeyboardBuilder()
@@ -396,9 +702,9 @@ async def start_delete_schedule(message: Message, state: FSMContext):
     }
     
     for item in items:
-        day_ru = day_names.get(item['day_of_week'], item['day_of_week'])
-        button_text = f"{item['subject']} ({day_ru} {item['time_start']})"
-        builder.button(text=button_text, callback_data=f"select_delete_{item['id']}")
+        day_ru = day_names.get(item.day_of_week, item.day_of_week)
+        button_text = f"{item.subject} ({day_ru} {item.time_start})"
+        builder.button(text=button_text, callback_data=f"select_delete_{item.id}")
     
     builder.button(text="❌ Отмена", callback_data="cancel_delete")
     builder.adjust(1)
@@ -438,7 +744,7 @@ async def confirm_delete_schedule(callback: CallbackQuery, state: FSMContext):
     schedule_id = int(callback.data.split("_")[2])
     
     # Вызываем API для удаления
-    result = api_client.delete_schedule_item(schedule_id)
+    result = await api_client.delete_schedule_item(schedule_id)
     
     if result.get("success"):
         # Удаляем сообщение с кнопками
@@ -458,22 +764,23 @@ async def confirm_delete_schedule(callback: CallbackQuery, state: FSMContext):
 async def start_edit_schedule(message: Message, state: FSMContext):
     """Начинаем процесс редактирования - показываем список занятий"""
     # Получаем пользователя
-    user_data = api_client.get_user_by_telegram_id(message.from_user.id)
+    user_data = await api_client.get_user_by_telegram_id(message.from_user.id)
     
     if not user_data.get("success"):
         await message.answer("❌ Сначала зарегистрируйтесь через /start", reply_markup=kb.main)
         return
     
-    user_id = user_data["data"]["id"]
+    user_id = user_data["data"].id
     
     # Получаем ВСЕ занятия пользователя
-    schedule_data = api_client.get_user_schedule(user_id)
+    schedule_data = await api_client.get_user_schedule(user_id)
     
     if not schedule_data.get("success") or not schedule_data.get("data", {}).get("items"):
         await message.answer("📭 У вас нет занятий для редактирования", reply_markup=kb.main)
         return
     
-    items = schedule_data["data"]["items"]
+    # Занятия по дням недели и времени, как в просмотре недели
+    items = list(iter_week(build_week_index(schedule_data["data"]["items"])))
     
     # Формируем клавиатуру с занятиями
     builder = InlineKeyboardBuilder()
@@ -485,9 +792,9 @@ async def start_edit_schedule(message: Message, state: FSMContext):
     }
     
     for item in items:
-        day_ru = day_names.get(item['day_of_week'], item['day_of_week'])
-        button_text = f"{item['subject']} ({day_ru} {item['time_start']})"
-        builder.button(text=button_text, callback_data=f"select_edit_{item['id']}")
+        day_ru = day_names.get(item.day_of_week, item.day_of_week)
+        button_text = f"{item.subject} ({day_ru} {item.time_start})"
+        builder.button(text=button_text, callback_data=f"select_edit_{item.id}")
     
     builder.button(text="❌ Отмена", callback_data="cancel_edit")
     builder.adjust(1)
@@ -508,7 +815,7 @@ async def select_schedule_for_edit(callback: CallbackQuery, state: FSMContext):
     await state.update_data(schedule_id=schedule_id)
     
     # Получаем данные занятия для отображения
-    schedule_data = api_client.get_schedule_by_id(schedule_id)
+    schedule_data = await api_client.get_schedule_by_id(schedule_id)
     
     if not schedule_data.get("success"):
         await callback.message.answer("❌ Не удалось получить данные занятия", reply_markup=kb.main)
@@ -535,7 +842,8 @@ async def select_schedule_for_edit(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(F.data.startswith("edit_field_"))
 async def choose_field_to_edit(callback: CallbackQuery, state: FSMContext):
     """Пользователь выбрал поле - запрашиваем новое значение"""
-    field = callback.data.split("_")[2]
+    # time_start / time_end сами содержат "_", поэтому отрезаем только префикс
+    field = callback.data.removeprefix("edit_field_")
     
     # Сохраняем выбранное поле в состоянии
     await state.update_data(field_to_edit=field)
@@ -570,14 +878,25 @@ async def process_new_value(message: Message, state: FSMContext):
     new_value = message.text
     
     # Валидация только для времени (дня недели больше нет)
+    warning = ""
     if field in ['time_start', 'time_end']:
-        import re
-        if not re.match(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$', new_value):
+        if not re.match(TIME_PATTERN, new_value):
             await message.answer("❌ Неверный формат времени. Используйте HH:MM")
             return
+        
+        item = await find_user_item(message.from_user.id, schedule_id)
+        if item:
+            start = parse_time(new_value) if field == 'time_start' else item.start
+            end = parse_time(new_value) if field == 'time_end' else item.end
+            if end <= start:
+                await message.answer("❌ Время окончания должно быть позже времени начала")
+                return
+            conflicts = await find_conflicts(item.user_id, item.day_of_week, start, end, ignore_id=item.id)
+            if conflicts:
+                warning = "\n" + format_conflicts(conflicts)
     
     # Сохраняем новое значение
-    await state.update_data(new_value=new_value)
+    await state.update_data(new_value=new_value, overlap_confirmed=bool(warning))
     
     # Запрашиваем подтверждение
     builder = InlineKeyboardBuilder()
@@ -588,12 +907,25 @@ async def process_new_value(message: Message, state: FSMContext):
     await message.answer(
         f"📝 **Подтвердите изменение:**\n"
         f"Поле: {field}\n"
-        f"Новое значение: {new_value}\n\n"
+        f"Новое значение: {new_value}\n"
+        f"{warning}\n"
         f"Сохранить изменения?",
         reply_markup=builder.as_markup()
     )
     await state.set_state(EditScheduleForm.confirm_edit)
 
+async def find_user_item(telegram_id: int, schedule_id: int):
+    """Ищет занятие пользователя в его (закэшированном) расписании"""
+    user_data = await api_client.get_user_by_telegram_id(telegram_id)
+    if not user_data.get("success"):
+        return None
+    
+    schedule_data = await api_client.get_user_schedule(user_data["data"].id)
+    for item in schedule_data.get("data", {}).get("items", []):
+        if item.id == schedule_id:
+            return item
+    return None
+
 # Обработчик подтверждения редактирования
 @router.callback_query(F.data == "confirm_edit")
 async def confirm_edit_schedule(callback: CallbackQuery, state: FSMContext):
@@ -603,7 +935,7 @@ async def confirm_edit_schedule(callback: CallbackQuery, state: FSMContext):
     field = user_data.get('field_to_edit')
     new_value = user_data.get('new_value')
 
-    logger.info(f"CONFIRM EDIT: schedule_id={schedule_id}, field={field}, new_value={new_value}")
+    logger.info("CONFIRM EDIT: schedule_id=%s, field=%s, new_value=%s", schedule_id, field, new_value)
     
     if not all([schedule_id, field, new_value]):
         await callback.message.answer("❌ Ошибка: данные не найдены", reply_markup=kb.main)
@@ -614,12 +946,14 @@ async def confirm_edit_schedule(callback: CallbackQuery, state: FSMContext):
     # Создаем данные для обновления
     update_data = {field: new_value}
     
-    logger.info(f"Sending to API: {update_data}")
+    logger.debug("Sending to API: %s", update_data)
     
     # Вызываем API для обновления
-    result = api_client.update_schedule_item(schedule_id, update_data)
+    result = await api_client.update_schedule_item(
+        schedule_id, update_data, allow_overlap=user_data.get('overlap_confirmed', False)
+    )
     
-    logger.info(f"API response: {result}")
+    logger.debug("API response: %s", result)
     
     if result.get("success"):
         await callback.message.answer("✅ Изменения успешно сохранены!", reply_markup=kb.main)
@@ -656,7 +990,7 @@ async def confirm_inline_delete(callback: CallbackQuery):
     """Подтверждение удаления из inline-кнопки"""
     schedule_id = int(callback.data.split("_")[3])
     
-    result = api_client.delete_schedule_item(schedule_id)
+    result = await api_client.delete_schedule_item(schedule_id)
     
     if result.get("success"):
         await callback.message.delete()  # Удаляем сообщение с занятием
@@ -693,6 +1027,7 @@ async def edit_schedule_inline(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 # Обработчики отмены
+@router.callback_query(F.data == "cancel_create")
 @router.callback_query(F.data == "cancel_delete")
 @router.callback_query(F.data == "cancel_edit")
 @router.callback_query(F.data == "cancel_inline_action")
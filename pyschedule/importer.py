@@ -0,0 +1,178 @@
+import csv
+import re
+from datetime import date
+
+from intervals import build_day_schedules
+from models import DAYS_ORDER, ScheduleItem, format_time, parse_day, parse_time
+
+# То же правило, что и в фильтрах ScheduleForm (process_time_start/process_time_end)
+TIME_PATTERN = r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$'
+_TIME_RE = re.compile(TIME_PATTERN)
+
+DAY_ALIASES = {
+    **{day: day for day in DAYS_ORDER},
+    'понедельник': 'monday', 'вторник': 'tuesday', 'среда': 'wednesday', 'четверг': 'thursday',
+    'пятница': 'friday', 'суббота': 'saturday', 'воскресенье': 'sunday',
+    'пн': 'monday', 'вт': 'tuesday', 'ср': 'wednesday', 'чт': 'thursday',
+    'пт': 'friday', 'сб': 'saturday', 'вс': 'sunday',
+}
+ICS_DAYS = {
+    'MO': 'monday', 'TU': 'tuesday', 'WE': 'wednesday', 'TH': 'thursday',
+    'FR': 'friday', 'SA': 'saturday', 'SU': 'sunday'
+}
+
+
+def validate_item(item: dict):
+    """Проверяет занятие; возвращает текст ошибки или None"""
+    if item.get('day_of_week') not in DAYS_ORDER:
+        return f"неизвестный день недели: {item.get('day_of_week')!r}"
+    for field in ('time_start', 'time_end'):
+        if not _TIME_RE.match(item.get(field) or ''):
+            return f"неверный формат времени {field}: {item.get(field)!r} (нужно HH:MM)"
+    if parse_time(item['time_end']) <= parse_time(item['time_start']):
+        return "время окончания должно быть позже времени начала"
+    if not item.get('subject'):
+        return "не указан предмет"
+    return None
+
+
+def parse_csv(lines):
+    """Построчно разбирает CSV (формат экспорта: day_of_week,time_start,time_end,subject,description)
+
+    Генерирует (номер строки, занятие или None, ошибка или None). Битый CSV
+    (например, поле длиннее csv.field_size_limit()) дает ошибку строки, на
+    которой разбор остановился.
+    """
+    reader = csv.DictReader(lines)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # Строку с ошибкой reader не засчитывает в line_num
+            yield reader.line_num + 1, None, f"ошибка разбора CSV: {e}"
+            return
+        row_number = reader.line_num
+        day = (row.get('day_of_week') or '').strip().lower()
+        item = {
+            'day_of_week': DAY_ALIASES.get(day, day),
+            'time_start': (row.get('time_start') or '').strip(),
+            'time_end': (row.get('time_end') or '').strip(),
+            'subject': (row.get('subject') or '').strip(),
+            'description': (row.get('description') or '').strip(),
+        }
+        error = validate_item(item)
+        yield row_number, (None if error else item), error
+
+
+def _unfold(lines):
+    """Склеивает перенесенные строки iCalendar (RFC 5545, 3.1)"""
+    pending = None
+    for raw in lines:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending is not None:
+        yield pending
+
+
+def _ics_unescape(value: str) -> str:
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+def _ics_event_to_item(props: dict):
+    start = props.get('DTSTART', '')
+    end = props.get('DTEND', '')
+    if 'T' not in start or 'T' not in end:
+        return None, "событие без времени начала/окончания"
+
+    day = None
+    for part in props.get('RRULE', '').split(';'):
+        if part.startswith('BYDAY='):
+            day = ICS_DAYS.get(part[6:].split(',')[0].lstrip('+-0123456789'))
+    if day is None:
+        try:
+            day = DAYS_ORDER[date(int(start[0:4]), int(start[4:6]), int(start[6:8])).weekday()]
+        except ValueError:
+            return None, f"неверная дата DTSTART: {start!r}"
+
+    start_time = start.split('T')[1]
+    end_time = end.split('T')[1]
+    item = {
+        'day_of_week': day,
+        'time_start': f"{start_time[0:2]}:{start_time[2:4]}",
+        'time_end': f"{end_time[0:2]}:{end_time[2:4]}",
+        'subject': _ics_unescape(props.get('SUMMARY', '')).strip(),
+        'description': _ics_unescape(props.get('DESCRIPTION', '')).strip(),
+    }
+    error = validate_item(item)
+    return (None if error else item), error
+
+
+def parse_ics(lines):
+    """Потоково разбирает VEVENT из iCalendar
+
+    Генерирует (номер события, занятие или None, ошибка или None).
+    """
+    props = None
+    event_number = 0
+    for line in _unfold(lines):
+        if line == 'BEGIN:VEVENT':
+            props = {}
+            event_number += 1
+        elif line == 'END:VEVENT' and props is not None:
+            item, error = _ics_event_to_item(props)
+            yield event_number, item, error
+            props = None
+        elif props is not None and ':' in line:
+            name, value = line.split(':', 1)
+            props.setdefault(name.split(';')[0].upper(), value)
+
+
+IMPORT_FORMATS = {
+    'csv': parse_csv,
+    'ics': parse_ics,
+}
+
+
+def import_items(lines, fmt: str, user_id: int, max_items: int = 1000, existing=()):
+    """Разбирает файл и готовит занятия для batch_create_schedule_items
+
+    existing - текущие занятия пользователя (ScheduleItem): строки, которые
+    пересекаются с ними или с принятыми строками выше, попадают в errors -
+    batch-эндпоинт отклонил бы из-за них всю пачку.
+    Возвращает (items, errors), где errors - список (номер строки/события, текст).
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unknown import format: {fmt}")
+
+    schedules = build_day_schedules(existing)
+    items = []
+    errors = []
+    for row_number, item, error in IMPORT_FORMATS[fmt](lines):
+        if error:
+            errors.append((row_number, error))
+            continue
+        if len(items) >= max_items:
+            errors.append((row_number, f"превышен лимит в {max_items} занятий"))
+            break
+        # Отрицательный id не совпадает ни с одним занятием из базы
+        candidate = ScheduleItem(-row_number, user_id, parse_day(item['day_of_week']),
+                                 parse_time(item['time_start']), parse_time(item['time_end']),
+                                 item['subject'])
+        day = schedules[candidate.day]
+        conflicts = day.conflicts(candidate.start, candidate.end)
+        if conflicts:
+            errors.append((row_number, "пересекается с " + ", ".join(
+                f"{other.subject} ({format_time(other.start)}-{format_time(other.end)})"
+                for other in conflicts)))
+            continue
+        day.add(candidate)
+        item['user_id'] = user_id
+        items.append(item)
+    return items, errors
@@ -0,0 +1,122 @@
+from bisect import bisect_left, bisect_right
+
+from models import DAYS_ORDER
+
+
+class DaySchedule:
+    """Занятия одного дня как отсортированные интервалы [start, end) в минутах
+
+    Поиск пересечений - бинарный поиск по началам плюс просмотр назад,
+    ограниченный самой длинной парой; для дня без пересечений это O(log n).
+    """
+
+    def __init__(self, items=()):
+        self._items = sorted(items, key=lambda x: (x.start, x.end))
+        self._starts = [item.start for item in self._items]
+        self._max_duration = max((item.end - item.start for item in self._items), default=0)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def add(self, item):
+        """Вставляет занятие, сохраняя порядок"""
+        pos = bisect_right(self._starts, item.start)
+        self._starts.insert(pos, item.start)
+        self._items.insert(pos, item)
+        self._max_duration = max(self._max_duration, item.end - item.start)
+
+    def remove(self, item_id: int):
+        """Удаляет занятие по ID (если есть)"""
+        for pos, item in enumerate(self._items):
+            if item.id == item_id:
+                del self._items[pos]
+                del self._starts[pos]
+                return
+
+    def conflicts(self, start: int, end: int, ignore_id: int = None) -> list:
+        """Занятия, пересекающиеся с [start, end); ignore_id - само редактируемое занятие"""
+        result = []
+        pos = bisect_left(self._starts, end) - 1
+        while pos >= 0 and self._starts[pos] + self._max_duration > start:
+            item = self._items[pos]
+            if item.end > start and item.id != ignore_id:
+                result.append(item)
+            pos -= 1
+        result.reverse()
+        return result
+
+    def gaps(self, start: int, end: int, ignore_id: int = None):
+        """Свободные минуты до предыдущего и после следующего занятия
+
+        Возвращает (before, after); None, если соседа нет. Имеет смысл для
+        интервала без пересечений.
+        """
+        before = after = None
+        pos = bisect_left(self._starts, start) - 1
+        # Более раннее занятие может закончиться позже найденного, но не позже start_i + max_duration
+        while pos >= 0 and (before is None or self._starts[pos] + self._max_duration > start - before):
+            item = self._items[pos]
+            if item.id != ignore_id and item.end <= start:
+                gap = start - item.end
+                if before is None or gap < before:
+                    before = gap
+            pos -= 1
+
+        pos = bisect_left(self._starts, end)
+        while pos < len(self._items):
+            item = self._items[pos]
+            if item.id != ignore_id:
+                after = item.start - end
+                break
+            pos += 1
+        return before, after
+
+    def free_windows(self, day_start: int = 0, day_end: int = 24 * 60) -> list:
+        """Свободные окна [start, end) внутри [day_start, day_end) - один проход по занятиям"""
+        windows = []
+        cursor = day_start
+        for item in self._items:
+            if item.start >= day_end:
+                break
+            if item.start > cursor:
+                windows.append((cursor, item.start))
+            cursor = max(cursor, item.end)
+        if cursor < day_end:
+            windows.append((cursor, day_end))
+        return windows
+
+
+def build_day_schedules(items) -> list:
+    """Разбивает занятия недели на DaySchedule по дням (индекс = ScheduleItem.day)"""
+    days = [[] for _ in DAYS_ORDER]
+    for item in items:
+        days[item.day].append(item)
+    return [DaySchedule(day_items) for day_items in days]
+
+
+def find_free_slots(items, duration: int, days=None, day_start: int = 0, day_end: int = 24 * 60) -> dict:
+    """Свободные окна не короче duration минут по дням недели
+
+    days - индексы дней (0 = понедельник), по умолчанию вся неделя.
+    Возвращает {индекс дня: [(start, end), ...]}.
+    """
+    schedules = build_day_schedules(items)
+    if days is None:
+        days = range(len(DAYS_ORDER))
+    return {
+        day: [(start, end) for start, end in schedules[day].free_windows(day_start, day_end)
+              if end - start >= duration]
+        for day in days
+    }
+
+
+def find_free_slots_many(items_by_user: dict, duration: int, days=None,
+                         day_start: int = 0, day_end: int = 24 * 60) -> dict:
+    """find_free_slots для многих пользователей: {user_id: занятия} -> {user_id: окна}"""
+    return {
+        user_id: find_free_slots(items, duration, days, day_start, day_end)
+        for user_id, items in items_by_user.items()
+    }
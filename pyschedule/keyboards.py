@@ -4,7 +4,7 @@ from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMar
 main = ReplyKeyboardMarkup(keyboard=[
     [KeyboardButton(text='Показать расписание'), KeyboardButton(text='Экспорт расписания')],
     [KeyboardButton(text='Добавить занятие'), KeyboardButton(text='Удалить занятие')],
-    [KeyboardButton(text='Редактировать занятие')],
+    [KeyboardButton(text='Редактировать занятие'), KeyboardButton(text='Найти свободное время')],
     [KeyboardButton(text='Помощь и список команд')],
     [KeyboardButton(text='Статистика')]
 ],
@@ -20,6 +20,7 @@ dn = ReplyKeyboardMarkup(keyboard=[
     [KeyboardButton(text='Пятница')],
     [KeyboardButton(text='Суббота')],
     [KeyboardButton(text='Воскресенье')],
+    [KeyboardButton(text='Неделя')],
     [KeyboardButton(text='Главное меню')]
 ],
                             resize_keyboard=True,
@@ -0,0 +1,157 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+from tracing import current_span
+
+# Атрибуты LogRecord; все остальное пришло через extra= и попадает в JSON отдельными полями
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_listener = None
+# Текст исключения собирается в вызывающем потоке (LazyQueueHandler.prepare)
+_EXC_FORMATTER = logging.Formatter()
+
+
+def parse_pairs(spec: str, cast=str) -> dict:
+    """'api_client=DEBUG,aiogram.event=WARNING' -> {'api_client': 'DEBUG', ...}"""
+    pairs = {}
+    for part in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = part.partition('=')
+        pairs[name.strip()] = cast(value.strip())
+    return pairs
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON: ts, level, logger, msg, поля из extra=, trace_id"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю записей ниже WARNING от шумных логгеров
+
+    rates: {префикс имени логгера: доля}; 'aiogram.event' покрывает и дочерние
+    логгеры. Предупреждения и ошибки не отбрасываются никогда.
+    """
+
+    def __init__(self, rates: dict, random=random.random):
+        super().__init__()
+        self.rates = rates
+        self._random = random
+
+    def _rate(self, name: str):
+        while name:
+            rate = self.rates.get(name)
+            if rate is not None:
+                return rate
+            name = name.rpartition('.')[0]
+        return None
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate is None or self._random() < rate
+
+
+class TraceContextFilter(logging.Filter):
+    """Добавляет trace_id записям, сделанным внутри trace (tracing.py)"""
+
+    def filter(self, record):
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+        return True
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который оставляет потоку записи только сериализацию
+
+    Как и стандартный prepare(), сообщение (msg % args) и текст исключения
+    собираются в вызывающем потоке: аргументы могут измениться сразу после
+    вызова, а ошибка в __str__ должна всплыть рядом с местом логирования.
+    В отличие от него запись не прогоняется через formatter - JSON и
+    текстовый формат собирает поток QueueListener вместе с записью на диск.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+        # Трейсбэк с фреймами держит ссылки на локальные переменные вызывающего кода
+        record.exc_info = None
+        return record
+
+
+def setup_logging(level: str = 'INFO', fmt: str = 'json', levels: dict = None, sample: dict = None,
+                  path: str = '', stream=None):
+    """Настраивает корневой логгер процесса: очередь -> поток записи -> stderr или файл
+
+    Повторный вызов заменяет прежнюю настройку (run.py и воркеры вызывают его сами).
+    """
+    global _listener
+    stop_logging()
+
+    target = logging.FileHandler(path, encoding='utf-8') if path else logging.StreamHandler(stream or sys.stderr)
+    target.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    handler = LazyQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(sample or {}))
+    handler.addFilter(TraceContextFilter())
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name, module_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, target)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Дописывает оставшиеся записи и останавливает поток записи"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def setup_logging_from_config():
+    """setup_logging с LOG_* из config.py"""
+    from config import LOG_FILE, LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_SAMPLE
+
+    return setup_logging(LOG_LEVEL, LOG_FORMAT, parse_pairs(LOG_LEVELS), parse_pairs(LOG_SAMPLE, float),
+                         LOG_FILE)
@@ -0,0 +1,374 @@
+import asyncio
+import bisect
+import inspect
+import logging
+import re
+import time
+from collections import Counter as _Tally
+
+from aiogram import BaseMiddleware
+from aiohttp import TraceConfig, web
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм задержек, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Сегменты пути из цифр сводятся к {id}, чтобы число рядов метрик не росло с числом записей
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def endpoint_template(path: str) -> str:
+    """/api/schedule/42?x=1 -> /api/schedule/{id}"""
+    return _ID_SEGMENT.sub('/{id}', path.split('?', 1)[0])
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Монотонный счетчик с метками"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def samples(self):
+        for labelvalues, value in self._values.items():
+            yield self.name, _labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами (накопительные _bucket, _sum, _count)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labelvalues -> [counts по корзинам + переполнение, sum]
+
+    def observe(self, value: float, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labelvalues) -> int:
+        series = self._series.get(labelvalues)
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        for labelvalues, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield (f"{self.name}_bucket",
+                       _labels(self.labelnames, labelvalues, f'le="{_number(bound)}"'), cumulative)
+            yield f"{self.name}_sum", _labels(self.labelnames, labelvalues), total
+            yield f"{self.name}_count", _labels(self.labelnames, labelvalues), cumulative
+
+
+class Registry:
+    """Набор метрик и коллекторов, отдаваемый в текстовом формате Prometheus
+
+    Коллектор - функция (обычная или async), которая при каждом чтении
+    /metrics возвращает [(name, kind, help, [(labels: dict, value)])]:
+    так снимаются значения, которые уже считают другие модули (stats()).
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    async def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in metric.samples())
+
+        for collector in self._collectors:
+            try:
+                families = collector()
+                if inspect.isawaitable(families):
+                    families = await families
+            except Exception as e:
+                logger.error("Metrics collector %s failed: %s", getattr(collector, '__name__', collector), e)
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels, labels.values())} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HANDLER_DURATION = REGISTRY.histogram(
+    'bot_handler_duration_seconds', 'Время работы хендлера aiogram', ('handler',))
+HANDLER_ERRORS = REGISTRY.counter(
+    'bot_handler_errors_total', 'Исключения в хендлерах aiogram', ('handler',))
+API_DURATION = REGISTRY.histogram(
+    'api_request_duration_seconds', 'Время запроса к Go API', ('method', 'endpoint'))
+API_REQUESTS = REGISTRY.counter(
+    'api_requests_total', 'Запросы к Go API по статусу ответа', ('method', 'endpoint', 'status'))
+LOOP_LAG = REGISTRY.histogram(
+    'event_loop_lag_seconds', 'Опоздание пробуждения таймера event loop',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+
+def record_api_request(method: str, path: str, status, elapsed: float):
+    endpoint = endpoint_template(path)
+    API_DURATION.observe(elapsed, method, endpoint)
+    API_REQUESTS.inc(method, endpoint, str(status))
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner-middleware: время и ошибки каждого хендлера по имени функции
+
+    Вешается на router.message и router.callback_query (handlers.py).
+    """
+
+    async def __call__(self, handler, event, data):
+        name = data['handler'].callback.__name__
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - started, name)
+
+
+class MetricsHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter для requests.Session: время и статус каждого запроса (ScheduleAPIClient)"""
+
+    def send(self, request, *args, **kwargs):
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            response = super().send(request, *args, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            record_api_request(request.method, request.path_url, status, time.perf_counter() - started)
+
+
+def instrument_sync_client(client):
+    """Подключает MetricsHTTPAdapter к сессии ScheduleAPIClient"""
+    adapter = MetricsHTTPAdapter()
+    client.session.mount('http://', adapter)
+    client.session.mount('https://', adapter)
+
+
+def api_trace_config() -> TraceConfig:
+    """TraceConfig aiohttp с теми же метриками для AsyncScheduleAPIClient"""
+
+    async def on_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_end(session, context, params):
+        record_api_request(params.method, params.url.path, params.response.status,
+                           time.perf_counter() - context.started)
+
+    async def on_exception(session, context, params):
+        record_api_request(params.method, params.url.path, 'error', time.perf_counter() - context.started)
+
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(on_start)
+    trace_config.on_request_end.append(on_end)
+    trace_config.on_request_exception.append(on_exception)
+    return trace_config
+
+
+def instrument_async_client(client):
+    """Подключает api_trace_config к AsyncScheduleAPIClient (действует с новой сессии)"""
+    client.trace_configs.append(api_trace_config())
+
+
+class LoopLagMonitor:
+    """Меряет, насколько позже положенного просыпается asyncio.sleep(interval)
+
+    Большое опоздание - признак синхронной работы в event loop (разбор
+    больших ответов, блокирующий ввод-вывод), из-за которой ждут все апдейты.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.last = max(0.0, loop.time() - started - self.interval)
+            LOOP_LAG.observe(self.last)
+
+
+def cache_collector(caches: dict):
+    """Коллектор попаданий/промахов для {имя: TTLCache или ScheduleCache}"""
+
+    def collect():
+        hits, misses, sizes, ratios = [], [], [], []
+        for name, cache in caches.items():
+            stats = cache.stats()
+            labels = {'cache': name}
+            hits.append((labels, stats['hits']))
+            misses.append((labels, stats['misses']))
+            sizes.append((labels, stats['size']))
+            ratios.append((labels, stats['hit_ratio']))
+        return [
+            ('cache_hits_total', 'counter', 'Попадания в кэш клиента API', hits),
+            ('cache_misses_total', 'counter', 'Промахи кэша клиента API', misses),
+            ('cache_entries', 'gauge', 'Записей в кэше', sizes),
+            ('cache_hit_ratio', 'gauge', 'Доля попаданий с запуска', ratios),
+        ]
+    return collect
+
+
+async def fsm_state_counts(storage) -> dict:
+    """Число диалогов в каждом состоянии FSM (MemoryStorage или PersistentStorage)"""
+    if hasattr(storage, 'state_counts'):
+        return await storage.state_counts()
+    records = getattr(storage, 'storage', None)
+    if records is None:
+        return {}
+    return dict(_Tally(record.state for record in records.values() if record.state is not None))
+
+
+def fsm_collector(storage):
+    async def collect():
+        counts = await fsm_state_counts(storage)
+        return [('fsm_states', 'gauge', 'Незавершенные диалоги по состояниям FSM',
+                 [({'state': state}, count) for state, count in sorted(counts.items())])]
+    return collect
+
+
+def stats_collector(prefix: str, source, counters=(), help: str = ''):
+    """Коллектор для объекта со stats(): ключи из counters - counter, остальные - gauge"""
+
+    def collect():
+        return [(f"{prefix}_{key}{'_total' if key in counters else ''}",
+                 'counter' if key in counters else 'gauge', f"{help}: {key}", [({}, value)])
+                for key, value in source.stats().items()]
+    return collect
+
+
+def loop_lag_collector(monitor: LoopLagMonitor):
+    def collect():
+        return [('event_loop_lag_last_seconds', 'gauge', 'Последнее измеренное опоздание event loop',
+                 [({}, monitor.last)])]
+    return collect
+
+
+async def metrics_handler(request):
+    registry = request.app[METRICS_REGISTRY]
+    return web.Response(text=await registry.render(), content_type='text/plain', charset='utf-8',
+                        headers={'X-Content-Type-Options': 'nosniff'})
+
+
+METRICS_REGISTRY = web.AppKey('metrics_registry', Registry)
+
+
+class MetricsServer:
+    """HTTP /metrics и монитор event loop процесса бота"""
+
+    def __init__(self, registry: Registry = REGISTRY, lag_interval: float = 0.5):
+        self.registry = registry
+        self.monitor = LoopLagMonitor(lag_interval)
+        registry.add_collector(loop_lag_collector(self.monitor))
+        self.port = None
+        self._runner = None
+        self._lag_task = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 9090):
+        app = web.Application()
+        app[METRICS_REGISTRY] = self.registry
+        app.router.add_get('/metrics', metrics_handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        # port=0 - свободный порт, выбранный системой
+        self.port = self._runner.addresses[0][1]
+        self._lag_task = asyncio.create_task(self.monitor.run())
+        logger.info("Metrics served on http://%s:%s/metrics", host, self.port)
+
+    async def close(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def start_metrics_from_config(api_client=None, storage=None, throttling=None, send_queue=None,
+                                    port_offset: int = 0):
+    """Запускает MetricsServer на METRICS_HOST:METRICS_PORT (+port_offset); None, если выключено"""
+    from config import METRICS_HOST, METRICS_PORT
+
+    if not METRICS_PORT:
+        return None
+
+    registry = REGISTRY
+    if api_client is not None:
+        registry.add_collector(cache_collector({'user': api_client.user_cache,
+                                                'schedule': api_client.schedule_cache}))
+    if storage is not None:
+        registry.add_collector(fsm_collector(storage))
+    if throttling is not None:
+        registry.add_collector(stats_collector('throttling', throttling, ('passed', 'coalesced', 'dropped'),
+                                               'Троттлинг апдейтов'))
+    if send_queue is not None:
+        registry.add_collector(stats_collector('send_queue', send_queue, ('sent', 'retried'),
+                                               'Очередь исходящих сообщений'))
+
+    server = MetricsServer(registry)
+    await server.start(METRICS_HOST, METRICS_PORT + port_offset)
+    return server
@@ -0,0 +1,137 @@
+import logging
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Порядок дней недели; индекс в списке - компактное представление дня (0 = понедельник)
+DAYS_ORDER = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+_DAY_INDEX = {day: i for i, day in enumerate(DAYS_ORDER)}
+
+
+def parse_time(value: str) -> int:
+    """'HH:MM' (или 'H:MM') -> минуты от полуночи"""
+    hours, minutes = value.split(':')
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time: {value!r}")
+    return hours * 60 + minutes
+
+
+def format_time(minutes: int) -> str:
+    """Минуты от полуночи -> 'HH:MM'"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_day(value: str) -> int:
+    """'monday' -> 0"""
+    try:
+        return _DAY_INDEX[value]
+    except KeyError:
+        raise ValueError(f"Invalid day of week: {value!r}") from None
+
+
+@dataclass(slots=True)
+class User:
+    """Пользователь (go-backend/internal/models/models.go: User)"""
+    id: int
+    telegram_id: int
+    username: str = ''
+    first_name: str = ''
+    created_at: str = ''
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'User':
+        return cls(
+            id=data['id'],
+            telegram_id=data['telegram_id'],
+            username=data.get('username') or '',
+            first_name=data.get('first_name') or '',
+            created_at=data.get('created_at') or ''
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'telegram_id': self.telegram_id,
+            'username': self.username,
+            'first_name': self.first_name,
+            'created_at': self.created_at
+        }
+
+
+@dataclass(slots=True)
+class ScheduleItem:
+    """Занятие (go-backend/internal/models/models.go: ScheduleItem)
+
+    День хранится индексом в DAYS_ORDER, время - минутами от полуночи, поэтому
+    сортировка и проверки пересечений сводятся к сравнению целых чисел.
+    Свойства day_of_week/time_start/time_end отдают строки в формате API.
+    """
+    id: int
+    user_id: int
+    day: int
+    start: int
+    end: int
+    subject: str
+    description: str = ''
+    created_at: str = ''
+
+    @property
+    def day_of_week(self) -> str:
+        return DAYS_ORDER[self.day]
+
+    @property
+    def time_start(self) -> str:
+        return format_time(self.start)
+
+    @property
+    def time_end(self) -> str:
+        return format_time(self.end)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ScheduleItem':
+        return cls(
+            id=data['id'],
+            user_id=data['user_id'],
+            day=parse_day(data['day_of_week']),
+            start=parse_time(data['time_start']),
+            end=parse_time(data['time_end']),
+            subject=data.get('subject') or '',
+            description=data.get('description') or '',
+            created_at=data.get('created_at') or ''
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'day_of_week': self.day_of_week,
+            'time_start': self.time_start,
+            'time_end': self.time_end,
+            'subject': self.subject,
+            'description': self.description,
+            'created_at': self.created_at
+        }
+
+    def apply(self, update_data: dict):
+        """Применяет изменения в формате API ({"time_start": "10:00", ...})"""
+        for field, value in update_data.items():
+            if field == 'day_of_week':
+                self.day = parse_day(value)
+            elif field == 'time_start':
+                self.start = parse_time(value)
+            elif field == 'time_end':
+                self.end = parse_time(value)
+            elif field in ('subject', 'description'):
+                setattr(self, field, value or '')
+
+
+def parse_items(raw_items: list) -> list:
+    """Разбирает ответ API в ScheduleItem, пропуская некорректные записи"""
+    items = []
+    for data in raw_items:
+        try:
+            items.append(ScheduleItem.from_dict(data))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Skipping malformed schedule item %s: %s", data.get('id'), e)
+    return items
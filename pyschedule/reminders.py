@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytz
+
+from send_queue import bulk_sends
+
+logger = logging.getLogger(__name__)
+
+WEEK_MINUTES = 7 * 24 * 60
+# Пауза между попытками первичной загрузки, если backend недоступен
+LOAD_RETRY_DELAY = 5
+
+
+def format_reminder(item, lead_minutes: int) -> str:
+    text = f"⏰ Через {lead_minutes} мин: {item.subject}\n🕒 {item.time_start}-{item.time_end}"
+    if item.description:
+        text += f"\n📝 {item.description}"
+    return text
+
+
+class ReminderScheduler:
+    """Напоминания о занятиях за lead_minutes до начала
+
+    Ближайшие срабатывания лежат в min-heap (fire_at, version, item_id).
+    Изменение занятия - новая запись с новой версией (O(log n)), старая
+    становится устаревшей и пропускается при извлечении; удаление - O(1).
+    После первичной загрузки backend не опрашивается: изменения приходят
+    через подписку на клиент (api_client.add_listener), после срабатывания
+    занятие перепланируется на следующую неделю.
+    """
+
+    def __init__(self, send, lead_minutes: int = 15, timezone: str = 'Europe/Moscow',
+                 chat_filter=None, clock=time.time):
+        self._send = send
+        self._lead = lead_minutes
+        self._tz = pytz.timezone(timezone)
+        self._chat_filter = chat_filter
+        self._clock = clock
+        self._heap = []
+        self._entries = {}  # item_id -> (item, version, fire_at)
+        self._chats = {}    # user_id -> telegram_id
+        self._version = itertools.count()
+        self._wakeup = None
+        self._tasks = set()
+        self.sent = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def next_fire(self, item, now: float) -> float:
+        """Ближайший момент (timestamp) напоминания о занятии после now"""
+        local_now = datetime.fromtimestamp(now, self._tz).replace(tzinfo=None)
+        monday = datetime.combine(local_now.date() - timedelta(days=local_now.weekday()), datetime.min.time())
+        # Напоминание о занятии в 00:05 понедельника уходит в воскресенье
+        target = monday + timedelta(minutes=(item.day * 24 * 60 + item.start - self._lead) % WEEK_MINUTES)
+        if target <= local_now:
+            target += timedelta(days=7)
+        # localize учитывает переход на летнее время в дату срабатывания
+        return self._tz.localize(target).timestamp()
+
+    def _push(self, item, now: float = None):
+        fire_at = self.next_fire(item, self._clock() if now is None else now)
+        version = next(self._version)
+        self._entries[item.id] = (item, version, fire_at)
+        heapq.heappush(self._heap, (fire_at, version, item.id))
+        if self._wakeup is not None and self._heap[0][1] == version:
+            self._wakeup.set()
+
+    def _compact(self):
+        # Устаревших записей в куче больше, чем живых - перестраиваем за O(n)
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._heap = [(fire_at, version, item_id)
+                          for item_id, (_, version, fire_at) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def load(self, users, items):
+        """Первичная загрузка: все пользователи и занятия, куча строится за O(n)"""
+        now = self._clock()
+        for user in users:
+            self.add_user(user)
+        for item in items:
+            # Занятия, пришедшие через подписку во время загрузки, свежее загруженных
+            if item.user_id in self._chats and item.id not in self._entries:
+                fire_at = self.next_fire(item, now)
+                version = next(self._version)
+                self._entries[item.id] = (item, version, fire_at)
+                self._heap.append((fire_at, version, item.id))
+        heapq.heapify(self._heap)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        logger.info("Reminders loaded: %s lessons", len(self._entries))
+
+    # Подписка на изменения в ScheduleAPIClient/AsyncScheduleAPIClient
+
+    def add_user(self, user):
+        if self._chat_filter is None or self._chat_filter(user.telegram_id):
+            self._chats[user.id] = user.telegram_id
+
+    def add_item(self, item):
+        if item.user_id in self._chats:
+            self._push(item)
+
+    def patch_item(self, schedule_id: int, update_data: dict):
+        entry = self._entries.get(schedule_id)
+        if entry is None:
+            return
+        # Копия: объект из кэша клиента меняет сам клиент
+        item = replace(entry[0])
+        item.apply(update_data)
+        self._push(item)
+        self._compact()
+
+    def remove_item(self, schedule_id: int):
+        if self._entries.pop(schedule_id, None) is not None:
+            self._compact()
+
+    async def _fire(self, item):
+        telegram_id = self._chats.get(item.user_id)
+        if telegram_id is None:
+            return
+        try:
+            with bulk_sends():
+                await self._send(telegram_id, format_reminder(item, self._lead))
+            self.sent += 1
+        except Exception as e:
+            logger.error("Failed to send reminder for item %s: %s", item.id, e)
+
+    async def run(self):
+        """Основной цикл: спит до ближайшего напоминания или изменения расписания"""
+        self._wakeup = asyncio.Event()
+        while True:
+            while self._heap and self._entries.get(self._heap[0][2], (None, None))[1] != self._heap[0][1]:
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            fire_at, version, item_id = self._heap[0]
+            delay = fire_at - self._clock()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            item = self._entries[item_id][0]
+            task = asyncio.create_task(self._fire(item))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            # Следующая неделя; fire_at + 1, чтобы не получить то же срабатывание
+            self._push(item, max(fire_at, self._clock()) + 1)
+
+    async def start(self, client):
+        """Загружает расписания через клиент, подписывается на изменения и крутит run()
+
+        Занятия читаются одним постраничным обходом (iter_schedule_items(by_user=True));
+        в памяти остаются только занятия пользователей своего шарда (chat_filter).
+        """
+        client.add_listener(self)
+        while True:
+            users = await client.get_all_users()
+            if users.get("success"):
+                for user in users["data"]["users"]:
+                    self.add_user(user)
+                try:
+                    items = [item async for item in client.iter_schedule_items(by_user=True)
+                             if item.user_id in self._chats]
+                    break
+                except RuntimeError as e:
+                    error = str(e)
+            else:
+                error = users.get('error')
+            logger.error("Failed to load reminders: %s", error)
+            await asyncio.sleep(LOAD_RETRY_DELAY)
+        self.load(users["data"]["users"], items)
+        await self.run()
+
+
+def reminders_from_config(bot, chat_filter=None) -> ReminderScheduler:
+    """ReminderScheduler с параметрами из config.py, отправляющий через bot"""
+    from config import REMINDER_LEAD_MINUTES, TIMEZONE
+
+    async def send(chat_id: int, text: str):
+        await bot.send_message(chat_id, text)
+
+    return ReminderScheduler(send, REMINDER_LEAD_MINUTES, TIMEZONE, chat_filter)
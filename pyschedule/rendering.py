@@ -0,0 +1,167 @@
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+# Ограничения Telegram Bot API
+MAX_MESSAGE_LENGTH = 4096
+# 2 кнопки на занятие + строка навигации укладываются в лимит 100 кнопок
+MAX_ITEMS_PER_PAGE = 40
+# Номер страницы в заголовке; для бюджета берется самый длинный вариант
+PAGE_SUFFIX = " (стр. {page}/{total})"
+LONGEST_PAGE_SUFFIX = PAGE_SUFFIX.format(page=9999, total=9999)
+# Между заголовком и блоками - пустая строка, между блоками - перевод строки
+HEADER_SEPARATOR = "\n\n"
+BLOCK_SEPARATOR = "\n"
+
+DAY_NAMES_RU = {
+    'monday': 'Понедельник', 'tuesday': 'Вторник', 'wednesday': 'Среда',
+    'thursday': 'Четверг', 'friday': 'Пятница', 'saturday': 'Суббота',
+    'sunday': 'Воскресенье'
+}
+
+
+def format_item(index: int, item) -> str:
+    """Форматирует одно занятие так же, как в поштучной отправке"""
+    item_text = f"{index}. 🕒 {item.time_start}-{item.time_end}\n"
+    item_text += f"   📚 {item.subject}\n"
+    if item.description:
+        item_text += f"   📝 {item.description}\n"
+    return item_text
+
+
+def tg_len(text: str) -> int:
+    """Длина в единицах UTF-16 - так лимиты считает Telegram (эмодзи - две единицы)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def truncate(text: str, limit: int) -> str:
+    """Обрезает текст до limit единиц UTF-16 с "…", не разрывая суррогатные пары"""
+    if tg_len(text) <= limit:
+        return text
+    return text.encode('utf-16-le')[:2 * (limit - 1)].decode('utf-16-le', errors='ignore') + "…"
+
+
+def page_budget(header: str) -> int:
+    """Сколько единиц UTF-16 остается на блоки под заголовком с номером страницы"""
+    return MAX_MESSAGE_LENGTH - tg_len(header + LONGEST_PAGE_SUFFIX + HEADER_SEPARATOR)
+
+
+def paginate(blocks: list, max_length: int = MAX_MESSAGE_LENGTH,
+             max_items: int = MAX_ITEMS_PER_PAGE) -> list:
+    """Разбивает текстовые блоки на страницы, возвращает списки индексов блоков
+
+    max_length - бюджет страницы (page_budget) в единицах UTF-16 вместе с
+    разделителями BLOCK_SEPARATOR между блоками.
+    """
+    pages = []
+    current = []
+    length = 0
+    separator = tg_len(BLOCK_SEPARATOR)
+
+    for i, block in enumerate(blocks):
+        size = tg_len(block)
+        if current and (len(current) >= max_items or length + separator + size > max_length):
+            pages.append(current)
+            current = []
+            length = 0
+        length += size + (separator if current else 0)
+        current.append(i)
+
+    if current:
+        pages.append(current)
+    return pages
+
+
+def day_blocks(title: str, items: list, limit: int) -> list:
+    """Блоки дня для недели не длиннее limit
+
+    День, не влезающий в одну страницу, делится на части; каждая следующая
+    часть начинается с заголовка "(продолжение)", занятия не теряются.
+    """
+    first = f"📅 {title}\n"
+    continued = f"📅 {title} (продолжение)\n"
+    # Строка с очень длинным предметом обрезается, чтобы поместиться под заголовком
+    line_limit = limit - tg_len(continued) - 1
+    blocks = []
+    block, length, lines = first, tg_len(first), 0
+    for item in items:
+        line = truncate(f"  🕒 {item.time_start}-{item.time_end} {item.subject}", line_limit) + "\n"
+        size = tg_len(line)
+        if lines and length + size > limit:
+            blocks.append(block)
+            block, length, lines = continued, tg_len(continued), 0
+        block += line
+        length += size
+        lines += 1
+    blocks.append(block)
+    return blocks
+
+
+def render_week_page(index: dict, page: int = 0):
+    """Компактная страница недели по индексу день -> занятия
+
+    Возвращает (text, reply_markup, pages_total); reply_markup - только навигация.
+    """
+    header = "🗓️ **Неделя:**"
+    limit = page_budget(header)
+    blocks = []
+    for day, day_items in index.items():
+        if day_items:
+            blocks.extend(day_blocks(DAY_NAMES_RU.get(day, day), day_items, limit))
+
+    pages = paginate(blocks, limit) or [[]]
+    pages_total = len(pages)
+    page = max(0, min(page, pages_total - 1))
+
+    if pages_total > 1:
+        header += PAGE_SUFFIX.format(page=page + 1, total=pages_total)
+    text = header + HEADER_SEPARATOR + BLOCK_SEPARATOR.join(blocks[i] for i in pages[page])
+
+    builder = InlineKeyboardBuilder()
+    if page > 0:
+        builder.button(text="◀️", callback_data=f"week_page_{page - 1}")
+    if page < pages_total - 1:
+        builder.button(text="▶️", callback_data=f"week_page_{page + 1}")
+    markup = builder.as_markup() if pages_total > 1 else None
+
+    return text, markup, pages_total
+
+
+def render_day_page(day_title: str, day_key: str, items: list, page: int = 0):
+    """Собирает одну страницу дня: текст и общая inline-клавиатура
+
+    Возвращает (text, reply_markup, pages_total). Кнопки пронумерованы так же,
+    как занятия в тексте, и используют существующие callback edit_/delete_.
+    """
+    header = f"📅 **{day_title}:**"
+    limit = page_budget(header)
+    # Одиночное занятие с огромным описанием не должно ломать отправку
+    blocks = [truncate(format_item(i, item), limit) for i, item in enumerate(items, 1)]
+
+    pages = paginate(blocks, limit)
+    pages_total = len(pages)
+    page = max(0, min(page, pages_total - 1))
+    indices = pages[page]
+
+    if pages_total > 1:
+        header += PAGE_SUFFIX.format(page=page + 1, total=pages_total)
+    text = header + HEADER_SEPARATOR + BLOCK_SEPARATOR.join(blocks[i] for i in indices)
+
+    builder = InlineKeyboardBuilder()
+    for i in indices:
+        number = i + 1
+        builder.button(text=f"✏️ {number}", callback_data=f"edit_{items[i].id}")
+        builder.button(text=f"🗑️ {number}", callback_data=f"delete_{items[i].id}")
+
+    buttons = len(indices) * 2
+    sizes = [4] * (buttons // 4) + ([buttons % 4] if buttons % 4 else [])
+    if pages_total > 1:
+        nav = 0
+        if page > 0:
+            builder.button(text="◀️", callback_data=f"day_page_{day_key}_{page - 1}")
+            nav += 1
+        if page < pages_total - 1:
+            builder.button(text="▶️", callback_data=f"day_page_{day_key}_{page + 1}")
+            nav += 1
+        sizes.append(nav)
+    builder.adjust(*sizes)
+
+    return text, builder.as_markup(), pages_total
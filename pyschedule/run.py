@@ -2,18 +2,91 @@ import asyncio
 import logging
 from aiogram import Bot, Dispatcher
 
-from config import BOT_TOKEN
-from handlers import router
+from config import (
+    BOT_TOKEN, BOT_MODE, BOT_WORKERS, REMINDERS_ENABLED, SCHEDULE_SYNC_INTERVAL,
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT,
+    WEBHOOK_MAX_CONNECTIONS, WEBHOOK_MAX_CONCURRENCY, WEBHOOK_MAX_BODY_SIZE, WEBHOOK_SHUTDOWN_TIMEOUT
+)
+from fsm_storage import storage_from_config
+from handlers import router, api_client, throttling, tracer
+from log_config import setup_logging_from_config
+from metrics import start_metrics_from_config
+from reminders import reminders_from_config
+from send_queue import send_queue_from_config
+from tracing import TelegramSpanMiddleware
+from webhook import run_webhook
+from workers import run_sharded
 
 # Самая простая версия без parse_mode
 bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
+# Все исходящие запросы проходят через общую очередь с учетом лимитов Telegram
+send_queue = send_queue_from_config()
+if tracer is not None:
+    # Раньше очереди: ожидание отправки входит в span запроса к Telegram
+    bot.session.middleware(TelegramSpanMiddleware())
+bot.session.middleware(send_queue)
 
 async def main():
-    dp.include_router(router)
-    await dp.start_polling(bot)
+    reminders_task = None
+    sync_task = None
+    metrics = None
+    try:
+        if BOT_WORKERS > 1:
+            # Этот процесс только принимает апдейты, обработка - в воркерах (workers.py)
+            webhook = None
+            if BOT_MODE == 'webhook' and WEBHOOK_URL:
+                webhook = dict(
+                    url=WEBHOOK_URL, path=WEBHOOK_PATH, host=WEBHOOK_HOST, port=WEBHOOK_PORT,
+                    secret_token=WEBHOOK_SECRET, max_connections=WEBHOOK_MAX_CONNECTIONS,
+                    max_body_size=WEBHOOK_MAX_BODY_SIZE
+                )
+            dp = Dispatcher()
+            dp.include_router(router)
+            # Здесь только задержка event loop приемника; хендлеры считают воркеры на своих портах
+            metrics = await start_metrics_from_config()
+            await run_sharded(BOT_TOKEN, BOT_WORKERS, dp.resolve_used_update_types(), webhook)
+            return
+
+        # Хранилище состояний диалогов (FSM_STORAGE) закрывается при остановке диспетчера
+        dp = Dispatcher(storage=storage_from_config())
+        dp.include_router(router)
+        metrics = await start_metrics_from_config(api_client, dp.storage, throttling, send_queue)
+        if SCHEDULE_SYNC_INTERVAL > 0:
+            # Раньше напоминаний: их загрузка не пропустит правки, сделанные во время нее
+            sync_task = asyncio.create_task(api_client.follow_schedule_changes(SCHEDULE_SYNC_INTERVAL))
+        if REMINDERS_ENABLED:
+            reminders_task = asyncio.create_task(reminders_from_config(bot).start(api_client))
+        if BOT_MODE == 'webhook' and WEBHOOK_URL:
+            await run_webhook(
+                dp, bot, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_HOST, WEBHOOK_PORT,
+                secret_token=WEBHOOK_SECRET,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+                max_concurrency=WEBHOOK_MAX_CONCURRENCY,
+                max_body_size=WEBHOOK_MAX_BODY_SIZE,
+                shutdown_timeout=WEBHOOK_SHUTDOWN_TIMEOUT
+            )
+        else:
+            if BOT_MODE == 'webhook':
+                logging.warning("BOT_MODE=webhook, but WEBHOOK_URL is not set - falling back to polling")
+            # Вебхук, оставшийся от прошлого запуска, не дает получать апдейты через getUpdates
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    finally:
+        if reminders_task is not None:
+            reminders_task.cancel()
+        if sync_task is not None:
+            sync_task.cancel()
+        if metrics is not None:
+            await metrics.close()
+        # Закрываем пул соединений к Go API
+        await api_client.close()
+        if tracer is not None:
+            tracer.close()
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
+    if BOT_MODE == 'webhook' and WEBHOOK_URL and not WEBHOOK_SECRET:
+        # Свой случайный секрет у каждого экземпляра перетирал бы секрет соседей в set_webhook
+        raise SystemExit("BOT_MODE=webhook requires WEBHOOK_SECRET (the same value on every instance)")
+    setup_logging_from_config()
     print("🚀 Запускаем бота...")
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,17 @@
+from intervals import build_day_schedules
+from models import DAYS_ORDER
+
+
+def build_week_index(items: list) -> dict:
+    """Строит индекс день -> занятия, отсортированные по времени начала
+
+    Ключи идут в порядке DAYS_ORDER и есть для каждого дня (пустые списки
+    для свободных дней). Разбиение по дням - intervals.build_day_schedules.
+    """
+    return dict(zip(DAYS_ORDER, (list(day) for day in build_day_schedules(items))))
+
+
+def iter_week(index: dict):
+    """Обходит занятия недели по дням и времени"""
+    for day_items in index.values():
+        yield from day_items
@@ -0,0 +1,206 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+from throttling import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты отправки: меньше - раньше
+INTERACTIVE = 0
+BULK = 1
+
+_send_priority = ContextVar('send_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_sends():
+    """Отправки внутри блока (рассылки, напоминания) уступают ответам пользователям"""
+    token = _send_priority.set(BULK)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+
+class _ChatQueue:
+    __slots__ = ('bucket', 'waiters', 'paused_until', 'scheduled')
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.waiters = []  # куча (priority, seq, future)
+        self.paused_until = 0.0
+        self.scheduled = False
+
+
+class SendQueue(BaseRequestMiddleware):
+    """Общая очередь исходящих запросов к Telegram (middleware сессии бота)
+
+    Каждый запрос с chat_id ждет разрешения: не чаще chat_rate в секунду на
+    чат (с запасом chat_burst) и global_rate на бота. Ответы пользователям
+    обгоняют массовые отправки (bulk_sends). TelegramRetryAfter
+    приостанавливает только свой чат и запрос повторяется - остальные чаты
+    продолжают получать сообщения.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, chat_burst: int = 3,
+                 max_retries: int = 3, max_chats: int = 10000, clock=time.monotonic):
+        self._clock = clock
+        self._global = TokenBucket(global_rate, global_rate, clock())
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._max_retries = max_retries
+        self._max_chats = max_chats
+        self._chats = OrderedDict()
+        self._ready = []   # куча (priority, seq, chat_id) - чаты, которым можно отправлять
+        self._timers = []  # куча (ready_at, chat_id) - чаты, ждущие токен или конец паузы
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._pump_task = None
+
+        self.depth = 0
+        self.max_depth = 0
+        self.sent = 0
+        self.retried = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        priority = _send_priority.get()
+        attempt = 0
+        while True:
+            await self._acquire(chat_id, priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if attempt >= self._max_retries:
+                    raise
+                attempt += 1
+                self.retried += 1
+                logger.warning("Flood control for chat %s: retry in %ss", chat_id, e.retry_after)
+                chat = self._chat(chat_id)
+                chat.paused_until = max(chat.paused_until, self._clock() + e.retry_after)
+
+    def _chat(self, chat_id) -> _ChatQueue:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _ChatQueue(TokenBucket(self._chat_rate, self._chat_burst, self._clock()))
+            # Забываем самые давние простаивающие чаты
+            for old_id in list(self._chats):
+                if len(self._chats) <= self._max_chats:
+                    break
+                old = self._chats[old_id]
+                if not old.waiters and not old.scheduled and old_id != chat_id:
+                    del self._chats[old_id]
+        else:
+            self._chats.move_to_end(chat_id)
+        return chat
+
+    async def _acquire(self, chat_id, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        chat = self._chat(chat_id)
+        heapq.heappush(chat.waiters, (priority, next(self._seq), future))
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._schedule(chat_id, chat)
+        if self._pump_task is None:
+            self._pump_task = asyncio.create_task(self._pump())
+
+        started = self._clock()
+        await future
+        waited = self._clock() - started
+        self.sent += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def _schedule(self, chat_id, chat: _ChatQueue):
+        if chat.scheduled or not chat.waiters:
+            return
+        chat.scheduled = True
+        now = self._clock()
+        delay = max(chat.paused_until - now, chat.bucket.wait_time(now))
+        if delay <= 0:
+            priority, seq, _ = chat.waiters[0]
+            heapq.heappush(self._ready, (priority, seq, chat_id))
+        else:
+            heapq.heappush(self._timers, (now + delay, chat_id))
+        self._wakeup.set()
+
+    async def _pump(self):
+        try:
+            while self._ready or self._timers:
+                now = self._clock()
+                while self._timers and self._timers[0][0] <= now:
+                    _, chat_id = heapq.heappop(self._timers)
+                    chat = self._chats[chat_id]
+                    chat.scheduled = False
+                    self._schedule(chat_id, chat)
+
+                if not self._ready:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self._timers[0][0] - now)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                global_wait = self._global.wait_time(now)
+                if global_wait > 0:
+                    await asyncio.sleep(global_wait)
+                    continue
+
+                _, _, chat_id = heapq.heappop(self._ready)
+                chat = self._chats[chat_id]
+                chat.scheduled = False
+                # Отмененные ожидания (хендлер прервали) пропускаем
+                while chat.waiters and chat.waiters[0][2].done():
+                    heapq.heappop(chat.waiters)
+                    self.depth -= 1
+                if not chat.waiters:
+                    continue
+                if chat.paused_until > now:
+                    self._schedule(chat_id, chat)
+                    continue
+
+                self._global.take(now)
+                chat.bucket.take(now)
+                _, _, future = heapq.heappop(chat.waiters)
+                self.depth -= 1
+                future.set_result(None)
+                self._schedule(chat_id, chat)
+        finally:
+            self._pump_task = None
+
+    def stats(self) -> dict:
+        """Глубина очереди и время ожидания отправки"""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "retried": self.retried,
+            "wait_avg": self.wait_total / self.sent if self.sent else 0.0,
+            "wait_max": self.wait_max,
+        }
+
+
+def send_queue_from_config(workers: int = 1) -> SendQueue:
+    """SendQueue с параметрами SEND_* из config.py; общий лимит бота делится между воркерами"""
+    from config import SEND_GLOBAL_RATE, SEND_CHAT_RATE, SEND_CHAT_BURST, SEND_MAX_RETRIES
+
+    return SendQueue(global_rate=SEND_GLOBAL_RATE / workers, chat_rate=SEND_CHAT_RATE,
+                     chat_burst=SEND_CHAT_BURST, max_retries=SEND_MAX_RETRIES)
@@ -15,7 +15,7 @@ print(f"   Ошибка: {result.get('error', 'Нет')}")
 
 # Тест 2: Создание расписания (если пользователь найден)
 if result.get('success'):
-    user_id = result['data']['id']
+    user_id = result['data'].id
     print(f"\n2. Создание занятия для user_id: {user_id}:")
     
     create_result = api.create_schedule_item(
@@ -43,6 +43,6 @@ if result.get('success'):
     if schedule_result.get('success') and schedule_result['data']['items']:
         print("   Пример занятия:")
         for item in schedule_result['data']['items'][:2]:  # Первые 2
-            print(f"     • {item['subject']} ({item['time_start']}-{item['time_end']})")
+            print(f"     • {item.subject} ({item.time_start}-{item.time_end})")
 
 print("\n" + "=" * 60)
\ No newline at end of file
@@ -0,0 +1,381 @@
+import asyncio
+
+from aiohttp import web
+
+from api_client import AsyncScheduleAPIClient
+from fake_backend import start_fake_backend
+
+BATCH_CALLS = web.AppKey("batch_calls", list)
+# [версия], до которой вычищены следы удалений (PrunedVersion в Go)
+PRUNED = web.AppKey("pruned", list)
+
+
+def make_app():
+    app = web.Application()
+    users = {}
+    items = []
+    batch_calls = app[BATCH_CALLS] = []
+    pruned = app[PRUNED] = [0]
+    tombstones = []
+    versions = iter(range(1, 10 ** 6))
+    item_ids = iter(range(1, 10 ** 6))
+
+    def touch(item):
+        item["version"] = next(versions)
+        return item
+
+    def bury(removed):
+        tombstones.extend({"id": item["id"], "user_id": item["user_id"], "version": next(versions)}
+                          for item in removed)
+
+    async def get_user(request):
+        telegram_id = int(request.match_info["telegram_id"])
+        if telegram_id not in users:
+            return web.json_response({"error": "User not found"}, status=404)
+        return web.json_response({"user": users[telegram_id]})
+
+    async def create_user(request):
+        data = await request.json()
+        user = {"id": len(users) + 1, **data}
+        users[data["telegram_id"]] = user
+        return web.json_response({"user": user}, status=201)
+
+    async def list_users(request):
+        return web.json_response({"users": list(users.values())})
+
+    async def create_item(request):
+        data = await request.json()
+        item = touch({"id": next(item_ids), **data})
+        items.append(item)
+        return web.json_response({"item": item}, status=201)
+
+    async def batch_create(request):
+        data = await request.json()
+        created = []
+        for fields in data["items"]:
+            item = touch({"id": next(item_ids), **fields})
+            items.append(item)
+            created.append(item)
+        batch_calls.append(len(created))
+        return web.json_response({"items": created}, status=201)
+
+    async def batch_delete(request):
+        ids = set((await request.json())["ids"])
+        bury(item for item in items if item["id"] in ids)
+        items[:] = [item for item in items if item["id"] not in ids]
+        return web.json_response({"deleted": len(ids)})
+
+    async def get_schedule(request):
+        result = items
+        if "user_id" in request.query:
+            result = [item for item in result if item["user_id"] == int(request.query["user_id"])]
+        if "day" in request.query:
+            result = [item for item in result if item["day_of_week"] == request.query["day"]]
+        if "fields" in request.query:
+            fields = {"id", *request.query["fields"].split(",")}
+            result = [{key: value for key, value in item.items() if key in fields} for item in result]
+        if "limit" not in request.query:
+            return web.json_response({"items": sorted(result, key=lambda item: item["time_start"])})
+        limit, after_id = int(request.query["limit"]), int(request.query["after_id"])
+        page = [item for item in sorted(result, key=lambda item: item["id"]) if item["id"] > after_id]
+        return web.json_response({"items": page[:limit], "has_more": len(page) > limit,
+                                  "next_after_id": page[:limit][-1]["id"] if page else 0})
+
+    async def update_item(request):
+        item_id = int(request.match_info["id"])
+        data = await request.json()
+        for item in items:
+            if item["id"] == item_id:
+                touch(item).update(data)
+                return web.json_response({"item": item})
+        return web.json_response({"error": "Not found"}, status=404)
+
+    async def delete_item(request):
+        item_id = int(request.match_info["id"])
+        bury(item for item in items if item["id"] == item_id)
+        items[:] = [item for item in items if item["id"] != item_id]
+        return web.json_response({"message": "deleted"})
+
+    async def changes(request):
+        since, limit = int(request.query["since"]), int(request.query["limit"])
+        head = max([item["version"] for item in items] + [tombstone["version"] for tombstone in tombstones] + [0])
+        if 0 < since < pruned[0]:
+            return web.json_response({"error": "Cursor expired, reload the schedule", "head": head}, status=410)
+        feed = sorted([(item["version"], "items", item) for item in items] +
+                      [(tombstone["version"], "deleted", tombstone) for tombstone in tombstones
+                       if tombstone["version"] > pruned[0]],
+                      key=lambda change: change[0])
+        feed = [change for change in feed if change[0] > since]
+        page = {"items": [], "deleted": [], "cursor": since, "has_more": len(feed) > limit, "head": head}
+        for version, kind, change in feed[:limit]:
+            page[kind].append(change)
+            page["cursor"] = version
+        return web.json_response(page)
+
+    async def slow(request):
+        await asyncio.sleep(1)
+        return web.json_response({})
+
+    app.router.add_get("/api/users", list_users)
+    app.router.add_get("/api/users/{telegram_id}", get_user)
+    app.router.add_post("/api/users", create_user)
+    app.router.add_post("/api/schedule", create_item)
+    app.router.add_post("/api/schedule/batch", batch_create)
+    app.router.add_delete("/api/schedule/batch", batch_delete)
+    app.router.add_get("/api/schedule", get_schedule)
+    app.router.add_get("/api/schedule/changes", changes)
+    app.router.add_get("/api/schedule/{id}", slow)
+    app.router.add_put("/api/schedule/{id}", update_item)
+    app.router.add_delete("/api/schedule/{id}", delete_item)
+    return app
+
+
+async def with_client(scenario):
+    app = make_app()
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    client = AsyncScheduleAPIClient(f"http://127.0.0.1:{port}", limit=4)
+    client.app = app
+    try:
+        return await scenario(client)
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+def test_user_and_schedule_envelopes():
+    async def scenario(client):
+        missing = await client.get_user_by_telegram_id(42)
+        assert missing == {"success": False, "error": "User not found"}
+
+        created = await client.get_or_create_user(42, "user", "Имя")
+        assert created["success"] and created["data"].telegram_id == 42
+
+        cached = await client.get_user_by_telegram_id(42)
+        assert cached == created
+        assert client.user_cache.hits == 1
+
+        user_id = created["data"].id
+        await client.create_schedule_item(user_id, "monday", "10:00", "11:30", "Математика")
+        await client.create_schedule_item(user_id, "monday", "08:00", "09:30", "Физика")
+        await client.create_schedule_item(user_id + 1, "monday", "08:00", "09:30", "Чужое")
+
+        schedule = await client.get_user_schedule(user_id, "monday")
+        assert schedule["success"]
+        assert [item.subject for item in schedule["data"]["items"]] == ["Физика", "Математика"]
+
+        await client.create_schedule_item(user_id, "tuesday", "09:00", "10:00", "Химия")
+        week = await client.get_user_schedule(user_id)
+        assert [item.subject for item in week["data"]["items"]] == ["Физика", "Математика", "Химия"]
+        assert client.schedule_cache.stats()["hits"] == 1
+
+    asyncio.run(with_client(scenario))
+
+
+def test_per_call_timeout_returns_error_envelope():
+    async def scenario(client):
+        result = await client.get_schedule_by_id(1, timeout=0.05)
+        assert result["success"] is False
+        assert result["error"]
+
+    asyncio.run(with_client(scenario))
+
+
+def test_batch_methods_chunk_and_update_cache():
+    async def scenario(client):
+        await client.get_user_schedule(1)
+        new_items = [
+            {"user_id": 1, "day_of_week": "monday", "time_start": f"{8 + i}:00",
+             "time_end": f"{8 + i}:45", "subject": f"Урок {i}"}
+            for i in range(5)
+        ]
+        created = await client.batch_create_schedule_items(new_items, chunk_size=2)
+        assert created["success"] and len(created["data"]["items"]) == 5
+        assert client.app[BATCH_CALLS] == [2, 2, 1]
+        assert len((await client.get_user_schedule(1))["data"]["items"]) == 5
+
+        deleted = await client.batch_delete_schedule_items([1, 2, 3])
+        assert deleted == {"success": True, "data": {"deleted": 3}}
+        assert len((await client.get_user_schedule(1))["data"]["items"]) == 2
+
+    asyncio.run(with_client(scenario))
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def add_user(self, user):
+        self.events.append(("add_user", user.telegram_id))
+
+    def add_item(self, item):
+        self.events.append(("add_item", item.subject))
+
+    def remove_item(self, schedule_id):
+        self.events.append(("remove_item", schedule_id))
+
+
+def test_listeners_receive_changes():
+    async def scenario(client):
+        recorder = Recorder()
+        client.add_listener(recorder)
+
+        user = (await client.get_or_create_user(7))["data"]
+        item = (await client.create_schedule_item(user.id, "friday", "12:00", "13:00", "Право"))["data"]
+        # Подписчик без patch_item просто не получает это событие
+        await client.update_schedule_item(item.id, {"subject": "Право 2"})
+        await client.delete_schedule_item(item.id)
+
+        assert recorder.events == [("add_user", 7), ("add_item", "Право"), ("remove_item", item.id)]
+
+        users = await client.get_all_users()
+        assert [u.telegram_id for u in users["data"]["users"]] == [7]
+
+    asyncio.run(with_client(scenario))
+
+
+def test_sync_schedule_changes_pages_and_applies():
+    async def scenario(client):
+        await client.batch_create_schedule_items([
+            {"user_id": 1, "day_of_week": "monday", "time_start": f"{9 + i}:00", "time_end": f"{9 + i}:45",
+             "subject": f"Урок {i}"} for i in range(3)])
+        synced = await client.sync_schedule_changes()
+        cursor = synced["data"]["cursor"]
+        assert synced["data"]["changed"] == 3
+
+        # Кэш недели пользователя и подписчик получают изменения, сделанные в обход клиента
+        await client.get_user_schedule(1)
+        recorder = Recorder()
+        client.add_listener(recorder)
+        other = AsyncScheduleAPIClient(client.base_url)
+        try:
+            await other.update_schedule_item(1, {"subject": "Урок 0 (перенос)"})
+            await other.batch_delete_schedule_items([2])
+            await other.create_schedule_item(1, "tuesday", "10:00", "11:00", "Новый")
+        finally:
+            await other.close()
+
+        synced = await client.sync_schedule_changes(cursor, limit=1)
+        assert synced["success"]
+        assert synced["data"]["changed"] == 2 and synced["data"]["deleted"] == 1
+        assert recorder.events == [("add_item", "Урок 0 (перенос)"), ("remove_item", 2), ("add_item", "Новый")]
+        week = client.schedule_cache.get(1)
+        assert [item.subject for item in week] == ["Урок 0 (перенос)", "Урок 2", "Новый"]
+
+        # Повторная синхронизация с нового курсора ничего не меняет
+        again = await client.sync_schedule_changes(synced["data"]["cursor"])
+        assert again["data"] == {"cursor": synced["data"]["cursor"], "changed": 0, "deleted": 0}
+
+    asyncio.run(with_client(scenario))
+
+
+def test_expired_cursor_reports_head_and_fresh_sync_works():
+    async def scenario(client):
+        await client.batch_create_schedule_items([
+            {"user_id": 1, "day_of_week": "monday", "time_start": f"{9 + i}:00", "time_end": f"{9 + i}:45",
+             "subject": f"Урок {i}"} for i in range(3)])
+        await client.batch_delete_schedule_items([1])
+        # Следы удалений вычищены: старый курсор устарел
+        client.app[PRUNED][0] = 4
+
+        expired = await client.sync_schedule_changes(2)
+        assert not expired["success"] and expired["expired"]
+        assert expired["head"] == 4
+        assert expired["data"] == {"cursor": 2, "changed": 0, "deleted": 0}
+
+        # Новый клиент (since=0) получает живые занятия, удалений ему пропускать нечего
+        fresh = await client.sync_schedule_changes(0)
+        assert fresh["success"]
+        assert fresh["data"] == {"cursor": 3, "changed": 2, "deleted": 0}
+
+        resumed = await client.sync_schedule_changes(expired["head"])
+        assert resumed["success"] and resumed["data"]["changed"] == 0
+
+    asyncio.run(with_client(scenario))
+
+
+def test_follow_schedule_changes_applies_other_instances_edits():
+    async def scenario(client):
+        await client.batch_create_schedule_items([
+            {"user_id": 1, "day_of_week": "monday", "time_start": "09:00", "time_end": "09:45", "subject": "Урок"}])
+        await client.get_user_schedule(1)
+        recorder = Recorder()
+        client.add_listener(recorder)
+        follower = asyncio.create_task(client.follow_schedule_changes(0.01))
+        await asyncio.sleep(0.05)
+
+        other = AsyncScheduleAPIClient(client.base_url)
+        try:
+            await other.update_schedule_item(1, {"subject": "Урок (перенос)"})
+        finally:
+            await other.close()
+        while not recorder.events:
+            await asyncio.sleep(0.01)
+        follower.cancel()
+
+        # Старые изменения (создание) не переигрываются - только правка другого экземпляра
+        assert recorder.events == [("add_item", "Урок (перенос)")]
+        assert [item.subject for item in client.schedule_cache.get(1)] == ["Урок (перенос)"]
+
+    asyncio.run(with_client(scenario))
+
+def test_iter_schedule_items_streams_pages():
+    async def scenario(client):
+        await client.batch_create_schedule_items([
+            {"user_id": 1 + i % 2, "day_of_week": "monday", "time_start": f"{8 + i}:00", "time_end": f"{8 + i}:30",
+             "subject": f"Урок {i}", "description": "длинное описание"} for i in range(5)])
+
+        pages = []
+        original = client._request
+
+        async def spy(method, path, timeout=None, **kwargs):
+            pages.append(dict(kwargs["params"]))
+            return await original(method, path, timeout, **kwargs)
+
+        client._request = spy
+        fields = ("user_id", "day_of_week", "time_start", "time_end")
+        items = [item async for item in client.iter_schedule_items(user_id=1, fields=fields, page_size=2)]
+        assert [item.id for item in items] == [1, 3, 5]
+        assert all(item.description == "" for item in items)
+        assert [page["after_id"] for page in pages] == [0, 3]
+
+        everything = await client.get_all_schedule_items()
+        assert len(everything["data"]["items"]) == 5
+        assert everything["data"]["items"][0].description == "длинное описание"
+
+    asyncio.run(with_client(scenario))
+
+
+def test_batch_update_checks_overlaps_of_the_final_set():
+    async def scenario():
+        runner, base_url = await start_fake_backend()
+        client = AsyncScheduleAPIClient(base_url)
+        try:
+            user = await client.get_or_create_user(51_001, "tester")
+            created = await client.batch_create_schedule_items([
+                {"user_id": user["data"].id, "day_of_week": "monday", "time_start": start,
+                 "time_end": end, "subject": subject}
+                for start, end, subject in (("09:00", "10:00", "Алгебра"), ("10:00", "11:00", "Физика"),
+                                            ("12:00", "13:00", "Химия"))
+            ])
+            first, second, _ = (item.id for item in created["data"]["items"])
+            # Обмен временем: каждое занятие по отдельности пересекается со старым временем другого
+            swapped = await client.batch_update_schedule_items([
+                {"id": first, "time_start": "10:00", "time_end": "11:00"},
+                {"id": second, "time_start": "09:00", "time_end": "10:00"},
+            ])
+            clash = await client.batch_update_schedule_items([{"id": first, "time_start": "12:30",
+                                                               "time_end": "13:30"}])
+            return swapped, clash
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    swapped, clash = asyncio.run(scenario())
+    assert swapped["success"]
+    assert [(item.subject, item.time_start) for item in swapped["data"]["items"]] == [("Алгебра", "10:00"),
+                                                                                       ("Физика", "09:00")]
+    assert not clash["success"] and clash["error"] == "Status: 409"
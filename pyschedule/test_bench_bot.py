@@ -0,0 +1,33 @@
+import asyncio
+
+from bench_bot import percentile, run_benchmark
+from fake_backend import start_fake_backend
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+    assert percentile([], 50) == 0.0
+
+
+def test_benchmark_drives_real_router():
+    async def scenario():
+        runner, base_url = await start_fake_backend()
+        try:
+            # Не больше THROTTLE_BURST апдейтов на пользователя - троттлинг не срабатывает
+            return await run_benchmark(base_url, users=6, lessons=10, rounds=1, concurrency=3,
+                                       flows=["show_day", "statistics", "delete"])
+        finally:
+            await runner.cleanup()
+
+    report = asyncio.run(scenario())
+
+    assert report["errors"] == {}
+    assert report["handlers"]["cmd_start"]["count"] == 6
+    assert sum(row["count"] for row in report["flows"].values()) == 6
+    assert report["throttling"]["dropped"] == 0
+    assert report["telegram_calls"]["SendMessage"] >= 12
+    for row in report["handlers"].values():
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
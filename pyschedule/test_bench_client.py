@@ -0,0 +1,29 @@
+import json
+
+from bench_client import compare, main, run
+
+
+def test_run_measures_selected_benchmarks():
+    result = run(["decode_items[10]", "get_user_schedule[cached]"], rounds=2, min_time=0.01)
+
+    assert set(result["benchmarks"]) == {"decode_items[10]", "get_user_schedule[cached]"}
+    decode = result["benchmarks"]["decode_items[10]"]
+    assert decode["min"] <= decode["median"]
+    assert decode["per_item"] == decode["median"] / 10
+    assert "per_item" not in result["benchmarks"]["get_user_schedule[cached]"]
+
+
+def test_compare_flags_regressions_against_baseline(tmp_path):
+    baseline = {"benchmarks": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+    current = {"benchmarks": {"a": {"median": 1.5}, "b": {"median": 1.05}, "new": {"median": 1.0}}}
+
+    comparison = compare(current, baseline, threshold=20)
+    assert set(comparison["changes"]) == {"a", "b"}
+    assert list(comparison["regressions"]) == ["a"]
+
+    # --save пишет baseline, следующий прогон сравнивается с ним
+    path = tmp_path / "client.json"
+    args = ["-k", "decode_items[10]", "--rounds", "1", "--min-time", "0.01", "--baseline", str(path)]
+    assert main(args + ["--save"]) == 0
+    assert "decode_items[10]" in json.loads(path.read_text())["benchmarks"]
+    assert main(args + ["--threshold", "1000"]) == 0
@@ -0,0 +1,86 @@
+from api_client import ScheduleCache, TTLCache
+from models import ScheduleItem
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry_counts_as_miss():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set(1, {"id": 1})
+
+    assert cache.get(1) == {"id": 1}
+    clock.now = 5
+    assert cache.get(1) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert len(cache) == 0
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_invalidate():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert cache.get("a") is None
+
+
+def make_item(schedule_id, day, start, user_id=1):
+    return ScheduleItem.from_dict({"id": schedule_id, "user_id": user_id, "day_of_week": day,
+                                   "time_start": start, "time_end": "23:00", "subject": "Урок"})
+
+
+def test_schedule_cache_filters_day_from_week():
+    cache = ScheduleCache()
+    assert cache.get(1) is None
+
+    cache.store(1, [make_item(1, "monday", "12:00"), make_item(2, "tuesday", "09:00"),
+                    make_item(3, "monday", "08:00")])
+
+    assert [item.id for item in cache.get(1, "monday")] == [3, 1]
+    assert len(cache.get(1)) == 3
+    assert cache.stats()["hit_ratio"] == 2 / 3
+
+
+def test_schedule_cache_patches_writes_in_place():
+    cache = ScheduleCache()
+    cache.store(1, [make_item(1, "monday", "12:00")])
+
+    cache.add_item(make_item(2, "monday", "08:00"))
+    cache.add_item(make_item(3, "monday", "07:00", user_id=2))
+    assert [item.id for item in cache.get(1)] == [2, 1]
+
+    cache.patch_item(1, {"time_start": "07:00"})
+    assert [item.id for item in cache.get(1)] == [1, 2]
+
+    cache.remove_item(2)
+    assert [item.id for item in cache.get(1)] == [1]
+    assert cache.get(2) is None
+
+
+def test_schedule_cache_eviction_forgets_owners():
+    cache = ScheduleCache(maxsize=1)
+    cache.store(1, [make_item(1, "monday", "12:00")])
+    cache.store(2, [make_item(2, "monday", "12:00", user_id=2)])
+
+    assert cache.get(1) is None
+    assert 1 not in cache._owners
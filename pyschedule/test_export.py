@@ -0,0 +1,96 @@
+import asyncio
+import csv
+import io
+import json
+import os
+from datetime import date
+
+from api_client import AsyncScheduleAPIClient
+from export import _ics_line, export_all, export_items, write_ics
+from fake_backend import start_fake_backend
+from models import parse_items
+
+ITEMS = parse_items([
+    {"id": 2, "user_id": 1, "day_of_week": "wednesday", "time_start": "9:00", "time_end": "10:30",
+     "subject": "Физика, лаб.", "description": "ауд. 101; корпус 2"},
+    {"id": 1, "user_id": 1, "day_of_week": "monday", "time_start": "08:00", "time_end": "09:30",
+     "subject": "Математика", "description": ""},
+])
+
+
+def test_ics_weekly_events():
+    out = io.StringIO()
+    write_ics(ITEMS, out, week_start=date(2026, 10, 19))
+    text = out.getvalue()
+
+    assert text.startswith("BEGIN:VCALENDAR\r\n")
+    assert text.count("BEGIN:VEVENT") == 2
+    assert "DTSTART:20261021T090000\r\n" in text
+    assert "RRULE:FREQ=WEEKLY;BYDAY=WE" in text
+    assert "SUMMARY:Физика\\, лаб." in text
+    assert "DESCRIPTION:ауд. 101\\; корпус 2" in text
+
+
+def test_ics_long_lines_are_folded():
+    out = io.StringIO()
+    _ics_line(out, "SUMMARY:" + "Ж" * 100)
+    lines = out.getvalue().split("\r\n")[:-1]
+
+    assert len(lines) > 1
+    assert all(len(line.encode("utf-8")) <= 75 for line in lines)
+    assert "".join(line[1:] if i else line for i, line in enumerate(lines)) == "SUMMARY:" + "Ж" * 100
+
+
+def test_csv_and_json_are_ordered_by_week():
+    rows = list(csv.DictReader(io.TextIOWrapper(export_items(ITEMS, "csv"), encoding="utf-8")))
+    assert [row["id"] for row in rows] == ["1", "2"]
+
+    data = json.load(export_items(ITEMS, "json"))
+    assert [item["subject"] for item in data] == ["Математика", "Физика, лаб."]
+
+
+class PagedClient:
+    def __init__(self, items):
+        self.items = items
+        self.requested = []
+
+    def iter_schedule_items(self, by_user=False):
+        self.requested.append(by_user)
+        return iter(sorted(self.items, key=lambda item: (item.user_id, item.id)))
+
+
+def test_export_all_is_one_scan_split_by_user(tmp_path):
+    items = ITEMS + parse_items([
+        {"id": 3, "user_id": 2, "day_of_week": "friday", "time_start": "12:00", "time_end": "13:00",
+         "subject": "История", "description": ""},
+    ])
+    client = PagedClient(items)
+
+    assert export_all(client, "csv", str(tmp_path)) == 2
+    assert client.requested == [True]
+    assert sorted(os.listdir(tmp_path)) == ["schedule_1.csv", "schedule_2.csv"]
+    with open(tmp_path / "schedule_1.csv", encoding="utf-8") as f:
+        assert [row["id"] for row in csv.DictReader(f)] == ["1", "2"]
+
+
+def test_iter_by_user_pages_with_composite_cursor():
+    async def scenario():
+        runner, base_url = await start_fake_backend()
+        client = AsyncScheduleAPIClient(base_url)
+        try:
+            users = [(await client.get_or_create_user(telegram_id, "tester"))["data"].id
+                     for telegram_id in (41_001, 41_002)]
+            # Занятия второго пользователя получают меньшие id, чем у первого
+            for user_id in reversed(users):
+                await client.batch_create_schedule_items([
+                    {"user_id": user_id, "day_of_week": "monday", "time_start": f"{hour:02d}:00",
+                     "time_end": f"{hour:02d}:45", "subject": f"Урок {hour}"} for hour in (8, 9, 10)
+                ])
+            return [(item.user_id, item.id) async for item in client.iter_schedule_items(page_size=2, by_user=True)]
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    keys = asyncio.run(scenario())
+    assert keys == sorted(keys) and len(keys) == 6
+    assert [key[1] for key in keys] != sorted(key[1] for key in keys)
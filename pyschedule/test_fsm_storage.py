@@ -0,0 +1,136 @@
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+
+from fsm_storage import MemoryRecordStore, PersistentStorage, SQLiteRecordStore
+from handlers import EditScheduleForm, ScheduleForm
+
+
+def storage_key(user_id):
+    return StorageKey(bot_id=42, chat_id=user_id, user_id=user_id)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_writes_are_batched_until_flush():
+    async def scenario():
+        store = MemoryRecordStore()
+        storage = PersistentStorage(store, flush_interval=60)
+        key = storage_key(1)
+
+        await storage.set_state(key, ScheduleForm.time_start)
+        await storage.update_data(key, {"day": "monday"})
+        assert await storage.get_state(key) == ScheduleForm.time_start.state
+        assert await storage.get_data(key) == {"day": "monday"}
+        assert store.records == {}
+
+        await storage.flush()
+        (state, data, _), = store.records.values()
+        assert (state, data) == (ScheduleForm.time_start.state, {"day": "monday"})
+
+        # state.clear() удаляет запись целиком
+        await storage.set_state(key, None)
+        await storage.set_data(key, {})
+        await storage.close()
+        assert store.records == {}
+
+    asyncio.run(scenario())
+
+
+def test_max_pending_forces_flush():
+    async def scenario():
+        store = MemoryRecordStore()
+        storage = PersistentStorage(store, flush_interval=60, max_pending=3)
+        for user_id in range(3):
+            await storage.set_state(storage_key(user_id), ScheduleForm.day)
+        assert len(store.records) == 3
+        await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_abandoned_dialogs_expire():
+    async def scenario():
+        clock = FakeClock()
+        store = MemoryRecordStore()
+        storage = PersistentStorage(store, ttl=600, purge_interval=60, clock=clock)
+        old, fresh = storage_key(1), storage_key(2)
+
+        await storage.set_state(old, EditScheduleForm.entering_value)
+        await storage.flush()
+        clock.now += 500
+        await storage.set_state(fresh, ScheduleForm.subject)
+        clock.now += 200
+
+        assert await storage.get_state(old) is None
+        assert await storage.get_state(fresh) == ScheduleForm.subject.state
+
+        await storage.flush()
+        assert len(store.records) == 1
+        await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_survives_restart_with_bounded_cache(tmp_path):
+    path = str(tmp_path / "fsm.sqlite3")
+
+    async def write():
+        storage = PersistentStorage(SQLiteRecordStore(path), cache_size=2)
+        for user_id in range(10):
+            await storage.set_state(storage_key(user_id), ScheduleForm.description)
+            await storage.update_data(storage_key(user_id), {"subject": f"Предмет {user_id}"})
+        assert len(storage._cache) == 2
+        await storage.close()
+
+    async def read():
+        storage = PersistentStorage(SQLiteRecordStore(path))
+        assert await storage.get_state(storage_key(7)) == ScheduleForm.description.state
+        assert await storage.get_data(storage_key(7)) == {"subject": "Предмет 7"}
+        assert await storage.get_state(storage_key(99)) is None
+        await storage.close()
+
+    asyncio.run(write())
+    asyncio.run(read())
+
+
+def test_other_instance_writes_are_seen_after_cache_ttl():
+    async def scenario():
+        clock = FakeClock()
+        store = MemoryRecordStore()
+        first = PersistentStorage(store, cache_ttl=1, clock=clock)
+        second = PersistentStorage(store, cache_ttl=1, clock=clock)
+        key = storage_key(1)
+
+        # Промах не кэшируется: запись другого экземпляра видна сразу
+        assert await first.get_state(key) is None
+        await second.set_state(key, ScheduleForm.day)
+        await second.flush()
+        assert await first.get_state(key) == ScheduleForm.day.state
+
+        await second.set_state(key, ScheduleForm.subject)
+        await second.flush()
+        clock.now += 2
+        assert await first.get_state(key) == ScheduleForm.subject.state
+        await first.close()
+        await second.close()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_state_counts_exclude_pending_keys(tmp_path):
+    async def scenario():
+        store = SQLiteRecordStore(str(tmp_path / "fsm.sqlite3"))
+        await store.save_many([("a", "Form:day", {}, 10.0), ("b", "Form:day", {}, 10.0)])
+        try:
+            return await store.state_counts(0), await store.state_counts(0, exclude={"a"})
+        finally:
+            await store.close()
+
+    assert asyncio.run(scenario()) == ({"Form:day": 2}, {"Form:day": 1})
@@ -0,0 +1,74 @@
+import asyncio
+
+from aiogram import Bot
+
+from bench_bot import BENCH_TOKEN, SimUser, StubSession, router_dispatcher
+from fake_backend import FAKE_BACKEND, start_fake_backend
+
+
+async def start_router(telegram_id: int, items: list):
+    """FakeBackend с пользователем и его занятиями + симулированный пользователь бота"""
+    import handlers
+
+    runner, base_url = await start_fake_backend()
+    handlers.api_client.base_url = base_url
+    handlers.api_client.user_cache.clear()
+    handlers.api_client.schedule_cache.clear()
+    user = await handlers.api_client.get_or_create_user(telegram_id, "tester")
+    created = await handlers.api_client.batch_create_schedule_items(
+        [{**item, "user_id": user["data"].id} for item in items])
+    assert created.get("success"), created
+
+    session = StubSession()
+    sim = SimUser(router_dispatcher(), Bot(BENCH_TOKEN, session=session), session, telegram_id)
+    return runner, sim, [item.id for item in created["data"]["items"]]
+
+
+async def stop_router(runner):
+    import handlers
+
+    await handlers.api_client.close()
+    await runner.cleanup()
+
+
+def test_edit_time_into_overlap_warns_and_saves():
+    async def scenario():
+        runner, user, (first, second) = await start_router(31_001, [
+            {"day_of_week": "monday", "time_start": "10:00", "time_end": "11:00", "subject": "Алгебра"},
+            {"day_of_week": "monday", "time_start": "12:00", "time_end": "13:00", "subject": "Физика"},
+        ])
+        try:
+            await user.send("Редактировать занятие")
+            assert await user.click(f"select_edit_{second}")
+            assert await user.click("edit_field_time_start")
+            await user.send("10:30")
+            confirmation = user.session.last_text[user.telegram_id]
+            assert await user.click("confirm_edit")
+            return confirmation, user.session.last_text[user.telegram_id], runner.app[FAKE_BACKEND].items[second]
+        finally:
+            await stop_router(runner)
+
+    confirmation, reply, item = asyncio.run(scenario())
+    assert "Поле: time_start" in confirmation
+    assert "Алгебра (10:00-11:00)" in confirmation
+    assert reply.startswith("✅")
+    assert item["time_start"] == "10:30" and item["time_end"] == "13:00"
+
+
+def test_edit_end_before_start_is_rejected():
+    async def scenario():
+        runner, user, (item_id,) = await start_router(31_002, [
+            {"day_of_week": "friday", "time_start": "10:00", "time_end": "11:00", "subject": "Химия"},
+        ])
+        try:
+            await user.send("Редактировать занятие")
+            assert await user.click(f"select_edit_{item_id}")
+            assert await user.click("edit_field_time_end")
+            await user.send("09:00")
+            return user.session.last_text[user.telegram_id], runner.app[FAKE_BACKEND].items[item_id]
+        finally:
+            await stop_router(runner)
+
+    reply, item = asyncio.run(scenario())
+    assert reply == "❌ Время окончания должно быть позже времени начала"
+    assert item["time_end"] == "11:00"
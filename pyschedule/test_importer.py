@@ -0,0 +1,83 @@
+import csv
+import io
+
+from export import export_items
+from importer import import_items, parse_csv
+from models import parse_items
+
+ITEMS = parse_items([
+    {"id": 1, "user_id": 1, "day_of_week": "monday", "time_start": "9:00", "time_end": "10:30",
+     "subject": "Физика, лаб.", "description": "ауд. 101; корпус 2\nвторая строка " + "ж" * 60},
+    {"id": 2, "user_id": 1, "day_of_week": "friday", "time_start": "14:00", "time_end": "15:30",
+     "subject": "Математика", "description": ""},
+])
+
+
+def roundtrip(fmt):
+    buffer = export_items(ITEMS, fmt)
+    return import_items(io.TextIOWrapper(buffer, encoding="utf-8", newline=""), fmt, user_id=7)
+
+
+def test_csv_and_ics_roundtrip_through_export():
+    for fmt in ("csv", "ics"):
+        items, errors = roundtrip(fmt)
+        assert errors == []
+        assert [(i["day_of_week"], i["subject"], i["user_id"]) for i in items] == [
+            ("monday", "Физика, лаб.", 7), ("friday", "Математика", 7)
+        ]
+        assert items[0]["description"] == ITEMS[0].description
+
+
+def test_csv_rows_are_validated():
+    lines = io.StringIO(
+        "day_of_week,time_start,time_end,subject\n"
+        "Понедельник,08:00,09:00,Химия\n"
+        "вторник,25:00,26:00,Ошибка\n"
+        "funday,08:00,09:00,Ошибка\n"
+        "ср,10:00,09:00,Ошибка\n"
+    )
+    results = list(parse_csv(lines))
+
+    assert results[0][1]["day_of_week"] == "monday"
+    assert [row for row, item, error in results if error] == [3, 4, 5]
+
+
+def test_import_limit():
+    lines = io.StringIO("day_of_week,time_start,time_end,subject\n" +
+                        "".join(f"пн,{hour:02d}:00,{hour:02d}:45,Урок\n" for hour in (8, 9, 10)))
+    items, errors = import_items(lines, "csv", user_id=1, max_items=2)
+    assert len(items) == 2
+    assert len(errors) == 1
+
+
+def test_csv_parse_error_is_reported_as_row_error():
+    field = "ж" * (csv.field_size_limit() + 1)
+    lines = io.StringIO(
+        "day_of_week,time_start,time_end,subject,description\n"
+        "Понедельник,08:00,09:00,Химия,\n"
+        f"Вторник,08:00,09:00,Физика,{field}\n"
+    )
+    items, errors = import_items(lines, "csv", user_id=1)
+
+    assert [item["subject"] for item in items] == ["Химия"]
+    assert len(errors) == 1
+    assert errors[0][0] == 3 and errors[0][1].startswith("ошибка разбора CSV")
+
+
+def test_overlapping_rows_are_reported_before_batch_create():
+    lines = io.StringIO(
+        "day_of_week,time_start,time_end,subject\n"
+        "пн,10:00,11:00,Химия\n"
+        "пн,10:30,11:30,Биология\n"
+        "пн,11:00,12:00,Логика\n"
+        "пт,15:00,16:00,История\n"
+    )
+    items, errors = import_items(lines, "csv", user_id=1, existing=ITEMS)
+
+    # Химия задевает существующую Физику, Логика - принятую выше Биологию
+    assert [item["subject"] for item in items] == ["Биология"]
+    assert errors == [
+        (2, "пересекается с Физика, лаб. (09:00-10:30)"),
+        (4, "пересекается с Биология (10:30-11:30)"),
+        (5, "пересекается с Математика (14:00-15:30)"),
+    ]
@@ -0,0 +1,79 @@
+import random
+
+from intervals import DaySchedule, build_day_schedules, find_free_slots, find_free_slots_many
+from models import ScheduleItem, parse_time
+
+
+def lesson(item_id, start, end, day=0):
+    return ScheduleItem(id=item_id, user_id=1, day=day, start=parse_time(start), end=parse_time(end),
+                        subject=f"Урок {item_id}")
+
+
+def test_integer_ordering_puts_9_before_10():
+    day = DaySchedule([lesson(1, "10:00", "11:00"), lesson(2, "9:00", "9:45")])
+    assert [item.id for item in day] == [2, 1]
+
+
+def test_conflicts_and_gaps():
+    day = DaySchedule([lesson(1, "08:00", "09:30"), lesson(2, "10:00", "11:30"), lesson(3, "13:00", "14:00")])
+
+    assert [item.id for item in day.conflicts(parse_time("09:00"), parse_time("10:15"))] == [1, 2]
+    assert day.conflicts(parse_time("09:30"), parse_time("10:00")) == []
+    assert day.gaps(parse_time("11:45"), parse_time("12:30")) == (15, 30)
+    assert day.gaps(parse_time("07:00"), parse_time("07:30")) == (None, 30)
+
+    # Редактирование занятия не конфликтует само с собой
+    assert day.conflicts(parse_time("10:30"), parse_time("12:00"), ignore_id=2) == []
+
+
+def test_long_earlier_lesson_is_found():
+    day = DaySchedule([lesson(1, "08:00", "18:00"), lesson(2, "09:00", "09:30")])
+    assert [item.id for item in day.conflicts(parse_time("12:00"), parse_time("13:00"))] == [1]
+    assert day.gaps(parse_time("19:00"), parse_time("20:00")) == (60, None)
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    items = []
+    for item_id in range(60):
+        start = rng.randrange(0, 1380)
+        items.append(ScheduleItem(id=item_id, user_id=1, day=0, start=start,
+                                  end=start + rng.randrange(5, 180), subject=""))
+    day = DaySchedule(items[:30])
+    for item in items[30:]:
+        day.add(item)
+    day.remove(0)
+    alive = items[1:]
+
+    for _ in range(200):
+        start = rng.randrange(0, 1400)
+        end = start + rng.randrange(1, 120)
+        expected = {item.id for item in alive if item.start < end and item.end > start}
+        assert {item.id for item in day.conflicts(start, end)} == expected
+
+
+def test_build_day_schedules():
+    days = build_day_schedules([lesson(1, "08:00", "09:00", day=2), lesson(2, "08:00", "09:00", day=2)])
+    assert [len(day) for day in days] == [0, 0, 2, 0, 0, 0, 0]
+
+
+def test_free_windows_merge_overlapping_lessons():
+    day = DaySchedule([lesson(1, "09:00", "11:00"), lesson(2, "10:00", "10:30"), lesson(3, "12:00", "13:00")])
+    windows = day.free_windows(parse_time("08:00"), parse_time("14:00"))
+    assert windows == [(parse_time("08:00"), parse_time("09:00")),
+                       (parse_time("11:00"), parse_time("12:00")),
+                       (parse_time("13:00"), parse_time("14:00"))]
+
+
+def test_find_free_slots_by_duration_and_days():
+    items = [lesson(1, "08:00", "12:00", day=0), lesson(2, "13:00", "22:00", day=0), lesson(3, "10:00", "11:00", day=2)]
+    slots = find_free_slots(items, 90, days=[0, 2], day_start=parse_time("08:00"), day_end=parse_time("22:00"))
+
+    assert slots[0] == []
+    assert slots[2] == [(parse_time("08:00"), parse_time("10:00")), (parse_time("11:00"), parse_time("22:00"))]
+    assert set(slots) == {0, 2}
+
+    many = find_free_slots_many({1: items, 2: []}, 60, days=[0])
+    assert many[2][0] == [(0, 24 * 60)]
+    assert many[1][0] == [(0, parse_time("08:00")), (parse_time("12:00"), parse_time("13:00")),
+                          (parse_time("22:00"), 24 * 60)]
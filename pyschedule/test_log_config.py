@@ -0,0 +1,98 @@
+import io
+import json
+import logging
+
+from log_config import SamplingFilter, parse_pairs, setup_logging, stop_logging
+from tracing import Tracer
+
+
+class Payload:
+    """Считает, сколько раз запись форматировала аргумент"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "payload"
+
+
+class NullSink:
+    def emit(self, record):
+        pass
+
+    def flush(self):
+        pass
+
+
+def test_parse_pairs_and_sampling():
+    assert parse_pairs(" api_client=DEBUG, aiogram.event=WARNING ,") == {"api_client": "DEBUG",
+                                                                        "aiogram.event": "WARNING"}
+    rolls = iter([0.05, 0.5])
+    sampling = SamplingFilter({"aiogram.event": 0.1}, random=lambda: next(rolls))
+
+    def record(name, level=logging.INFO):
+        return logging.LogRecord(name, level, "", 0, "msg", (), None)
+
+    assert sampling.filter(record("aiogram.event.update"))
+    assert not sampling.filter(record("aiogram.event"))
+    # Ошибки и другие логгеры не отбрасываются
+    assert sampling.filter(record("aiogram.event", logging.ERROR))
+    assert sampling.filter(record("handlers"))
+
+
+def test_json_lines_levels_and_lazy_formatting():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    level = root.level
+    setup_logging("INFO", "json", levels={"test_log_config.noisy": "WARNING"}, stream=stream)
+    try:
+        logger = logging.getLogger("test_log_config")
+        noisy = logging.getLogger("test_log_config.noisy")
+        payload = Payload()
+
+        logger.debug("Schedule data: %s", payload)
+        noisy.info("Schedule data: %s", payload)
+        # Отфильтрованная по уровню запись не форматирует аргументы
+        assert payload.formatted == 0
+
+        logger.info("User %s started bot", 42, extra={"user_id": 42})
+        with Tracer(NullSink(), sample_rate=1).start_trace("message") as root_span:
+            logger.warning("Payload: %s", payload)
+    finally:
+        stop_logging()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.setLevel(level)
+        logging.getLogger("test_log_config.noisy").setLevel(logging.NOTSET)
+
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first["level"] == "INFO" and first["logger"] == "test_log_config"
+    assert first["msg"] == "User 42 started bot" and first["user_id"] == 42
+    assert second["msg"] == "Payload: payload" and second["trace_id"] == root_span.trace_id
+    assert payload.formatted == 1
+
+
+def test_message_and_exception_are_captured_at_call_site():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    level = root.level
+    setup_logging("INFO", "json", stream=stream)
+    try:
+        logger = logging.getLogger("test_log_config")
+        state = {"step": 1}
+        logger.info("State: %s", state)
+        state["step"] = 2
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Failed")
+    finally:
+        stop_logging()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.setLevel(level)
+
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first["msg"] == "State: {'step': 1}"
+    assert second["msg"] == "Failed" and "ValueError: boom" in second["exc"]
@@ -0,0 +1,108 @@
+import asyncio
+
+import aiohttp
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiohttp import web
+
+from api_client import AsyncScheduleAPIClient, TTLCache
+from fsm_storage import MemoryRecordStore, PersistentStorage
+from metrics import (
+    API_REQUESTS, LOOP_LAG, MetricsServer, Registry, api_trace_config, cache_collector, endpoint_template,
+    fsm_state_counts, record_api_request
+)
+
+
+def test_endpoint_template_and_render_format():
+    assert endpoint_template("/api/schedule/42?allow_overlap=1") == "/api/schedule/{id}"
+    assert endpoint_template("/api/users/100") == "/api/users/{id}"
+    assert endpoint_template("/api/schedule/batch") == "/api/schedule/batch"
+
+    registry = Registry()
+    requests_total = registry.counter("requests_total", "Запросы", ("path",))
+    latency = registry.histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0))
+    requests_total.inc('a"b\\c')
+    requests_total.inc('a"b\\c', amount=2)
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value)
+    cache = TTLCache()
+    cache.set("k", 1)
+    cache.get("k")
+    cache.get("missing")
+    registry.add_collector(cache_collector({"user": cache}))
+
+    text = asyncio.run(registry.render())
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{path="a\\"b\\\\c"} 3' in text
+    # Корзины накопительные, граница включается в корзину
+    assert 'latency_seconds_bucket{le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert "latency_seconds_sum 3.65" in text
+    assert 'cache_hit_ratio{cache="user"} 0.5' in text
+
+
+def test_fsm_state_counts():
+    async def scenario():
+        memory = MemoryStorage()
+        memory.storage["a"].state = "Form:day"
+        memory.storage["b"].state = "Form:day"
+        memory.storage["c"].data = {"x": 1}
+        assert await fsm_state_counts(memory) == {"Form:day": 2}
+
+        clock = [1000.0]
+        store = MemoryRecordStore()
+        storage = PersistentStorage(store, ttl=100, clock=lambda: clock[0])
+        await store.save_many([("old", "Form:time", {}, 850.0)])
+        await storage._write("k1", "Form:time", {})
+        await storage._write("k2", "Form:subject", {})
+        await store.save_many([("k1", "Form:day", {}, 990.0), ("k3", "Form:day", {}, 990.0)])
+        # Несброшенные изменения учитываются поверх хранилища, брошенный диалог - нет
+        assert await fsm_state_counts(storage) == {"Form:time": 1, "Form:subject": 1, "Form:day": 1}
+        # Опрос метрик не сбрасывает буфер
+        assert set(storage._pending) == {"k1", "k2"}
+        assert store.records["k1"][0] == "Form:day"
+
+    asyncio.run(scenario())
+
+
+def test_client_trace_and_metrics_endpoint():
+    async def scenario():
+        async def get_user(request):
+            return web.json_response({"error": "User not found"}, status=404)
+
+        app = web.Application()
+        app.router.add_get("/api/users/{telegram_id}", get_user)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        client = AsyncScheduleAPIClient(f"http://127.0.0.1:{port}")
+        client.trace_configs.append(api_trace_config())
+        before = API_REQUESTS.value("GET", "/api/users/{id}", "404")
+        await client.get_user_by_telegram_id(777)
+        await client.close()
+        await runner.cleanup()
+        assert API_REQUESTS.value("GET", "/api/users/{id}", "404") == before + 1
+
+        record_api_request("POST", "/api/schedule", "error", 0.01)
+        registry = Registry()
+        registry.register(API_REQUESTS)
+        server = MetricsServer(registry, lag_interval=0.01)
+        await server.start("127.0.0.1", 0)
+        lag_before = LOOP_LAG.count()
+        await asyncio.sleep(0.05)
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{server.port}/metrics") as response:
+                assert response.status == 200
+                text = await response.text()
+        await server.close()
+
+        assert 'api_requests_total{method="GET",endpoint="/api/users/{id}",status="404"}' in text
+        assert 'api_requests_total{method="POST",endpoint="/api/schedule",status="error"}' in text
+        assert "event_loop_lag_last_seconds " in text
+        assert LOOP_LAG.count() > lag_before
+
+    asyncio.run(scenario())
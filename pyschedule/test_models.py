@@ -0,0 +1,36 @@
+import sys
+
+from models import ScheduleItem, format_time, parse_items, parse_time
+
+RAW = {"id": 5, "user_id": 2, "day_of_week": "wednesday", "time_start": "9:05", "time_end": "10:30",
+       "subject": "Химия", "description": None, "created_at": "2026-10-18T10:00:00Z"}
+
+
+def test_times_are_minutes_since_midnight():
+    assert parse_time("9:05") == 545
+    assert parse_time("23:59") == 1439
+    assert format_time(545) == "09:05"
+
+
+def test_schedule_item_parsed_once():
+    item = ScheduleItem.from_dict(RAW)
+
+    assert (item.day, item.start, item.end) == (2, 545, 630)
+    assert item.day_of_week == "wednesday"
+    assert item.time_start == "09:05"
+    assert item.description == ""
+    assert not hasattr(item, "__dict__")
+
+    item.apply({"time_start": "08:00", "subject": "Физика"})
+    assert (item.start, item.subject) == (480, "Физика")
+    assert ScheduleItem.from_dict(item.to_dict()) == item
+
+
+def test_malformed_items_are_skipped():
+    items = parse_items([RAW, {**RAW, "id": 6, "day_of_week": "someday"}, {**RAW, "id": 7, "time_start": "25:00"}])
+    assert [item.id for item in items] == [5]
+
+
+def test_item_is_smaller_than_dict():
+    item = ScheduleItem.from_dict(RAW)
+    assert sys.getsizeof(item) < sys.getsizeof(dict(RAW))
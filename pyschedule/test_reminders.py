@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timezone
+
+from api_client import AsyncScheduleAPIClient
+from fake_backend import start_fake_backend
+from models import ScheduleItem, User, parse_time
+from reminders import ReminderScheduler
+
+# Среда, 2026-10-14 12:00 UTC
+NOW = datetime(2026, 10, 14, 12, 0, tzinfo=timezone.utc).timestamp()
+
+
+def lesson(item_id, day, start, end, user_id=1):
+    return ScheduleItem(id=item_id, user_id=user_id, day=day, start=parse_time(start), end=parse_time(end),
+                        subject=f"Урок {item_id}")
+
+
+def utc(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%a %H:%M")
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(clock, sent=None):
+    async def send(chat_id, text):
+        sent.append((chat_id, text))
+
+    return ReminderScheduler(send, lead_minutes=15, timezone="UTC", clock=clock)
+
+
+def test_next_fire_wraps_week_and_lead():
+    scheduler = make_scheduler(FakeClock(NOW))
+    assert utc(scheduler.next_fire(lesson(1, 2, "13:00", "14:00"), NOW)) == "Wed 12:45"
+    # Уже прошло на этой неделе - следующая неделя
+    assert utc(scheduler.next_fire(lesson(2, 2, "12:10", "13:00"), NOW)) == "Wed 11:55"
+    assert scheduler.next_fire(lesson(2, 2, "12:10", "13:00"), NOW) - NOW > 6 * 86400
+    # Занятие в 00:05 понедельника - напоминание в воскресенье
+    assert utc(scheduler.next_fire(lesson(3, 0, "00:05", "01:00"), NOW)) == "Sun 23:50"
+
+
+def test_incremental_updates_and_firing():
+    async def scenario():
+        clock = FakeClock(NOW)
+        sent = []
+        scheduler = make_scheduler(clock, sent)
+        scheduler.load([User(id=1, telegram_id=100)], [lesson(1, 2, "13:00", "14:00"), lesson(2, 2, "15:00", "16:00"),
+                                                       lesson(3, 2, "13:00", "14:00", user_id=2)])
+        # Занятие неизвестного пользователя не планируется
+        assert len(scheduler) == 2
+
+        scheduler.remove_item(1)
+        scheduler.patch_item(2, {"time_start": "12:30"})
+        scheduler.add_user(User(id=2, telegram_id=200))
+        scheduler.add_item(lesson(4, 2, "12:40", "13:00", user_id=2))
+
+        clock.now = NOW + 30 * 60
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+        assert sorted(chat_id for chat_id, _ in sent) == [100, 200]
+        assert any("12:30-16:00" in text for _, text in sent)
+        # Сработавшие занятия перепланированы на следующую неделю
+        assert len(scheduler) == 2
+        assert scheduler.sent == 2
+
+    asyncio.run(scenario())
+
+
+def test_start_loads_only_own_shard_in_one_scan():
+    async def scenario():
+        runner, base_url = await start_fake_backend()
+        client = AsyncScheduleAPIClient(base_url)
+        try:
+            for telegram_id in (61_001, 61_002):
+                user = await client.get_or_create_user(telegram_id, "tester")
+                await client.batch_create_schedule_items([
+                    {"user_id": user["data"].id, "day_of_week": "monday", "time_start": f"{hour:02d}:00",
+                     "time_end": f"{hour:02d}:45", "subject": "Урок"} for hour in (8, 9)
+                ])
+            scheduler = ReminderScheduler(lambda chat_id, text: None, timezone="UTC",
+                                          chat_filter=lambda chat_id: chat_id == 61_002)
+            task = asyncio.create_task(scheduler.start(client))
+            while not len(scheduler):
+                await asyncio.sleep(0.01)
+            task.cancel()
+            return {entry[0].user_id for entry in scheduler._entries.values()}, len(scheduler), user["data"].id
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    user_ids, loaded, own_id = asyncio.run(scenario())
+    assert user_ids == {own_id} and loaded == 2
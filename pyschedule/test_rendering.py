@@ -0,0 +1,93 @@
+from rendering import MAX_MESSAGE_LENGTH, paginate, render_day_page, render_week_page, tg_len, truncate
+from models import ScheduleItem
+from schedule_index import build_week_index, iter_week
+
+
+def make_items(count, description=""):
+    return [
+        ScheduleItem(id=i, user_id=1, day=0, start=540, end=600, subject=f"Предмет {i}",
+                     description=description)
+        for i in range(1, count + 1)
+    ]
+
+
+def test_single_page_day():
+    text, markup, pages = render_day_page("Понедельник", "monday", make_items(3))
+
+    assert pages == 1
+    assert text.startswith("📅 **Понедельник:**")
+    assert "3. 🕒 09:00-10:00" in text
+    buttons = [button for row in markup.inline_keyboard for button in row]
+    assert [b.callback_data for b in buttons[:2]] == ["edit_1", "delete_1"]
+    assert len(buttons) == 6
+    assert [len(row) for row in markup.inline_keyboard] == [4, 2]
+
+
+def test_long_day_is_paginated_within_limits():
+    items = make_items(30, description="x" * 300)
+    _, _, pages = render_day_page("Вторник", "tuesday", items)
+    assert pages > 1
+
+    for page in range(pages):
+        text, markup, _ = render_day_page("Вторник", "tuesday", items, page)
+        assert tg_len(text) <= MAX_MESSAGE_LENGTH
+        assert f"(стр. {page + 1}/{pages})" in text
+        nav = [b.callback_data for b in markup.inline_keyboard[-1]]
+        assert all(data.startswith("day_page_tuesday_") for data in nav)
+
+
+def test_paginate_respects_item_limit():
+    assert paginate(["a"] * 5, max_length=100, max_items=2) == [[0, 1], [2, 3], [4]]
+
+
+def test_paginate_counts_separators_and_utf16():
+    # "aa" + "\n" + "aa" = 5 единиц - не влезает в 4
+    assert paginate(["aa", "aa"], max_length=4) == [[0], [1]]
+    # Эмодзи - две единицы UTF-16
+    assert paginate(["🕒", "🕒"], max_length=4) == [[0], [1]]
+    assert tg_len("🕒 09:00") == 8
+    assert truncate("ab🕒cd", 4) == "ab…"
+    assert truncate("abc", 3) == "abc"
+
+
+def test_full_pages_fit_telegram_limit_in_utf16_units():
+    # Разная длина описаний дает страницы, заполненные до предела по длине или по числу занятий
+    for length in range(0, 200, 23):
+        items = make_items(80, description="📝" * (length // 2) + "x" * (length % 2))
+        _, _, pages = render_day_page("Понедельник", "monday", items)
+        for page in range(pages):
+            text, _, _ = render_day_page("Понедельник", "monday", items, page)
+            assert tg_len(text) <= MAX_MESSAGE_LENGTH, (length, page)
+
+
+def test_week_index_orders_days_and_times():
+    items = [
+        ScheduleItem(id=1, user_id=1, day=4, start=720, end=780, subject="A"),
+        ScheduleItem(id=2, user_id=1, day=0, start=600, end=660, subject="B"),
+        ScheduleItem(id=3, user_id=1, day=0, start=480, end=540, subject="C"),
+    ]
+    index = build_week_index(items)
+
+    assert list(index)[:2] == ["monday", "tuesday"]
+    assert [item.id for item in iter_week(index)] == [3, 2, 1]
+
+    text, markup, pages = render_week_page(index)
+    assert pages == 1 and markup is None
+    assert text.index("Понедельник") < text.index("Пятница")
+    assert "Вторник" not in text
+
+
+def test_long_day_in_week_is_split_across_pages():
+    items = [ScheduleItem(id=i, user_id=1, day=0, start=480, end=525, subject=f"Урок {i}") for i in range(1, 201)]
+    items.append(ScheduleItem(id=201, user_id=1, day=2, start=600, end=645, subject="Среда"))
+    index = build_week_index(items)
+
+    _, _, pages = render_week_page(index)
+    assert pages > 1
+    texts = [render_week_page(index, page)[0] for page in range(pages)]
+    assert all(tg_len(text) <= MAX_MESSAGE_LENGTH for text in texts)
+    shown = "".join(texts)
+    assert all(f" Урок {i}\n" in shown for i in range(1, 201))
+    assert "…" not in shown
+    assert "📅 Понедельник (продолжение)" in texts[1]
+    assert "📅 Среда" in texts[-1]
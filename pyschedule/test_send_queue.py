@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, SendMessage
+
+from send_queue import SendQueue, bulk_sends
+
+
+def make_recorder(fail_first=None):
+    sent = []
+    failed = set()
+
+    async def make_request(bot, method):
+        if fail_first is not None and method.chat_id == fail_first and method.text not in failed:
+            failed.add(method.text)
+            raise TelegramRetryAfter(method, "Flood control exceeded", 1)
+        sent.append((method.text, time.monotonic()))
+        return True
+
+    return make_request, sent
+
+
+def test_interactive_replies_overtake_bulk_sends():
+    async def scenario():
+        queue = SendQueue(global_rate=10, chat_rate=100, chat_burst=100)
+        make_request, sent = make_recorder()
+
+        # Исчерпываем общий лимит, дальше отправки выстраиваются в очередь
+        await asyncio.gather(*(queue(make_request, None, SendMessage(chat_id=i, text=f"fill {i}"))
+                               for i in range(10)))
+
+        async def bulk():
+            with bulk_sends():
+                await queue(make_request, None, SendMessage(chat_id=100, text="bulk"))
+
+        bulk_task = asyncio.create_task(bulk())
+        await asyncio.sleep(0)
+        await queue(make_request, None, SendMessage(chat_id=200, text="reply"))
+        await bulk_task
+
+        assert [text for text, _ in sent[10:]] == ["reply", "bulk"]
+        assert queue.stats()["depth"] == 0
+        assert queue.stats()["max_depth"] >= 2
+
+    asyncio.run(scenario())
+
+
+def test_per_chat_rate_limit():
+    async def scenario():
+        queue = SendQueue(global_rate=1000, chat_rate=20, chat_burst=2)
+        make_request, sent = make_recorder()
+
+        await asyncio.gather(*(queue(make_request, None, SendMessage(chat_id=1, text=str(i))) for i in range(4)))
+
+        times = [at for _, at in sent]
+        assert [text for text, _ in sent] == ["0", "1", "2", "3"]
+        # Два сообщения сразу (burst), затем не чаще раза в 50 мс
+        assert times[3] - times[0] >= 0.09
+        assert queue.stats()["wait_max"] >= 0.09
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_pauses_only_that_chat():
+    async def scenario():
+        queue = SendQueue(global_rate=1000, chat_rate=100, chat_burst=10)
+        make_request, sent = make_recorder(fail_first=1)
+
+        started = time.monotonic()
+        results = await asyncio.gather(
+            queue(make_request, None, SendMessage(chat_id=1, text="flooded")),
+            queue(make_request, None, SendMessage(chat_id=2, text="other")),
+        )
+        assert results == [True, True]
+        by_text = {text: at - started for text, at in sent}
+        assert by_text["other"] < 0.5
+        assert by_text["flooded"] >= 1
+        assert queue.retried == 1
+
+        # Запросы без chat_id идут мимо очереди
+        calls = []
+
+        async def passthrough(bot, method):
+            calls.append(method)
+            return True
+
+        assert await queue(passthrough, None, AnswerCallbackQuery(callback_query_id="1"))
+        assert len(calls) == 1
+
+    asyncio.run(scenario())
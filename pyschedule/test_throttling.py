@@ -0,0 +1,104 @@
+import asyncio
+
+from aiogram import Bot
+from aiogram.types import Message, User
+
+from bench_bot import BENCH_TOKEN, StubSession
+
+from throttling import ThrottlingMiddleware, TokenBucket
+
+USER = User(id=7, is_bot=False, first_name="Test")
+
+
+def make_message(text):
+    return Message.model_validate({
+        "message_id": 1, "date": 0, "chat": {"id": 7, "type": "private"}, "text": text,
+    })
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills():
+    bucket = TokenBucket(rate=1, capacity=2, now=0)
+    assert bucket.take(0) and bucket.take(0)
+    assert not bucket.take(0.5)
+    assert bucket.take(1.5)
+
+
+def test_identical_in_flight_updates_are_coalesced():
+    async def scenario():
+        middleware = ThrottlingMiddleware(rate=100, burst=100)
+        calls = []
+
+        async def handler(event, data):
+            calls.append(event.text)
+            await asyncio.sleep(0.05)
+            return event.text
+
+        results = await asyncio.gather(
+            middleware(handler, make_message("Понедельник"), {"event_from_user": USER}),
+            middleware(handler, make_message("Понедельник"), {"event_from_user": USER}),
+            middleware(handler, make_message("Вторник"), {"event_from_user": USER}),
+        )
+        assert calls == ["Понедельник", "Вторник"]
+        assert results == ["Понедельник", None, "Вторник"]
+
+        # После завершения первого такой же запрос снова проходит
+        assert await middleware(handler, make_message("Понедельник"), {"event_from_user": USER}) == "Понедельник"
+        assert middleware.stats() == {"passed": 3, "coalesced": 1, "dropped": 0, "in_flight": 0, "users": 1}
+
+    asyncio.run(scenario())
+
+
+def test_bursts_are_dropped_by_token_bucket():
+    async def scenario():
+        clock = FakeClock()
+        middleware = ThrottlingMiddleware(rate=1, burst=3, max_users=2, clock=clock)
+
+        async def handler(event, data):
+            return True
+
+        results = [await middleware(handler, make_message(str(i)), {"event_from_user": USER}) for i in range(5)]
+        assert results == [True, True, True, None, None]
+        assert middleware.dropped == 2
+
+        clock.now += 1
+        assert await middleware(handler, make_message("ещё"), {"event_from_user": USER})
+
+        # Корзины хранятся только для max_users последних пользователей
+        for user_id in (8, 9, 10):
+            await middleware(handler, make_message("x"), {"event_from_user": User(id=user_id, is_bot=False,
+                                                                                 first_name="U")})
+        assert middleware.stats()["users"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_dropped_messages_get_rate_limited_notice():
+    async def scenario():
+        clock = FakeClock()
+        session = StubSession()
+        bot = Bot(BENCH_TOKEN, session=session)
+        middleware = ThrottlingMiddleware(rate=0.01, burst=1, notice_interval=10, clock=clock)
+
+        async def handler(event, data):
+            return True
+
+        for i in range(4):
+            await middleware(handler, make_message(str(i)).as_(bot), {"event_from_user": USER})
+        notices = session.calls["SendMessage"]
+        clock.now += 10
+        await middleware(handler, make_message("ещё").as_(bot), {"event_from_user": USER})
+        return notices, session.calls["SendMessage"], session.last_text[7]
+
+    notices, total, text = asyncio.run(scenario())
+    # Три отброшенных сообщения подряд - одно уведомление
+    assert notices == 1
+    assert total == 2
+    assert text.startswith("⏳")
@@ -0,0 +1,117 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from aiohttp import web
+
+from api_client import AsyncScheduleAPIClient
+from trace_waterfall import format_waterfall, load_traces
+from tracing import (
+    PARENT_HEADER, TRACE_HEADER, FileSpanSink, HandlerSpanMiddleware, TelegramSpanMiddleware, Tracer, UpdateTracingMiddleware,
+    api_trace_config, span
+)
+
+
+class ListSink:
+    def __init__(self):
+        self.records = []
+        self.flushes = 0
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        self.flushes += 1
+
+    def close(self):
+        pass
+
+
+class Message:
+    pass
+
+
+def test_unsampled_updates_record_nothing():
+    async def scenario():
+        sink = ListSink()
+        middleware = UpdateTracingMiddleware(Tracer(sink, sample_rate=0))
+
+        async def handler(event, data):
+            with span("work") as child:
+                return child
+
+        assert await middleware(handler, Message(), {}) is None
+        assert sink.records == []
+
+    asyncio.run(scenario())
+
+
+def test_trace_propagates_to_api_and_waterfall():
+    async def scenario():
+        received = []
+
+        async def get_user(request):
+            received.append((request.headers.get(TRACE_HEADER), request.headers.get(PARENT_HEADER)))
+            return web.json_response({"user": {"id": 1, "telegram_id": 5, "username": "", "first_name": "",
+                                               "created_at": ""}})
+
+        app = web.Application()
+        app.router.add_get("/api/users/{telegram_id}", get_user)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        client = AsyncScheduleAPIClient(f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}")
+        client.trace_configs.append(api_trace_config())
+
+        async def make_request(bot, method):
+            return True
+
+        async def show_day(event, data):
+            await client.get_user_by_telegram_id(5)
+            await TelegramSpanMiddleware()(make_request, None, SimpleNamespace())
+
+        sink = ListSink()
+        update_tracing = UpdateTracingMiddleware(Tracer(sink, sample_rate=1))
+        handler_spans = HandlerSpanMiddleware()
+        data = {"event_from_user": SimpleNamespace(id=5), "handler": SimpleNamespace(callback=show_day)}
+        await update_tracing(lambda event, data: handler_spans(show_day, event, data), Message(), data)
+        await client.close()
+        await runner.cleanup()
+        return sink, received
+
+    sink, received = asyncio.run(scenario())
+    api, telegram, root = sink.records
+    assert root["name"] == "message" and root["parent_id"] is None
+    assert root["attrs"] == {"user_id": 5, "handler": "show_day"}
+    assert api["name"] == "GET /api/users/{id}" and api["attrs"]["status"] == 200
+    assert telegram["name"] == "telegram SimpleNamespace"
+    assert {api["parent_id"], telegram["parent_id"]} == {root["span_id"]}
+    assert received == [(root["trace_id"], api["span_id"])]
+    # Корневой span сбрасывает буфер sink одной записью
+    assert sink.flushes == 1
+
+    # Span Go backend ссылается на span запроса бота
+    backend = {"trace_id": root["trace_id"], "span_id": "b1", "parent_id": api["span_id"], "service": "go-backend",
+               "name": "GET /api/users/:telegram_id", "start": api["start"], "duration": api["duration"] / 2,
+               "attrs": {"status": 200}}
+    traces = load_traces([json.dumps(record) for record in sink.records + [backend]] + ["{broken"])
+    lines = format_waterfall(traces[root["trace_id"]], width=20).splitlines()
+    assert lines[0].startswith(f"trace {root['trace_id']}")
+    assert "message [show_day]" in lines[1]
+    assert "  GET /api/users/{id}" in lines[2]
+    assert "    GET /api/users/:telegram_id (go-backend)" in lines[3]
+    assert "telegram SimpleNamespace" in lines[4]
+
+
+def test_file_sink_writes_in_background_thread(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(FileSpanSink(str(path)), sample_rate=1)
+    with tracer.start_trace("message", chat_id=1) as root:
+        with span("api"):
+            pass
+    tracer.close()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [record["name"] for record in records] == ["api", "message"]
+    assert {record["trace_id"] for record in records} == {root.trace_id}
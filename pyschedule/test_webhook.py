@@ -0,0 +1,96 @@
+import asyncio
+
+import aiohttp
+from aiogram import Bot, Dispatcher, F, Router
+from aiohttp import web
+
+from webhook import ConcurrencyLimitMiddleware, create_webhook_app
+
+SECRET = "test-secret"
+
+
+def make_update(update_id, text):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+async def serve_webhook(scenario, max_concurrency=2, max_body_size=4096):
+    seen = []
+    active = [0, 0]  # текущее / максимум одновременно
+    router = Router()
+
+    @router.message(F.text)
+    async def record(message):
+        active[0] += 1
+        active[1] = max(active[1], active[0])
+        await asyncio.sleep(0.05)
+        seen.append(message.text)
+        active[0] -= 1
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot(token="42:TEST")
+    app = create_webhook_app(dp, bot, "/webhook", secret_token=SECRET, max_concurrency=max_concurrency,
+                             max_body_size=max_body_size, shutdown_timeout=5)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        async with aiohttp.ClientSession(f"http://127.0.0.1:{port}") as session:
+            await scenario(session)
+    finally:
+        # Остановка дожидается апдейтов, которые еще обрабатываются в фоне
+        await runner.cleanup()
+    return seen, active[1]
+
+
+def test_webhook_limits_concurrency_and_drains_on_shutdown():
+    async def scenario(session):
+        headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        for i in range(6):
+            async with session.post("/webhook", json=make_update(i, f"msg {i}"), headers=headers) as resp:
+                assert resp.status == 200
+
+    seen, max_active = asyncio.run(serve_webhook(scenario))
+    assert sorted(seen) == [f"msg {i}" for i in range(6)]
+    assert max_active == 2
+
+
+def test_webhook_rejects_bad_secret_and_large_body():
+    async def scenario(session):
+        async with session.post("/webhook", json=make_update(1, "x")) as resp:
+            assert resp.status == 401
+        headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        async with session.post("/webhook", json=make_update(2, "x" * 10000), headers=headers) as resp:
+            assert resp.status == 413
+
+    seen, _ = asyncio.run(serve_webhook(scenario))
+    assert seen == []
+
+
+def test_concurrency_limit_wait_idle_timeout():
+    async def scenario():
+        limiter = ConcurrencyLimitMiddleware(1)
+
+        async def handler(event, data):
+            await asyncio.sleep(0.2)
+
+        task = asyncio.create_task(limiter(handler, None, {}))
+        await asyncio.sleep(0)
+        assert limiter.active == 1
+        assert not await limiter.wait_idle(0.01)
+        assert await limiter.wait_idle(1)
+        await task
+
+    asyncio.run(scenario())
+
@@ -0,0 +1,97 @@
+import asyncio
+import random
+
+import aiohttp
+from aiogram import Bot
+
+from bench_bot import BENCH_TOKEN, StubSession
+
+from workers import ChatOrderedFeeder, _serve_webhook, shard_for, update_chat_id
+
+
+def test_shard_for_is_stable_and_in_range():
+    for chat_id in (1, 7, 123456789, -1001234567890):
+        shard = shard_for(chat_id, 4)
+        assert 0 <= shard < 4
+        assert shard == shard_for(chat_id, 4)
+
+
+def test_update_chat_id():
+    message = {"update_id": 1, "message": {"message_id": 1, "chat": {"id": 42}, "from": {"id": 7}}}
+    callback = {"update_id": 2, "callback_query": {"id": "1", "from": {"id": 7},
+                                                   "message": {"message_id": 1, "chat": {"id": 42}}}}
+    inline = {"update_id": 3, "inline_query": {"id": "1", "from": {"id": 7}, "query": ""}}
+
+    assert update_chat_id(message) == 42
+    assert update_chat_id(callback) == 42
+    assert update_chat_id(inline) == 7
+    assert update_chat_id({"update_id": 4}) == 0
+
+
+def test_feeder_keeps_per_chat_order_and_runs_chats_concurrently():
+    async def scenario():
+        seen = {1: [], 2: []}
+        active = [0, 0]
+
+        async def feed(raw):
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+            await asyncio.sleep(random.random() / 100)
+            seen[raw["chat"]].append(raw["n"])
+            active[0] -= 1
+
+        feeder = ChatOrderedFeeder(feed)
+        for n in range(20):
+            feeder.submit(1, {"chat": 1, "n": n})
+            feeder.submit(2, {"chat": 2, "n": n})
+        await feeder.drain()
+
+        assert seen[1] == list(range(20))
+        assert seen[2] == list(range(20))
+        assert active[1] == 2
+        # Блокировки чатов не копятся после обработки
+        assert feeder._locks == {} and feeder._pending == {}
+
+    asyncio.run(scenario())
+
+
+def test_feeder_survives_failing_update():
+    async def scenario():
+        seen = []
+
+        async def feed(raw):
+            if raw["n"] == 1:
+                raise RuntimeError("boom")
+            seen.append(raw["n"])
+
+        feeder = ChatOrderedFeeder(feed)
+        for n in range(3):
+            feeder.submit(1, {"update_id": n, "n": n})
+        await feeder.drain()
+        assert seen == [0, 2]
+
+    asyncio.run(scenario())
+
+
+def test_sharded_webhook_checks_secret():
+    async def scenario():
+        dispatched, stop = [], asyncio.Event()
+        session = StubSession()
+        server = asyncio.create_task(_serve_webhook(
+            Bot(BENCH_TOKEN, session=session), dispatched.append, stop, None, "https://example.com", "/hook",
+            "127.0.0.1", 18_765, "s3cret", 40, 4096))
+        while not session.calls["SetWebhook"]:
+            await asyncio.sleep(0.01)
+        statuses = []
+        async with aiohttp.ClientSession() as http:
+            for secret in ("wrong", "s3cret"):
+                async with http.post("http://127.0.0.1:18765/hook", json={"update_id": 1},
+                                     headers={"X-Telegram-Bot-Api-Secret-Token": secret}) as response:
+                    statuses.append(response.status)
+        stop.set()
+        await server
+        return statuses, dispatched
+
+    statuses, dispatched = asyncio.run(scenario())
+    assert statuses == [401, 200]
+    assert dispatched == [{"update_id": 1}]
@@ -0,0 +1,149 @@
+import logging
+import time
+from collections import OrderedDict
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше capacity"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated_at')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def take(self, now: float) -> bool:
+        """Списывает токен; False, если корзина пуста"""
+        self._refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def wait_time(self, now: float) -> float:
+        """Через сколько секунд появится токен (0 - уже есть)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Ограничение частоты и склейка повторных нажатий для каждого пользователя
+
+    Вешается как outer-middleware на router.message и router.callback_query.
+    Одинаковое событие (тот же текст или callback_data), пришедшее, пока
+    первое еще обрабатывается, отбрасывается - ответ придет на первое
+    (single-flight). Всплески сверх burst событий режет корзина токенов;
+    на отброшенное сообщение пользователь получает короткий ответ, но не
+    чаще раза в notice_interval секунд.
+
+    Состояние живет в процессе: при BOT_WORKERS > 1 у каждого воркера свой
+    экземпляр, и single-flight с лимитом работают только потому, что все
+    апдейты одного чата попадают в один воркер (workers.shard_for).
+    """
+
+    def __init__(self, rate: float = 2.0, burst: int = 5, max_users: int = 10000,
+                 notice_interval: float = 10.0, clock=time.monotonic):
+        self._rate = rate
+        self._burst = burst
+        self._max_users = max_users
+        self._notice_interval = notice_interval
+        self._clock = clock
+        self._buckets = OrderedDict()
+        self._noticed_at = {}
+        self._in_flight = set()
+        self.passed = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _fingerprint(event):
+        if isinstance(event, Message) and event.text:
+            return 'message', event.text
+        if isinstance(event, CallbackQuery) and event.data:
+            return 'callback', event.data
+        return None
+
+    def _bucket(self, user_id: int) -> TokenBucket:
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self._rate, self._burst, self._clock())
+            if len(self._buckets) > self._max_users:
+                evicted, _ = self._buckets.popitem(last=False)
+                self._noticed_at.pop(evicted, None)
+        else:
+            self._buckets.move_to_end(user_id)
+        return bucket
+
+    async def _reject(self, event, text: str = None):
+        # Кнопка без ответа "крутится" у пользователя до таймаута
+        if isinstance(event, CallbackQuery):
+            try:
+                await event.answer(text)
+            except Exception as e:
+                logger.debug("Failed to answer throttled callback: %s", e)
+
+    async def _notify_dropped(self, event, user_id: int):
+        """Отвечает на отброшенное сообщение, не чаще раза в notice_interval"""
+        now = self._clock()
+        noticed_at = self._noticed_at.get(user_id)
+        if noticed_at is not None and now - noticed_at < self._notice_interval:
+            return
+        self._noticed_at[user_id] = now
+        try:
+            await event.answer("⏳ Слишком часто, подождите немного")
+        except Exception as e:
+            logger.debug("Failed to answer throttled message: %s", e)
+
+    async def __call__(self, handler, event, data):
+        user = data.get('event_from_user')
+        if user is None:
+            return await handler(event, data)
+
+        fingerprint = self._fingerprint(event)
+        flight_key = (user.id, fingerprint) if fingerprint else None
+        if flight_key in self._in_flight:
+            # Ответ придет на первое такое же событие
+            self.coalesced += 1
+            logger.debug("Coalesced duplicate update from user %s", user.id)
+            await self._reject(event)
+            return None
+
+        if not self._bucket(user.id).take(self._clock()):
+            self.dropped += 1
+            logger.info("Throttled update from user %s", user.id)
+            if isinstance(event, Message):
+                await self._notify_dropped(event, user.id)
+            else:
+                await self._reject(event, "⏳ Слишком много запросов, подождите немного")
+            return None
+
+        self.passed += 1
+        if flight_key is None:
+            return await handler(event, data)
+
+        self._in_flight.add(flight_key)
+        try:
+            return await handler(event, data)
+        finally:
+            self._in_flight.discard(flight_key)
+
+    def stats(self) -> dict:
+        """Счетчики пропущенных/склеенных/отброшенных событий"""
+        return {
+            "passed": self.passed,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "in_flight": len(self._in_flight),
+            "users": len(self._buckets),
+        }
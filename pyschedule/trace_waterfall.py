@@ -0,0 +1,97 @@
+"""Waterfall по файлу span'ов (TRACE_FILE) бота и Go backend
+
+    python trace_waterfall.py traces.jsonl                  # 10 самых медленных апдейтов
+    python trace_waterfall.py traces.jsonl --slowest 3 --width 80
+    python trace_waterfall.py traces.jsonl --trace 5f0c...  # один trace
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+
+def load_traces(lines) -> dict:
+    """trace_id -> список span'ов; битые строки (недописанные при остановке) пропускаются"""
+    traces = defaultdict(list)
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        traces[record['trace_id']].append(record)
+    return dict(traces)
+
+
+def _root(spans: list) -> dict:
+    roots = [record for record in spans if not record.get('parent_id')]
+    return min(roots or spans, key=lambda record: record['start'])
+
+
+def _ordered(spans: list, root: dict):
+    """Обход дерева в глубину: (глубина, span); потерявшие родителя - под корнем"""
+    known = {record['span_id'] for record in spans}
+    children = defaultdict(list)
+    for record in spans:
+        if record is root:
+            continue
+        parent = record.get('parent_id')
+        children[parent if parent in known else root['span_id']].append(record)
+
+    stack = [(0, root)]
+    while stack:
+        depth, record = stack.pop()
+        yield depth, record
+        for child in sorted(children[record['span_id']], key=lambda child: child['start'], reverse=True):
+            stack.append((depth + 1, child))
+
+
+def _label(record: dict) -> str:
+    handler = record.get('attrs', {}).get('handler')
+    name = f"{record['name']} [{handler}]" if handler else record['name']
+    return f"{name} ({record['service']})" if record.get('service') != 'bot' else name
+
+
+def format_waterfall(spans: list, width: int = 60) -> str:
+    root = _root(spans)
+    origin = root['start']
+    total = max(max(record['start'] + record['duration'] for record in spans) - origin, 1e-9)
+    rows = [(depth, record, '  ' * depth + _label(record)) for depth, record in _ordered(spans, root)]
+    label_width = max(len(label) for _, _, label in rows)
+
+    lines = [f"trace {root['trace_id']}  {root['duration'] * 1000:.1f} ms  {len(spans)} spans"]
+    for depth, record, label in rows:
+        offset = record['start'] - origin
+        left = int(offset / total * width)
+        length = max(1, round(record['duration'] / total * width))
+        bar = (' ' * left + '█' * length)[:width].ljust(width)
+        status = record.get('attrs', {}).get('status') or record.get('attrs', {}).get('error') or ''
+        lines.append(f"{offset * 1000:>8.1f} {record['duration'] * 1000:>8.1f} ms  {label:<{label_width}}  "
+                     f"|{bar}| {status}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Waterfall span'ов из TRACE_FILE")
+    parser.add_argument('path', help="файл span'ов (JSON lines)")
+    parser.add_argument('--trace', help="trace_id (или его начало)")
+    parser.add_argument('--slowest', type=int, default=10, help="сколько самых медленных trace показать")
+    parser.add_argument('--width', type=int, default=60, help="ширина полосы")
+    args = parser.parse_args(argv)
+
+    with open(args.path, encoding='utf-8') as f:
+        traces = load_traces(f)
+
+    if args.trace:
+        selected = [spans for trace_id, spans in traces.items() if trace_id.startswith(args.trace)]
+    else:
+        selected = sorted(traces.values(), key=lambda spans: _root(spans)['duration'], reverse=True)
+        selected = selected[:args.slowest]
+    if not selected:
+        print("Trace не найдены", file=sys.stderr)
+        return 1
+    print('\n\n'.join(format_waterfall(spans, args.width) for spans in selected))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
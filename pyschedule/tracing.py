@@ -0,0 +1,267 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiohttp import TraceConfig
+from requests.adapters import HTTPAdapter
+
+from metrics import endpoint_template
+
+logger = logging.getLogger(__name__)
+
+# Заголовки, с которыми trace уходит в Go backend (логирует их traceMiddleware в main.go)
+TRACE_HEADER = 'X-Trace-Id'
+PARENT_HEADER = 'X-Parent-Span-Id'
+
+_current_span = ContextVar('current_span', default=None)
+_NOOP = nullcontext()
+
+
+class Span:
+    """Отрезок времени внутри trace; корневой span - один апдейт Telegram"""
+
+    __slots__ = ('tracer', 'trace_id', 'span_id', 'parent_id', 'name', 'attrs', 'start', '_started', '_token')
+
+    def __init__(self, tracer, trace_id: str, parent_id, name: str, attrs: dict):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._token = None
+
+    def headers(self) -> dict:
+        return {TRACE_HEADER: self.trace_id, PARENT_HEADER: self.span_id}
+
+    def finish(self, error: BaseException = None):
+        if error is not None:
+            self.attrs['error'] = type(error).__name__
+        self.tracer.sink.emit({
+            'trace_id': self.trace_id, 'span_id': self.span_id, 'parent_id': self.parent_id,
+            'service': 'bot', 'name': self.name, 'start': self.start,
+            'duration': time.perf_counter() - self._started, 'attrs': self.attrs,
+        })
+        if self.parent_id is None:
+            self.tracer.sink.flush()
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        self.finish(exc)
+
+
+class FileSpanSink:
+    """Span'ы в JSON lines; пишутся одним write() по завершении корневого span
+
+    Корневой span завершается в event loop, поэтому сериализация и запись на
+    диск вынесены в фоновый поток (как QueueListener в log_config.py):
+    flush() только кладет пачку записей в очередь.
+    Файл открывается на дозапись, так что его могут делить воркеры и Go backend
+    (TRACE_FILE): строка короче PIPE_BUF дописывается атомарно.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._buffer = []
+        self._file = open(path, 'a', encoding='utf-8')
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write_loop, name='trace-sink', daemon=True)
+        self._thread.start()
+
+    def emit(self, record: dict):
+        self._buffer.append(record)
+
+    def flush(self):
+        if self._buffer:
+            records, self._buffer = self._buffer, []
+            self._queue.put(records)
+
+    def _write_loop(self):
+        while True:
+            records = self._queue.get()
+            if records is self._STOP:
+                return
+            try:
+                self._file.write(''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n'
+                                         for record in records))
+                self._file.flush()
+            except (OSError, ValueError, TypeError) as e:
+                logger.error("Trace sink write failed: %s", e)
+
+    def close(self):
+        if not self._thread.is_alive():
+            return
+        self.flush()
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._file.close()
+
+
+class Tracer:
+    """Выборочная трассировка апдейтов: sample_rate - доля апдейтов с trace
+
+    Без активного trace span() возвращает общий nullcontext, поэтому при
+    sample_rate=0 цена в горячем пути - одно чтение ContextVar.
+    """
+
+    def __init__(self, sink, sample_rate: float = 0.0):
+        self.sink = sink
+        self.sample_rate = sample_rate
+
+    def start_trace(self, name: str, **attrs):
+        """Корневой span или None, если апдейт не попал в выборку"""
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return None
+        return Span(self, os.urandom(16).hex(), None, name, attrs)
+
+    def close(self):
+        self.sink.close()
+
+
+def current_span():
+    return _current_span.get()
+
+
+def span(name: str, **attrs):
+    """Дочерний span текущего trace; вне trace ничего не делает"""
+    parent = _current_span.get()
+    if parent is None:
+        return _NOOP
+    return Span(parent.tracer, parent.trace_id, parent.span_id, name, attrs)
+
+
+class UpdateTracingMiddleware(BaseMiddleware):
+    """Outer-middleware: корневой span на апдейт (message / callback_query)
+
+    Регистрируется раньше троттлинга, чтобы ожидание в нем тоже попало в trace.
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+
+    async def __call__(self, handler, event, data):
+        root = self.tracer.start_trace(type(event).__name__.lower())
+        if root is None:
+            return await handler(event, data)
+        user = data.get('event_from_user')
+        if user is not None:
+            root.attrs['user_id'] = user.id
+        with root:
+            return await handler(event, data)
+
+
+class HandlerSpanMiddleware(BaseMiddleware):
+    """Inner-middleware: называет корневой span именем хендлера
+
+    outer-middleware хендлер еще неизвестен (aiogram выбирает его после фильтров).
+    """
+
+    async def __call__(self, handler, event, data):
+        root = _current_span.get()
+        if root is not None:
+            root.attrs['handler'] = data['handler'].callback.__name__
+        return await handler(event, data)
+
+
+class TelegramSpanMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: span на каждый запрос к Telegram Bot API
+
+    Регистрируется перед SendQueue - ожидание в очереди входит в span.
+    """
+
+    async def __call__(self, make_request, bot, method):
+        if _current_span.get() is None:
+            return await make_request(bot, method)
+        with span(f"telegram {type(method).__name__}"):
+            return await make_request(bot, method)
+
+
+def _request_name(method: str, path: str) -> str:
+    return f"{method} {endpoint_template(path)}"
+
+
+def api_trace_config() -> TraceConfig:
+    """TraceConfig aiohttp: span и заголовки trace для AsyncScheduleAPIClient"""
+
+    async def on_start(session, context, params):
+        child = span(_request_name(params.method, params.url.path))
+        context.span = child if child is not _NOOP else None
+        if context.span is not None:
+            params.headers.update(context.span.headers())
+
+    async def on_end(session, context, params):
+        if context.span is not None:
+            context.span.attrs['status'] = params.response.status
+            context.span.finish()
+
+    async def on_exception(session, context, params):
+        if context.span is not None:
+            context.span.finish(params.exception)
+
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(on_start)
+    trace_config.on_request_end.append(on_end)
+    trace_config.on_request_exception.append(on_exception)
+    return trace_config
+
+
+class TracingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter для ScheduleAPIClient: span и заголовки trace
+
+    Оборачивает ранее подключенный адаптер (например, MetricsHTTPAdapter).
+    """
+
+    def __init__(self, inner: HTTPAdapter = None):
+        super().__init__()
+        self.inner = inner
+
+    def send(self, request, *args, **kwargs):
+        send = self.inner.send if self.inner is not None else super().send
+        child = span(_request_name(request.method, request.path_url))
+        if child is _NOOP:
+            return send(request, *args, **kwargs)
+        request.headers.update(child.headers())
+        with child:
+            response = send(request, *args, **kwargs)
+            child.attrs['status'] = response.status_code
+            return response
+
+    def close(self):
+        super().close()
+        if self.inner is not None:
+            self.inner.close()
+
+
+def trace_sync_client(client):
+    for prefix in ('http://', 'https://'):
+        client.session.mount(prefix, TracingHTTPAdapter(client.session.get_adapter(prefix)))
+
+
+def trace_async_client(client):
+    """Действует с новой сессии клиента"""
+    client.trace_configs.append(api_trace_config())
+
+
+def tracer_from_config():
+    """Tracer с TRACE_SAMPLE_RATE и TRACE_FILE; None, если трассировка выключена"""
+    from config import TRACE_FILE, TRACE_SAMPLE_RATE
+
+    if TRACE_SAMPLE_RATE <= 0:
+        return None
+    return Tracer(FileSpanSink(TRACE_FILE), TRACE_SAMPLE_RATE)
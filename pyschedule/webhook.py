@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import signal
+
+from aiogram import BaseMiddleware
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """Ограничивает число одновременно обрабатываемых апдейтов
+
+    Вешается на dp.update.outer_middleware. Заодно считает апдейты в работе,
+    чтобы при остановке дождаться их завершения (wait_idle).
+    """
+
+    def __init__(self, limit: int):
+        self._semaphore = asyncio.Semaphore(limit)
+        self._active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    async def __call__(self, handler, event, data):
+        self._active += 1
+        self._idle.clear()
+        try:
+            async with self._semaphore:
+                return await handler(event, data)
+        finally:
+            self._active -= 1
+            if not self._active:
+                self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Ждет завершения апдейтов в работе; False, если не успели за timeout"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+def create_webhook_app(dp, bot, path: str, secret_token: str = None, max_concurrency: int = 100,
+                       max_body_size: int = 256 * 1024, shutdown_timeout: float = 30) -> web.Application:
+    """aiohttp-приложение, принимающее апдейты Telegram на path
+
+    Апдейты обрабатываются в фоне (Telegram сразу получает 200), не более
+    max_concurrency одновременно; тела больше max_body_size отклоняются с 413.
+    """
+    limiter = ConcurrencyLimitMiddleware(max_concurrency)
+    dp.update.outer_middleware(limiter)
+
+    app = web.Application(client_max_size=max_body_size)
+
+    async def drain(_app):
+        # Сайты уже остановлены - новых апдейтов нет, дожидаемся начатых до закрытия сессии бота
+        if not await limiter.wait_idle(shutdown_timeout):
+            logger.warning("Shutdown timeout: %s updates still in progress", limiter.active)
+
+    # drain должен выполниться раньше закрытия сессии бота в SimpleRequestHandler
+    app.on_shutdown.append(drain)
+    SimpleRequestHandler(dp, bot, secret_token=secret_token or None).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp, bot, url: str, path: str, host: str, port: int, secret_token: str = None,
+                      max_connections: int = 40, max_concurrency: int = 100,
+                      max_body_size: int = 256 * 1024, shutdown_timeout: float = 30):
+    """Регистрирует вебхук и обслуживает его до SIGINT/SIGTERM"""
+    app = create_webhook_app(dp, bot, path, secret_token, max_concurrency, max_body_size, shutdown_timeout)
+    runner = web.AppRunner(app, shutdown_timeout=shutdown_timeout)
+    await runner.setup()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: остается KeyboardInterrupt
+            pass
+
+    try:
+        await web.TCPSite(runner, host, port).start()
+        # Несколько экземпляров за балансировщиком регистрируют один и тот же URL - это идемпотентно
+        await bot.set_webhook(
+            url.rstrip('/') + path,
+            secret_token=secret_token or None,
+            max_connections=max_connections,
+            allowed_updates=dp.resolve_used_update_types()
+        )
+        logger.info("Webhook server listening on %s:%s%s", host, port, path)
+        await stop.wait()
+    finally:
+        logger.info("Stopping webhook server")
+        await runner.cleanup()
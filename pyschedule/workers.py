@@ -0,0 +1,237 @@
+import asyncio
+import hmac
+import logging
+import multiprocessing
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Ожидание getUpdates в режиме воркеров, секунды
+POLLING_TIMEOUT = 30
+
+
+def shard_for(chat_id: int, workers: int) -> int:
+    """Номер воркера для чата; все апдейты одного чата попадают в один процесс"""
+    return chat_id % workers
+
+
+def update_chat_id(raw: dict) -> int:
+    """chat.id апдейта (или id пользователя для событий без чата), 0 - если не нашли"""
+    for key, event in raw.items():
+        if key == 'update_id' or not isinstance(event, dict):
+            continue
+        if 'chat' in event:
+            return event['chat']['id']
+        # callback_query: сообщение с кнопкой несет чат
+        message = event.get('message')
+        if isinstance(message, dict) and 'chat' in message:
+            return message['chat']['id']
+        if 'from' in event:
+            return event['from']['id']
+        if 'user' in event:
+            return event['user']['id']
+    return 0
+
+
+class ChatOrderedFeeder:
+    """Обрабатывает апдейты разных чатов параллельно, а одного чата - строго по очереди
+
+    asyncio.Lock отдает блокировку ожидающим в порядке FIFO, а задачи стартуют
+    в порядке submit, поэтому шаги FSM одного пользователя не переставляются.
+    """
+
+    def __init__(self, feed):
+        self._feed = feed
+        self._locks = {}
+        self._pending = {}
+        self._tasks = set()
+
+    def submit(self, chat_id: int, raw: dict):
+        if chat_id not in self._locks:
+            self._locks[chat_id] = asyncio.Lock()
+        self._pending[chat_id] = self._pending.get(chat_id, 0) + 1
+        task = asyncio.create_task(self._run(chat_id, raw))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, chat_id: int, raw: dict):
+        try:
+            async with self._locks[chat_id]:
+                await self._feed(raw)
+        except Exception as e:
+            logger.exception("Update %s failed: %s", raw.get('update_id'), e)
+        finally:
+            self._pending[chat_id] -= 1
+            if not self._pending[chat_id]:
+                del self._pending[chat_id]
+                del self._locks[chat_id]
+
+    async def drain(self):
+        """Дожидается всех принятых апдейтов"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+
+
+async def _worker_loop(index: int, queue, token: str, workers: int):
+    # Импорт в дочернем процессе: у каждого воркера свои api_client, кэши и FSM
+    from config import REMINDERS_ENABLED, SCHEDULE_SYNC_INTERVAL
+    from fsm_storage import storage_from_config
+    from handlers import router, api_client, throttling, tracer
+    from metrics import start_metrics_from_config
+    from reminders import reminders_from_config
+    from send_queue import send_queue_from_config
+    from tracing import TelegramSpanMiddleware
+
+    bot = Bot(token=token)
+    send_queue = send_queue_from_config(workers)
+    if tracer is not None:
+        bot.session.middleware(TelegramSpanMiddleware())
+    bot.session.middleware(send_queue)
+    dp = Dispatcher(storage=storage_from_config())
+    dp.include_router(router)
+    metrics = await start_metrics_from_config(api_client, dp.storage, throttling, send_queue,
+                                              port_offset=1 + index)
+    feeder = ChatOrderedFeeder(lambda raw: dp.feed_raw_update(bot, raw))
+    loop = asyncio.get_running_loop()
+
+    sync_task = None
+    if SCHEDULE_SYNC_INTERVAL > 0:
+        sync_task = asyncio.create_task(api_client.follow_schedule_changes(SCHEDULE_SYNC_INTERVAL))
+    reminders_task = None
+    if REMINDERS_ENABLED:
+        # Каждый воркер напоминает только своим чатам
+        reminders = reminders_from_config(bot, chat_filter=lambda chat_id: shard_for(chat_id, workers) == index)
+        reminders_task = asyncio.create_task(reminders.start(api_client))
+
+    logger.info("Worker %s started", index)
+    try:
+        while True:
+            item = await loop.run_in_executor(None, queue.get)
+            if item is None:
+                break
+            chat_id, raw = item
+            feeder.submit(chat_id, raw)
+        await feeder.drain()
+    finally:
+        if reminders_task is not None:
+            reminders_task.cancel()
+        if sync_task is not None:
+            sync_task.cancel()
+        if metrics is not None:
+            await metrics.close()
+        await dp.storage.close()
+        await api_client.close()
+        await bot.session.close()
+        if tracer is not None:
+            tracer.close()
+        logger.info("Worker %s stopped", index)
+
+
+def worker_main(index: int, queue, token: str, workers: int = 1):
+    """Точка входа процесса-воркера"""
+    # Ctrl+C получает вся группа процессов; останавливает воркеров супервизор через None в очереди
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from log_config import setup_logging_from_config
+    setup_logging_from_config()
+    asyncio.run(_worker_loop(index, queue, token, workers))
+
+
+async def _poll_updates(bot: Bot, dispatch, stop: asyncio.Event, allowed_updates):
+    offset = None
+    stop_task = asyncio.create_task(stop.wait())
+    try:
+        while not stop.is_set():
+            poll = asyncio.create_task(
+                bot.get_updates(offset=offset, timeout=POLLING_TIMEOUT, allowed_updates=allowed_updates)
+            )
+            await asyncio.wait({poll, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+            if not poll.done():
+                poll.cancel()
+                break
+            try:
+                updates = poll.result()
+            except Exception as e:
+                logger.error("getUpdates failed: %s", e)
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                offset = update.update_id + 1
+                dispatch(update.model_dump(mode='json', by_alias=True, exclude_none=True))
+    finally:
+        stop_task.cancel()
+    if offset is not None:
+        # Подтверждаем полученные апдейты, иначе после перезапуска Telegram пришлет их снова
+        try:
+            await bot.get_updates(offset=offset, timeout=0, limit=1)
+        except Exception as e:
+            logger.warning("Failed to confirm updates: %s", e)
+
+
+async def _serve_webhook(bot: Bot, dispatch, stop: asyncio.Event, allowed_updates, url: str, path: str,
+                         host: str, port: int, secret_token: str, max_connections: int, max_body_size: int):
+    async def handle(request):
+        received = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if secret_token and not hmac.compare_digest(received.encode(), secret_token.encode()):
+            return web.Response(status=401)
+        dispatch(await request.json())
+        return web.json_response({})
+
+    app = web.Application(client_max_size=max_body_size)
+    app.router.add_post(path, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        await bot.set_webhook(
+            url.rstrip('/') + path,
+            secret_token=secret_token or None,
+            max_connections=max_connections,
+            allowed_updates=allowed_updates
+        )
+        logger.info("Webhook server listening on %s:%s%s", host, port, path)
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run_sharded(token: str, workers: int, allowed_updates=None, webhook: dict = None):
+    """Супервизор: принимает апдейты (polling или вебхук) и раздает их N процессам по chat.id
+
+    webhook - параметры _serve_webhook (url, path, host, port, secret_token,
+    max_connections, max_body_size); None - long polling.
+    """
+    ctx = multiprocessing.get_context('spawn')
+    queues = [ctx.Queue() for _ in range(workers)]
+    processes = [ctx.Process(target=worker_main, args=(i, queues[i], token, workers), name=f"bot-worker-{i}")
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+
+    def dispatch(raw: dict):
+        chat_id = update_chat_id(raw)
+        queues[shard_for(chat_id, workers)].put((chat_id, raw))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    bot = Bot(token=token)
+    try:
+        if webhook:
+            await _serve_webhook(bot, dispatch, stop, allowed_updates, **webhook)
+        else:
+            await bot.delete_webhook()
+            await _poll_updates(bot, dispatch, stop, allowed_updates)
+    finally:
+        await bot.session.close()
+        for queue in queues:
+            queue.put(None)
+        for process in processes:
+            await loop.run_in_executor(None, process.join)